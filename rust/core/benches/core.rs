@@ -0,0 +1,262 @@
+//! Micro-benchmarks of the keyword trie, without the Python bindings.
+//!
+//! Run with `cargo bench` in `rust/core/` (`cargo bench -p textrush-core` in
+//! `rust/`), or `cargo bench -- scan/all/cjk` for a subset. Every benchmark
+//! runs case sensitive (`cs`) and insensitive (`ci`) over generated keywords
+//! and text in several scripts, so a change to `shared.rs` can be judged
+//! apart from the cost of crossing into Python.
+use criterion::{
+    black_box, criterion_group, criterion_main, BatchSize, BenchmarkId, Criterion, Throughput,
+};
+use textrush_core::{is_valid_keyword, ExtractorOptions, ExtractorStrategy, KeywordProcessor};
+
+const KEYWORDS: usize = 10_000;
+const TEXT_SIZES: [usize; 3] = [1 << 10, 1 << 16, 1 << 20]; // bytes
+
+/// Name, letters and word separator of each script.
+const SCRIPTS: [(&str, &str, &str); 4] = [
+    (
+        "latin",
+        "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ",
+        " ",
+    ),
+    (
+        "cyrillic",
+        "абвгдежзийклмнопрстуфхцчшщыэюяАБВГДЕЖЗИКЛМНОПРСТ",
+        " ",
+    ),
+    (
+        "cjk",
+        "的一是不了人我在有他这中大来上国个到说们为子和你地出道也时年得就那要下以生会",
+        "",
+    ),
+    ("sinhala", "අආඇඉඊඋඑඔකගචජටඩණතදනපබමයරලවසහළ", " "),
+];
+
+/// Deterministic xorshift, the benchmarks must see the same data every run.
+struct Rng(u64);
+
+impl Rng {
+    fn next(&mut self) -> usize {
+        self.0 ^= self.0 << 13;
+        self.0 ^= self.0 >> 7;
+        self.0 ^= self.0 << 17;
+        self.0 as usize
+    }
+
+    fn pick<'a, T>(&mut self, items: &'a [T]) -> &'a T {
+        &items[self.next() % items.len()]
+    }
+}
+
+struct Corpus {
+    script: &'static str,
+    keywords: Vec<String>, // phrases of one to three words
+    words: Vec<String>,
+    separator: &'static str,
+}
+
+impl Corpus {
+    fn new((script, letters, separator): (&'static str, &str, &'static str)) -> Self {
+        let mut rng = Rng(0x2545_f491_4f6c_dd1d);
+        let letters: Vec<char> = letters.chars().collect();
+        let words: Vec<String> = (0..KEYWORDS / 2)
+            .map(|_| {
+                let len = 2 + rng.next() % 6;
+                (0..len).map(|_| *rng.pick(&letters)).collect()
+            })
+            .collect();
+        let keywords = (0..KEYWORDS)
+            .map(|_| {
+                let len = 1 + rng.next() % 3;
+                let phrase: Vec<&str> = (0..len).map(|_| rng.pick(&words).as_str()).collect();
+                phrase.join(separator)
+            })
+            .collect();
+        Self {
+            script,
+            keywords,
+            words,
+            separator,
+        }
+    }
+
+    /// About `size` bytes of words, mostly ones no keyword contains, with
+    /// punctuation in between.
+    fn text(&self, size: usize) -> String {
+        let mut rng = Rng(size as u64 | 1);
+        let mut text = String::with_capacity(size + 64);
+        while text.len() < size {
+            match rng.next() % 8 {
+                0 => text.push_str(rng.pick(&self.keywords).as_str()),
+                1 => text.push_str(&rng.pick(&self.words).to_uppercase()),
+                2 => text.push_str(", "),
+                _ => text.push_str(&rng.pick(&self.words).chars().rev().collect::<String>()),
+            }
+            text.push_str(self.separator);
+        }
+        text
+    }
+
+    fn processor(&self, case_sensitive: bool) -> KeywordProcessor {
+        let mut processor = KeywordProcessor::new(case_sensitive);
+        for keyword in self.keywords.iter() {
+            processor.add_keyword_with_clean_name(keyword, keyword);
+        }
+        processor
+    }
+}
+
+fn modes() -> [(&'static str, bool); 2] {
+    [("cs", true), ("ci", false)]
+}
+
+fn is_valid_keyword_bench(c: &mut Criterion) {
+    let mut group = c.benchmark_group("is_valid_keyword");
+    for corpus in SCRIPTS.map(Corpus::new) {
+        group.throughput(Throughput::Elements(corpus.keywords.len() as u64));
+        group.bench_function(corpus.script, |b| {
+            b.iter(|| {
+                corpus
+                    .keywords
+                    .iter()
+                    .filter(|keyword| is_valid_keyword(black_box(keyword)))
+                    .count()
+            })
+        });
+    }
+    group.finish();
+}
+
+fn add_keyword_bench(c: &mut Criterion) {
+    let mut group = c.benchmark_group("add_keyword_with_clean_name");
+    group.sample_size(20);
+    for corpus in SCRIPTS.map(Corpus::new) {
+        group.throughput(Throughput::Elements(corpus.keywords.len() as u64));
+        for (mode, case_sensitive) in modes() {
+            group.bench_function(BenchmarkId::new(corpus.script, mode), |b| {
+                b.iter_batched(
+                    || KeywordProcessor::new(case_sensitive),
+                    |mut processor| {
+                        for keyword in corpus.keywords.iter() {
+                            processor.add_keyword_with_clean_name(keyword, keyword);
+                        }
+                        processor
+                    },
+                    BatchSize::LargeInput,
+                )
+            });
+        }
+    }
+    group.finish();
+}
+
+/// Creating a `KeywordExtractor` tokenizes the whole text, this is the cost
+/// of an extraction that finds nothing.
+fn extractor_bench(c: &mut Criterion) {
+    let mut group = c.benchmark_group("extractor_new");
+    for corpus in SCRIPTS.map(Corpus::new) {
+        for (mode, case_sensitive) in modes() {
+            let processor = corpus.processor(case_sensitive);
+            for size in TEXT_SIZES {
+                let text = corpus.text(size);
+                group.throughput(Throughput::Bytes(text.len() as u64));
+                let id = BenchmarkId::new(format!("{}/{}", corpus.script, mode), size);
+                group.bench_with_input(id, &text, |b, text| {
+                    b.iter_batched(
+                        || text.clone(),
+                        |text| {
+                            processor
+                                .extract_keywords_with_options(text, ExtractorOptions::default())
+                        },
+                        BatchSize::SmallInput,
+                    )
+                });
+            }
+        }
+    }
+    group.finish();
+}
+
+fn scan_bench(c: &mut Criterion) {
+    for (name, strategy) in [
+        ("scan/all", ExtractorStrategy::All),
+        ("scan/longest", ExtractorStrategy::Longest),
+    ] {
+        let mut group = c.benchmark_group(name);
+        for corpus in SCRIPTS.map(Corpus::new) {
+            for (mode, case_sensitive) in modes() {
+                let processor = corpus.processor(case_sensitive);
+                for size in TEXT_SIZES {
+                    let text = corpus.text(size);
+                    let options = ExtractorOptions {
+                        strategy,
+                        ..Default::default()
+                    };
+                    group.throughput(Throughput::Bytes(text.len() as u64));
+                    let id = BenchmarkId::new(format!("{}/{}", corpus.script, mode), size);
+                    group.bench_with_input(id, &text, |b, text| {
+                        b.iter_batched(
+                            || text.clone(),
+                            |text| {
+                                processor
+                                    .extract_keywords_with_options(text, options.clone())
+                                    .into_matches()
+                                    .count()
+                            },
+                            BatchSize::SmallInput,
+                        )
+                    });
+                }
+            }
+        }
+        group.finish();
+    }
+}
+
+fn replace_bench(c: &mut Criterion) {
+    let mut group = c.benchmark_group("replace_keywords");
+    for corpus in SCRIPTS.map(Corpus::new) {
+        for (mode, case_sensitive) in modes() {
+            let processor = corpus.processor(case_sensitive);
+            for size in TEXT_SIZES {
+                let text = corpus.text(size);
+                group.throughput(Throughput::Bytes(text.len() as u64));
+                let id = BenchmarkId::new(format!("{}/{}", corpus.script, mode), size);
+                group.bench_with_input(id, &text, |b, text| {
+                    b.iter_batched(
+                        || text.clone(),
+                        |text| processor.replace_keywords(text),
+                        BatchSize::SmallInput,
+                    )
+                });
+            }
+        }
+    }
+    group.finish();
+}
+
+fn all_keywords_bench(c: &mut Criterion) {
+    let mut group = c.benchmark_group("all_keywords");
+    for corpus in SCRIPTS.map(Corpus::new) {
+        group.throughput(Throughput::Elements(corpus.keywords.len() as u64));
+        for (mode, case_sensitive) in modes() {
+            let processor = corpus.processor(case_sensitive);
+            group.bench_function(BenchmarkId::new(corpus.script, mode), |b| {
+                b.iter(|| processor.get_all_keywords_with_clean_names().count())
+            });
+        }
+    }
+    group.finish();
+}
+
+criterion_group!(
+    benches,
+    is_valid_keyword_bench,
+    add_keyword_bench,
+    extractor_bench,
+    scan_bench,
+    replace_bench,
+    all_keywords_bench
+);
+criterion_main!(benches);
@@ -0,0 +1,167 @@
+use fxhash::FxHashMap;
+use unicase::UniCase;
+
+const NONE: u32 = u32::MAX;
+
+/// Keyword trie flattened into a token automaton for fast scanning.
+///
+/// Every distinct token gets a dense id, so a text token is hashed once per
+/// extraction instead of once per trie probe. Transitions out of the start
+/// state are a plain array indexed by token id, the others share a single
+/// table keyed by (state, token id), which keeps the hot data small enough to
+/// stay in cache. `T` is whatever the caller reports for the final states.
+#[derive(Debug)]
+pub struct Automaton<T> {
+    symbols: FxHashMap<Box<str>, u32>, // tokens, case folded unless `case_sensitive`
+    starts: Vec<u32>,                  // state after the first token, by token id
+    transitions: FxHashMap<(u32, u32), u32>,
+    outputs: Vec<u32>, // index into `finals` by state
+    finals: Vec<T>,
+    case_sensitive: bool,
+}
+
+impl<T> Automaton<T> {
+    pub fn new(case_sensitive: bool) -> Self {
+        Self {
+            symbols: FxHashMap::default(),
+            starts: Vec::new(),
+            transitions: FxHashMap::default(),
+            outputs: vec![NONE], // the start state
+            finals: Vec::new(),
+            case_sensitive,
+        }
+    }
+
+    /// The start state.
+    pub fn root(&self) -> u32 {
+        0
+    }
+
+    /// Adds a state reached from `from` by `token` and returns it. Every
+    /// (state, token) pair must only be added once.
+    pub fn add_state(&mut self, from: u32, token: &str) -> u32 {
+        let key = self.fold(token).into_owned().into_boxed_str();
+        let next = self.symbols.len() as u32;
+        let symbol = *self.symbols.entry(key).or_insert(next);
+        let state = self.outputs.len() as u32;
+        self.outputs.push(NONE);
+        if from == 0 {
+            if self.starts.len() <= symbol as usize {
+                self.starts.resize(symbol as usize + 1, NONE);
+            }
+            self.starts[symbol as usize] = state;
+        } else {
+            self.transitions.insert((from, symbol), state);
+        }
+        state
+    }
+
+    pub fn set_output(&mut self, state: u32, output: T) {
+        self.outputs[state as usize] = self.finals.len() as u32;
+        self.finals.push(output);
+    }
+
+    fn fold<'a>(&self, token: &'a str) -> std::borrow::Cow<'a, str> {
+        let folded = token
+            .bytes()
+            .all(|b| b.is_ascii() && !b.is_ascii_uppercase());
+        if self.case_sensitive || folded {
+            token.into()
+        } else if token.is_ascii() {
+            token.to_ascii_lowercase().into()
+        } else {
+            UniCase::unicode(token).to_folded_case().into()
+        }
+    }
+
+    /// Id of `token`, `None` if no keyword contains it.
+    #[inline]
+    pub fn symbol(&self, token: &str) -> Option<u32> {
+        self.symbols.get(&*self.fold(token)).copied()
+    }
+
+    /// The state reached from `state` by the token with id `symbol`.
+    #[inline]
+    pub fn next(&self, state: u32, symbol: u32) -> Option<u32> {
+        let next = if state == 0 {
+            self.starts.get(symbol as usize).copied().unwrap_or(NONE)
+        } else {
+            match self.transitions.get(&(state, symbol)) {
+                Some(&next) => next,
+                None => NONE,
+            }
+        };
+        if next == NONE {
+            None
+        } else {
+            Some(next)
+        }
+    }
+
+    /// What `set_output` stored for `state`.
+    #[inline]
+    pub fn output(&self, state: u32) -> Option<&T> {
+        match self.outputs[state as usize] {
+            NONE => None,
+            i => Some(&self.finals[i as usize]),
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn automaton(case_sensitive: bool) -> Automaton<&'static str> {
+        let mut automaton = Automaton::new(case_sensitive);
+        let new = automaton.add_state(0, "New");
+        let space = automaton.add_state(new, " ");
+        let york = automaton.add_state(space, "York");
+        automaton.set_output(new, "new");
+        automaton.set_output(york, "new york");
+        let kelvin = automaton.add_state(0, "\u{212A}elvin"); // Kelvin sign
+        automaton.set_output(kelvin, "kelvin");
+        automaton
+    }
+
+    fn walk<'a>(automaton: &'a Automaton<&'static str>, tokens: &[&str]) -> Vec<&'a str> {
+        let mut found = vec![];
+        let mut state = automaton.root();
+        for token in tokens {
+            state = match automaton
+                .symbol(token)
+                .and_then(|symbol| automaton.next(state, symbol))
+            {
+                Some(state) => state,
+                None => break,
+            };
+            found.extend(automaton.output(state));
+        }
+        found
+    }
+
+    #[test]
+    fn transitions() {
+        let automaton = automaton(true);
+        assert_eq!(
+            walk(&automaton, &["New", " ", "York"]),
+            vec!["new", "new york"]
+        );
+        assert_eq!(walk(&automaton, &["New", " ", "Jersey"]), vec!["new"]);
+        assert!(walk(&automaton, &["new"]).is_empty());
+        assert!(walk(&automaton, &[" ", "York"]).is_empty());
+        // a token known from deeper in the trie does not start a keyword
+        assert!(walk(&automaton, &["York"]).is_empty());
+    }
+
+    #[test]
+    fn case_insensitive() {
+        let automaton = automaton(false);
+        assert_eq!(
+            walk(&automaton, &["NEW", " ", "york"]),
+            vec!["new", "new york"]
+        );
+        assert_eq!(walk(&automaton, &["kelvin"]), vec!["kelvin"]);
+        assert_eq!(walk(&automaton, &["KELVIN"]), vec!["kelvin"]);
+    }
+}
@@ -0,0 +1,325 @@
+use std::cmp::Ordering;
+use std::collections::BinaryHeap;
+use unicase::UniCase;
+
+/// A keyword found by `CompletionIndex::complete`.
+#[derive(Debug, Clone, PartialEq)]
+pub struct Completion {
+    pub keyword: String,
+    pub clean_name: String,
+    pub weight: f64,
+    order: usize,
+}
+
+impl Completion {
+    pub fn new(keyword: String, clean_name: String, weight: f64, order: usize) -> Self {
+        Self {
+            keyword,
+            clean_name,
+            weight,
+            order,
+        }
+    }
+
+    fn rank(&self) -> Rank {
+        Rank {
+            weight: self.weight,
+            order: self.order,
+        }
+    }
+}
+
+/// Heavier first, then earlier inserted first.
+#[derive(Debug, Clone, Copy)]
+struct Rank {
+    weight: f64,
+    order: usize,
+}
+
+impl Ord for Rank {
+    fn cmp(&self, other: &Self) -> Ordering {
+        self.weight
+            .total_cmp(&other.weight)
+            .then_with(|| other.order.cmp(&self.order))
+    }
+}
+
+impl PartialOrd for Rank {
+    fn partial_cmp(&self, other: &Self) -> Option<Ordering> {
+        Some(self.cmp(other))
+    }
+}
+
+impl PartialEq for Rank {
+    fn eq(&self, other: &Self) -> bool {
+        self.cmp(other) == Ordering::Equal
+    }
+}
+
+impl Eq for Rank {}
+
+/// Character trie over whole keywords for prefix completion.
+///
+/// Every node knows the best rank in its subtree and keeps its children sorted
+/// by it, so a query walks down the prefix and then pops the best `limit`
+/// keywords from a heap, pushing at most three items per pop, instead of
+/// visiting the subtree under the prefix.
+#[derive(Debug)]
+pub struct CompletionIndex {
+    nodes: Vec<CompletionNode>,
+    entries: Vec<Completion>,
+    case_sensitive: bool,
+}
+
+#[derive(Default, Debug)]
+struct CompletionNode {
+    children: Vec<(char, u32)>, // sorted by char
+    ranked: Vec<u32>,           // children, best subtree first
+    best: Option<Rank>,
+    entry: Option<u32>,
+}
+
+#[derive(PartialEq, Eq, PartialOrd, Ord)]
+enum Item {
+    Entry(u32),
+    Node {
+        node: u32,
+        parent: u32,
+        position: u32,
+    },
+}
+
+impl CompletionIndex {
+    pub fn new<I: IntoIterator<Item = Completion>>(entries: I, case_sensitive: bool) -> Self {
+        let mut index = Self {
+            nodes: vec![CompletionNode::default()],
+            entries: entries.into_iter().collect(),
+            case_sensitive,
+        };
+        for entry_id in 0..index.entries.len() {
+            let key = index.fold(&index.entries[entry_id].keyword);
+            let mut node = 0;
+            for c in key.chars() {
+                node = match index.nodes[node]
+                    .children
+                    .binary_search_by_key(&c, |&(c, _)| c)
+                {
+                    Ok(i) => index.nodes[node].children[i].1 as usize,
+                    Err(i) => {
+                        let child = index.nodes.len();
+                        index.nodes.push(CompletionNode::default());
+                        index.nodes[node].children.insert(i, (c, child as u32));
+                        child
+                    }
+                };
+            }
+            // keywords that only differ in case share a trie node, but keep the best one anyway
+            let rank = index.entries[entry_id].rank();
+            let current = index.nodes[node].entry;
+            if current.map_or(true, |current| {
+                index.entries[current as usize].rank() < rank
+            }) {
+                index.nodes[node].entry = Some(entry_id as u32);
+            }
+        }
+        // children are always created after their parent
+        for node in (0..index.nodes.len()).rev() {
+            let mut best = index.nodes[node]
+                .entry
+                .map(|entry| index.entries[entry as usize].rank());
+            let mut ranked: Vec<u32> = index.nodes[node]
+                .children
+                .iter()
+                .map(|&(_, child)| child)
+                .collect();
+            ranked.sort_by_key(|&child| std::cmp::Reverse(index.nodes[child as usize].best));
+            if let Some(&first) = ranked.first() {
+                best = best.max(index.nodes[first as usize].best);
+            }
+            index.nodes[node].ranked = ranked;
+            index.nodes[node].best = best;
+        }
+        index
+    }
+
+    pub fn len(&self) -> usize {
+        self.entries.len()
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.entries.is_empty()
+    }
+
+    /// Folds case the way the keyword trie compares tokens (`UniCase`), so
+    /// completion and extraction agree on which keywords a text spells.
+    fn fold(&self, s: &str) -> String {
+        if self.case_sensitive {
+            s.to_string()
+        } else {
+            UniCase::unicode(s).to_folded_case()
+        }
+    }
+
+    /// Returns up to `limit` keywords starting with `prefix`, heaviest first.
+    pub fn complete(&self, prefix: &str, limit: usize) -> Vec<&Completion> {
+        let mut node = 0;
+        for c in self.fold(prefix).chars() {
+            match self.nodes[node]
+                .children
+                .binary_search_by_key(&c, |&(c, _)| c)
+            {
+                Ok(i) => node = self.nodes[node].children[i].1 as usize,
+                Err(_) => return vec![],
+            }
+        }
+        let mut found = Vec::with_capacity(limit.min(self.entries.len()));
+        let mut heap = BinaryHeap::new();
+        if let Some(best) = self.nodes[node].best {
+            heap.push((
+                best,
+                Item::Node {
+                    node: node as u32,
+                    parent: u32::MAX,
+                    position: 0,
+                },
+            ));
+        }
+        while found.len() < limit {
+            let item = match heap.pop() {
+                Some((_, item)) => item,
+                None => break,
+            };
+            match item {
+                Item::Entry(entry) => found.push(&self.entries[entry as usize]),
+                Item::Node {
+                    node,
+                    parent,
+                    position,
+                } => {
+                    let current = &self.nodes[node as usize];
+                    if let Some(entry) = current.entry {
+                        heap.push((self.entries[entry as usize].rank(), Item::Entry(entry)));
+                    }
+                    self.push_child(&mut heap, node, 0);
+                    // the next sibling can only be as good as this node
+                    if parent != u32::MAX {
+                        self.push_child(&mut heap, parent, position + 1);
+                    }
+                }
+            }
+        }
+        found
+    }
+
+    fn push_child(&self, heap: &mut BinaryHeap<(Rank, Item)>, parent: u32, position: u32) {
+        if let Some(&child) = self.nodes[parent as usize].ranked.get(position as usize) {
+            if let Some(best) = self.nodes[child as usize].best {
+                heap.push((
+                    best,
+                    Item::Node {
+                        node: child,
+                        parent,
+                        position,
+                    },
+                ));
+            }
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn index(case_sensitive: bool) -> CompletionIndex {
+        let keywords = [
+            ("new york", 5.0),
+            ("new jersey", 3.0),
+            ("newark", 4.0),
+            ("New Delhi", 3.0),
+            ("boston", 9.0),
+            ("new", 1.0),
+        ];
+        let entries = keywords
+            .iter()
+            .enumerate()
+            .map(|(order, &(k, w))| Completion::new(k.to_string(), k.to_uppercase(), w, order));
+        CompletionIndex::new(entries, case_sensitive)
+    }
+
+    fn keywords(found: Vec<&Completion>) -> Vec<&str> {
+        found.iter().map(|c| c.keyword.as_str()).collect()
+    }
+
+    #[test]
+    fn ranked_by_weight_then_order() {
+        let index = index(false);
+        assert_eq!(
+            keywords(index.complete("new", 10)),
+            vec!["new york", "newark", "new jersey", "New Delhi", "new"]
+        );
+        assert_eq!(
+            keywords(index.complete("NEW ", 2)),
+            vec!["new york", "new jersey"]
+        );
+        assert_eq!(keywords(index.complete("", 1)), vec!["boston"]);
+        assert!(index.complete("chicago", 10).is_empty());
+        assert!(index.complete("new", 0).is_empty());
+    }
+
+    #[test]
+    fn case_sensitive() {
+        let index = index(true);
+        assert_eq!(keywords(index.complete("New", 10)), vec!["New Delhi"]);
+        assert_eq!(
+            keywords(index.complete("new ", 10)),
+            vec!["new york", "new jersey"]
+        );
+    }
+
+    #[test]
+    fn unicode_case_folding() {
+        let entries = ["straße", "\u{212A}elvin", "ΟΔΟΣ", "odd"]
+            .iter()
+            .enumerate()
+            .map(|(order, k)| Completion::new(k.to_string(), k.to_string(), 1.0, order));
+        let index = CompletionIndex::new(entries, false);
+        assert_eq!(keywords(index.complete("STRASSE", 10)), vec!["straße"]);
+        assert_eq!(keywords(index.complete("strass", 10)), vec!["straße"]);
+        assert_eq!(keywords(index.complete("kel", 10)), vec!["\u{212A}elvin"]);
+        assert_eq!(keywords(index.complete("οδος", 10)), vec!["ΟΔΟΣ"]);
+        assert_eq!(keywords(index.complete("od", 10)), vec!["odd"]);
+    }
+
+    #[test]
+    fn agrees_with_sorting() {
+        let mut seed = 7u64;
+        let mut next = move || {
+            seed ^= seed << 13;
+            seed ^= seed >> 7;
+            seed ^= seed << 17;
+            seed
+        };
+        let mut entries = vec![];
+        for order in 0..2000 {
+            let len = 1 + next() % 6;
+            let keyword: String = (0..len)
+                .map(|_| (b'a' + (next() % 3) as u8) as char)
+                .collect();
+            let weight = (next() % 5) as f64;
+            entries.push(Completion::new(keyword.clone(), keyword, weight, order));
+        }
+        entries.sort_by(|a, b| a.keyword.cmp(&b.keyword));
+        entries.dedup_by(|a, b| a.keyword == b.keyword);
+        let index = CompletionIndex::new(entries.clone(), true);
+        for prefix in ["", "a", "ab", "cab", "bbb"] {
+            let mut expected: Vec<&Completion> = entries
+                .iter()
+                .filter(|c| c.keyword.starts_with(prefix))
+                .collect();
+            expected.sort_by_key(|c| std::cmp::Reverse(c.rank()));
+            expected.truncate(7);
+            assert_eq!(index.complete(prefix, 7), expected);
+        }
+    }
+}
@@ -0,0 +1,196 @@
+use std::borrow::Cow;
+use unicase::UniCase;
+
+/// Character trie over the distinct tokens of a keyword trie, searched with a
+/// bounded Levenshtein automaton to find the tokens within a few edits of a
+/// text token without comparing against every token.
+///
+/// Unless case sensitive, tokens are case folded the way the keyword trie
+/// compares them (`UniCase`), so "ß" and "ss" or the Kelvin sign and "k" are
+/// the same character sequence here too. Tokens without a letter or digit are
+/// neither indexed nor searched, punctuation only ever matches exactly.
+#[derive(Default, Debug)]
+pub struct TokenIndex {
+    nodes: Vec<IndexNode>,
+    case_sensitive: bool,
+}
+
+#[derive(Default, Debug)]
+struct IndexNode {
+    children: Vec<(char, u32)>, // sorted by char
+    terminal: bool,
+}
+
+impl TokenIndex {
+    pub fn new(case_sensitive: bool) -> Self {
+        Self {
+            nodes: vec![IndexNode::default()],
+            case_sensitive,
+        }
+    }
+
+    fn fold<'a>(&self, token: &'a str) -> Option<Cow<'a, str>> {
+        if !token.chars().any(char::is_alphanumeric) {
+            None
+        } else if self.case_sensitive {
+            Some(token.into())
+        } else {
+            Some(UniCase::unicode(token).to_folded_case().into())
+        }
+    }
+
+    pub fn insert(&mut self, token: &str) {
+        let Some(token) = self.fold(token) else {
+            return;
+        };
+        let mut node = 0;
+        for c in token.chars() {
+            node = match self.nodes[node]
+                .children
+                .binary_search_by_key(&c, |&(c, _)| c)
+            {
+                Ok(i) => self.nodes[node].children[i].1 as usize,
+                Err(i) => {
+                    let child = self.nodes.len();
+                    self.nodes.push(IndexNode::default());
+                    self.nodes[node].children.insert(i, (c, child as u32));
+                    child
+                }
+            };
+        }
+        self.nodes[node].terminal = true;
+    }
+
+    /// Returns the indexed tokens within `max_edits` of `query` with their distance.
+    ///
+    /// Edits are insertions, deletions, substitutions and transpositions of
+    /// adjacent characters (optimal string alignment distance).
+    pub fn search(&self, query: &str, max_edits: u32) -> Vec<(String, u32)> {
+        let Some(query) = self.fold(query) else {
+            return vec![];
+        };
+        let query: Vec<char> = query.chars().collect();
+        let first_row: Vec<u32> = (0..=query.len() as u32).collect();
+        let mut found = vec![];
+        let mut prefix = String::new();
+        for &(c, child) in self.nodes[0].children.iter() {
+            self.search_node(
+                child as usize,
+                c,
+                None,
+                &query,
+                &first_row,
+                None,
+                max_edits,
+                &mut prefix,
+                &mut found,
+            );
+        }
+        found
+    }
+
+    #[allow(clippy::too_many_arguments)]
+    fn search_node(
+        &self,
+        node: usize,
+        c: char,
+        prev_c: Option<char>,
+        query: &[char],
+        prev_row: &[u32],
+        prev_prev_row: Option<&[u32]>,
+        max_edits: u32,
+        prefix: &mut String,
+        found: &mut Vec<(String, u32)>,
+    ) {
+        let mut row = Vec::with_capacity(prev_row.len());
+        row.push(prev_row[0] + 1);
+        for j in 1..=query.len() {
+            let substitution = prev_row[j - 1] + (query[j - 1] != c) as u32;
+            let mut distance = substitution.min(row[j - 1] + 1).min(prev_row[j] + 1);
+            if let (Some(prev_c), Some(prev_prev_row)) = (prev_c, prev_prev_row) {
+                if j > 1 && query[j - 1] == prev_c && query[j - 2] == c {
+                    distance = distance.min(prev_prev_row[j - 2] + 1);
+                }
+            }
+            row.push(distance);
+        }
+        prefix.push(c);
+        let distance = row[query.len()];
+        if self.nodes[node].terminal && distance <= max_edits {
+            found.push((prefix.clone(), distance));
+        }
+        // a transposition can still lower the next row by one below the previous row
+        let row_min = *row.iter().min().unwrap();
+        let prev_min = *prev_row.iter().min().unwrap();
+        if row_min <= max_edits || prev_min < max_edits {
+            for &(next_c, child) in self.nodes[node].children.iter() {
+                self.search_node(
+                    child as usize,
+                    next_c,
+                    Some(c),
+                    query,
+                    &row,
+                    Some(prev_row),
+                    max_edits,
+                    prefix,
+                    found,
+                );
+            }
+        }
+        prefix.pop();
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn distance(a: &str, b: &str) -> Option<u32> {
+        let mut index = TokenIndex::new(true);
+        index.insert(a);
+        index.search(b, 10).first().map(|(_, d)| *d)
+    }
+
+    #[test]
+    fn edit_distances() {
+        assert_eq!(distance("python", "python"), Some(0));
+        assert_eq!(distance("python", "pyhton"), Some(1));
+        assert_eq!(distance("machine", "machne"), Some(1));
+        assert_eq!(distance("learning", "larning"), Some(1));
+        assert_eq!(distance("kitten", "sitting"), Some(3));
+        assert_eq!(distance("ab", "ba"), Some(1));
+        assert_eq!(distance("ca", "abc"), Some(3));
+    }
+
+    #[test]
+    fn search_is_bounded() {
+        let mut index = TokenIndex::new(true);
+        for token in ["python", "pythons", "java", "javascript", "py", "typhoon"] {
+            index.insert(token);
+        }
+        let mut found = index.search("pyhton", 1);
+        found.sort();
+        assert_eq!(found, vec![("python".to_string(), 1)]);
+        let mut found = index.search("pyhton", 2);
+        found.sort();
+        assert_eq!(
+            found,
+            vec![("python".to_string(), 1), ("pythons".to_string(), 2)]
+        );
+        assert!(index.search("rust", 1).is_empty());
+    }
+
+    #[test]
+    fn case_folding_and_punctuation() {
+        let mut index = TokenIndex::new(false);
+        for token in ["STRASSE", "\u{212A}elvin", ",", "--"] {
+            index.insert(token);
+        }
+        assert_eq!(index.search("Straße", 0), vec![("strasse".to_string(), 0)]);
+        assert_eq!(index.search("Straß", 1), vec![("strasse".to_string(), 1)]);
+        assert_eq!(index.search("kelvn", 1), vec![("kelvin".to_string(), 1)]);
+        assert!(index.search("a", 1).is_empty());
+        assert!(index.search(";", 1).is_empty());
+        assert!(index.search(",", 0).is_empty());
+    }
+}
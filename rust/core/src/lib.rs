@@ -0,0 +1,43 @@
+//! The keyword engine of textrush, usable from Rust without Python.
+//!
+//! ```
+//! use textrush_core::{ExtractorOptions, ExtractorStrategy, KeywordProcessor};
+//!
+//! let mut processor = KeywordProcessor::new(false);
+//! processor.add_keyword_with_clean_name("new york", "NYC");
+//! processor.add_keyword_with_clean_name("york", "York");
+//! let options = ExtractorOptions {
+//!     strategy: ExtractorStrategy::Longest,
+//!     ..Default::default()
+//! };
+//! let text = "I love New York.".to_string();
+//! let found: Vec<_> = processor
+//!     .extract_keywords_with_options(text, options)
+//!     .into_matches()
+//!     .map(|m| (m.clean_name, m.start, m.end))
+//!     .collect();
+//! assert_eq!(found, vec![("NYC", 7, 15)]);
+//! assert_eq!(processor.replace_keywords("new york".to_string()), "NYC");
+//!
+//! // the same bytes are read and written by the Python package
+//! let bytes = processor.to_bytes();
+//! assert_eq!(KeywordProcessor::from_bytes(&bytes).unwrap().len(), 2);
+//! ```
+pub mod automaton;
+pub mod complete;
+pub mod fuzzy;
+pub mod normalize;
+pub mod prefilter;
+pub mod serialize;
+pub mod shared;
+pub mod template;
+pub mod tokenizer;
+
+pub use normalize::Normalization;
+pub use serialize::DecodeError;
+pub use shared::{
+    is_valid_keyword, Engine, ExtractorOptions, ExtractorProfile, ExtractorStrategy,
+    KeywordProcessor, Match, TrieStats,
+};
+pub use template::Template;
+pub use tokenizer::Tokenizer;
@@ -0,0 +1,119 @@
+use std::borrow::Cow;
+use std::str::FromStr;
+use unicase::UniCase;
+use unicode_normalization::char::canonical_combining_class;
+use unicode_normalization::UnicodeNormalization;
+
+/// How keyword and text tokens are normalized before they are compared.
+///
+/// Keyword tokens are normalized once when they are added, text tokens
+/// during the scan, so the offsets of a match still refer to the original
+/// text. Normalizing token by token is the same as normalizing the whole
+/// text as long as the tokenizer splits the original the way it would split
+/// the normalized text, which holds for the word, whitespace and grapheme
+/// boundaries of everything but exotic compatibility characters.
+#[derive(Default, Debug, Clone, Copy, PartialEq, Eq)]
+pub enum Normalization {
+    #[default]
+    None,
+    Nfkc,         // compatibility composition, e.g. "ﬁ" is "fi" and "２" is "2"
+    NfkcCasefold, // NFKC plus full case folding
+    StripAccents, // canonical decomposition without the combining marks
+}
+
+impl FromStr for Normalization {
+    type Err = ();
+
+    fn from_str(s: &str) -> Result<Self, Self::Err> {
+        match s {
+            "nfkc" => Ok(Normalization::Nfkc),
+            "nfkc_casefold" => Ok(Normalization::NfkcCasefold),
+            "strip_accents" => Ok(Normalization::StripAccents),
+            _ => Err(()),
+        }
+    }
+}
+
+impl Normalization {
+    /// The name parsed by `from_str`, `None` for `Normalization::None`.
+    pub fn as_str(&self) -> Option<&'static str> {
+        match self {
+            Normalization::None => None,
+            Normalization::Nfkc => Some("nfkc"),
+            Normalization::NfkcCasefold => Some("nfkc_casefold"),
+            Normalization::StripAccents => Some("strip_accents"),
+        }
+    }
+
+    /// The normalized form of `token`, borrowed when it is unchanged.
+    #[inline]
+    pub fn apply<'a>(&self, token: &'a str) -> Cow<'a, str> {
+        match self {
+            Normalization::None => token.into(),
+            // ASCII is its own NFKC form and has no accents
+            Normalization::NfkcCasefold
+                if token.is_ascii() && token.bytes().any(|b| b.is_ascii_uppercase()) =>
+            {
+                token.to_ascii_lowercase().into()
+            }
+            _ if token.is_ascii() => token.into(),
+            Normalization::Nfkc => token.nfkc().collect::<String>().into(),
+            Normalization::NfkcCasefold => {
+                // folding can decompose (U+01F0 folds to "j\u{30C}"), so compose again
+                let folded = UniCase::unicode(token.nfkc().collect::<String>()).to_folded_case();
+                folded.nfkc().collect::<String>().into()
+            }
+            Normalization::StripAccents => token
+                .nfd()
+                .filter(|&c| canonical_combining_class(c) == 0)
+                .nfc()
+                .collect::<String>()
+                .into(),
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn nfkc() {
+        let nfkc = Normalization::Nfkc;
+        assert_eq!(nfkc.apply("ﬁle"), "file");
+        assert_eq!(nfkc.apply("２０２４"), "2024");
+        assert_eq!(nfkc.apply("e\u{301}"), "é");
+        assert_eq!(nfkc.apply("\u{A0}"), " ");
+        assert_eq!(nfkc.apply("Straße"), "Straße");
+        assert!(matches!(nfkc.apply("ascii"), Cow::Borrowed("ascii")));
+    }
+
+    #[test]
+    fn nfkc_casefold() {
+        let casefold = Normalization::NfkcCasefold;
+        assert_eq!(casefold.apply("Straße"), "strasse");
+        assert_eq!(casefold.apply("ＡＢＣ"), "abc");
+        assert_eq!(casefold.apply("\u{212A}elvin"), "kelvin");
+        assert_eq!(casefold.apply("ASCII"), "ascii");
+        assert!(matches!(casefold.apply("ascii"), Cow::Borrowed("ascii")));
+    }
+
+    #[test]
+    fn strip_accents() {
+        let strip = Normalization::StripAccents;
+        assert_eq!(strip.apply("café"), "cafe");
+        assert_eq!(strip.apply("cafe\u{301}"), "cafe");
+        assert_eq!(strip.apply("Ångström"), "Angstrom");
+        assert_eq!(strip.apply("한국"), "한국"); // Hangul syllables recompose
+        assert_eq!(strip.apply("ﬁ"), "ﬁ"); // no compatibility mapping
+    }
+
+    #[test]
+    fn names() {
+        for name in ["nfkc", "nfkc_casefold", "strip_accents"] {
+            assert_eq!(Normalization::from_str(name).unwrap().as_str(), Some(name));
+        }
+        assert_eq!(Normalization::None.as_str(), None);
+        assert!(Normalization::from_str("nfd").is_err());
+    }
+}
@@ -0,0 +1,100 @@
+use unicase::UniCase;
+
+/// Bitset over the (first byte, byte length) pairs of the tokens that start a
+/// keyword, so that most text tokens are rejected with one load instead of a
+/// hash probe of the trie root. Whitespace and punctuation tokens fall out
+/// of the same test as long as no keyword starts with them.
+///
+/// The filter can only answer "maybe" for tokens it has not seen, removing a
+/// keyword leaves its bit set. Lengths from 63 bytes on share a bit.
+#[derive(Debug)]
+pub struct Prefilter {
+    bits: [u64; 256], // `bits[first byte]` has bit `length` set
+    case_sensitive: bool,
+}
+
+impl Prefilter {
+    pub fn new(case_sensitive: bool) -> Self {
+        Self {
+            bits: [0; 256],
+            case_sensitive,
+        }
+    }
+
+    #[inline]
+    fn set(&mut self, token: &[u8]) {
+        self.bits[token[0] as usize] |= 1 << token.len().min(63);
+    }
+
+    /// Registers the first token of a keyword.
+    pub fn insert(&mut self, token: &str) {
+        if token.is_empty() {
+            return;
+        }
+        if self.case_sensitive {
+            self.set(token.as_bytes());
+        } else if token.is_ascii() {
+            self.set(token.to_ascii_lowercase().as_bytes());
+        } else {
+            // non-ASCII text tokens always pass, but ASCII ones can still
+            // match a keyword token that folds to ASCII (e.g. the Kelvin sign)
+            let folded = UniCase::unicode(token).to_folded_case();
+            if folded.is_ascii() {
+                self.set(folded.as_bytes());
+            }
+        }
+    }
+
+    /// Whether `token` may be the first token of a keyword.
+    #[inline]
+    pub fn may_start(&self, token: &str) -> bool {
+        let bytes = token.as_bytes();
+        let first = match bytes.first() {
+            Some(&first) => first,
+            None => return true,
+        };
+        let first = if self.case_sensitive {
+            first
+        } else if first.is_ascii() {
+            first.to_ascii_lowercase()
+        } else {
+            return true;
+        };
+        (self.bits[first as usize] >> bytes.len().min(63)) & 1 != 0
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn rejects_unseen_first_bytes_and_lengths() {
+        let mut prefilter = Prefilter::new(true);
+        prefilter.insert("python");
+        prefilter.insert("Machine");
+        assert!(prefilter.may_start("python"));
+        assert!(prefilter.may_start("Machine"));
+        assert!(prefilter.may_start("pytest")); // same first byte and length
+        assert!(!prefilter.may_start("Python"));
+        assert!(!prefilter.may_start("machine"));
+        assert!(!prefilter.may_start("py"));
+        assert!(!prefilter.may_start(" "));
+        assert!(!prefilter.may_start(","));
+    }
+
+    #[test]
+    fn case_insensitive() {
+        let mut prefilter = Prefilter::new(false);
+        prefilter.insert("Python");
+        prefilter.insert("\u{212A}elvin"); // Kelvin sign
+        prefilter.insert("Émile");
+        assert!(prefilter.may_start("python"));
+        assert!(prefilter.may_start("PYTHON"));
+        assert!(prefilter.may_start("kelvin"));
+        assert!(prefilter.may_start("émile"));
+        assert!(prefilter.may_start("ÉMILE"));
+        assert!(!prefilter.may_start("emile"));
+        assert!(!prefilter.may_start("java"));
+    }
+}
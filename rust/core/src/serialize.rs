@@ -0,0 +1,278 @@
+//! Primitives of the binary format of `KeywordProcessor::to_bytes`.
+//!
+//! Everything is little endian. Strings are a `u32` byte length followed by
+//! UTF-8, optional values a `u8` flag followed by the value if it is 1.
+use std::fmt;
+
+pub(crate) const MAGIC: &[u8; 4] = b"TRSH";
+pub(crate) const VERSION: u8 = 1;
+
+/// Why `KeywordProcessor::from_bytes` rejected its input.
+#[derive(Debug, Clone, PartialEq, Eq)]
+pub enum DecodeError {
+    Magic,                 // not a serialized keyword processor
+    Version(u8),           // written by a newer version of the format
+    Truncated,             // the input ends inside a value
+    TrailingBytes,         // the input continues after the trie
+    Invalid(&'static str), // a value no `to_bytes` writes, naming what it was
+}
+
+impl fmt::Display for DecodeError {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        match self {
+            DecodeError::Magic => write!(f, "not a serialized keyword processor"),
+            DecodeError::Version(version) => {
+                write!(
+                    f,
+                    "unsupported format version {}, expected {}",
+                    version, VERSION
+                )
+            }
+            DecodeError::Truncated => write!(f, "truncated input"),
+            DecodeError::TrailingBytes => write!(f, "trailing bytes after the keywords"),
+            DecodeError::Invalid(what) => write!(f, "invalid {}", what),
+        }
+    }
+}
+
+impl std::error::Error for DecodeError {}
+
+#[derive(Default)]
+pub(crate) struct Encoder {
+    pub bytes: Vec<u8>,
+}
+
+impl Encoder {
+    pub fn u8(&mut self, value: u8) {
+        self.bytes.push(value);
+    }
+
+    pub fn u32(&mut self, value: u32) {
+        self.bytes.extend_from_slice(&value.to_le_bytes());
+    }
+
+    pub fn u64(&mut self, value: u64) {
+        self.bytes.extend_from_slice(&value.to_le_bytes());
+    }
+
+    pub fn f64(&mut self, value: f64) {
+        self.bytes.extend_from_slice(&value.to_le_bytes());
+    }
+
+    pub fn str(&mut self, value: &str) {
+        self.u32(value.len() as u32);
+        self.bytes.extend_from_slice(value.as_bytes());
+    }
+
+    pub fn opt_str(&mut self, value: Option<&str>) {
+        self.u8(value.is_some() as u8);
+        if let Some(value) = value {
+            self.str(value);
+        }
+    }
+
+    pub fn opt_u64(&mut self, value: Option<u64>) {
+        self.u8(value.is_some() as u8);
+        if let Some(value) = value {
+            self.u64(value);
+        }
+    }
+}
+
+pub(crate) struct Decoder<'a> {
+    bytes: &'a [u8],
+}
+
+impl<'a> Decoder<'a> {
+    pub fn new(bytes: &'a [u8]) -> Self {
+        Self { bytes }
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.bytes.is_empty()
+    }
+
+    pub fn take(&mut self, n: usize) -> Result<&'a [u8], DecodeError> {
+        if self.bytes.len() < n {
+            return Err(DecodeError::Truncated);
+        }
+        let (head, rest) = self.bytes.split_at(n);
+        self.bytes = rest;
+        Ok(head)
+    }
+
+    fn array<const N: usize>(&mut self) -> Result<[u8; N], DecodeError> {
+        Ok(self.take(N)?.try_into().unwrap())
+    }
+
+    pub fn u8(&mut self) -> Result<u8, DecodeError> {
+        Ok(self.take(1)?[0])
+    }
+
+    pub fn u32(&mut self) -> Result<u32, DecodeError> {
+        self.array().map(u32::from_le_bytes)
+    }
+
+    pub fn u64(&mut self) -> Result<u64, DecodeError> {
+        self.array().map(u64::from_le_bytes)
+    }
+
+    pub fn f64(&mut self) -> Result<f64, DecodeError> {
+        self.array().map(f64::from_le_bytes)
+    }
+
+    pub fn bool(&mut self, what: &'static str) -> Result<bool, DecodeError> {
+        match self.u8()? {
+            0 => Ok(false),
+            1 => Ok(true),
+            _ => Err(DecodeError::Invalid(what)),
+        }
+    }
+
+    pub fn str(&mut self) -> Result<&'a str, DecodeError> {
+        let len = self.u32()? as usize;
+        std::str::from_utf8(self.take(len)?).map_err(|_| DecodeError::Invalid("UTF-8"))
+    }
+
+    pub fn opt_str(&mut self) -> Result<Option<&'a str>, DecodeError> {
+        Ok(match self.bool("option flag")? {
+            true => Some(self.str()?),
+            false => None,
+        })
+    }
+
+    pub fn opt_u64(&mut self) -> Result<Option<u64>, DecodeError> {
+        Ok(match self.bool("option flag")? {
+            true => Some(self.u64()?),
+            false => None,
+        })
+    }
+
+    /// A `u32` count of items that take at least `min_size` bytes each,
+    /// checked against the rest of the input before anything is allocated.
+    pub fn count(&mut self, min_size: usize) -> Result<usize, DecodeError> {
+        let count = self.u32()? as usize;
+        if count.saturating_mul(min_size) > self.bytes.len() {
+            return Err(DecodeError::Truncated);
+        }
+        Ok(count)
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+    use crate::normalize::Normalization;
+    use crate::shared::{Engine, ExtractorStrategy, KeywordProcessor};
+    use crate::tokenizer::Tokenizer;
+
+    #[test]
+    fn round_trip() {
+        let mut encoder = Encoder::default();
+        encoder.u8(7);
+        encoder.u32(70_000);
+        encoder.u64(u64::MAX);
+        encoder.f64(-0.5);
+        encoder.str("Straße");
+        encoder.opt_str(None);
+        encoder.opt_u64(Some(3));
+        let mut decoder = Decoder::new(&encoder.bytes);
+        assert_eq!(decoder.u8(), Ok(7));
+        assert_eq!(decoder.u32(), Ok(70_000));
+        assert_eq!(decoder.u64(), Ok(u64::MAX));
+        assert_eq!(decoder.f64(), Ok(-0.5));
+        assert_eq!(decoder.str(), Ok("Straße"));
+        assert_eq!(decoder.opt_str(), Ok(None));
+        assert_eq!(decoder.opt_u64(), Ok(Some(3)));
+        assert!(decoder.is_empty());
+        assert_eq!(decoder.u8(), Err(DecodeError::Truncated));
+    }
+
+    #[test]
+    fn invalid() {
+        assert_eq!(
+            Decoder::new(&[2]).opt_u64(),
+            Err(DecodeError::Invalid("option flag"))
+        );
+        assert_eq!(
+            Decoder::new(&[1, 0, 0, 0, 0xff]).str(),
+            Err(DecodeError::Invalid("UTF-8"))
+        );
+        assert_eq!(
+            Decoder::new(&[9, 0, 0, 0, b'a']).str(),
+            Err(DecodeError::Truncated)
+        );
+        // a count larger than the input could hold is refused before allocating
+        assert_eq!(
+            Decoder::new(&[0xff, 0xff, 0xff, 0xff, 0]).count(1),
+            Err(DecodeError::Truncated)
+        );
+    }
+
+    fn matches(processor: &KeywordProcessor, text: &str) -> Vec<(String, usize, usize)> {
+        processor
+            .extract_keywords_with_span(text.to_string(), ExtractorStrategy::All)
+            .collect()
+    }
+
+    #[test]
+    fn keyword_processor() {
+        let text = "New York, new york and Straße in W17 and w3 w4";
+        for engine in [Engine::HashTrie, Engine::Compact, Engine::Automaton] {
+            for case_sensitive in [false, true] {
+                let mut processor = KeywordProcessor::with_normalization(
+                    case_sensitive,
+                    Tokenizer::WordBounds,
+                    engine,
+                    Normalization::Nfkc,
+                );
+                for i in 0..40 {
+                    processor.add_weighted_keyword(&format!("w{}", i), &format!("W{}", i), 0.5);
+                }
+                processor.add_keyword_with_clean_name("new york", "NYC");
+                processor.add_to_dictionary("new york", "NY", 2.0, Some("city"), Some(7));
+                processor.add_to_dictionary("w3 w4", "W34", 1.0, Some("pair"), Some(41));
+                processor.add_keyword("straße");
+                processor.remove_keyword("w5");
+
+                let bytes = processor.to_bytes();
+                let loaded = KeywordProcessor::from_bytes(&bytes).unwrap();
+                assert_eq!(loaded.len(), processor.len());
+                assert_eq!(loaded.engine(), engine);
+                assert_eq!(loaded.normalization(), Normalization::Nfkc);
+                assert_eq!(loaded.max_id(), Some(41));
+                assert_eq!(matches(&loaded, text), matches(&processor, text));
+                assert_eq!(
+                    loaded.replace_keywords(text),
+                    processor.replace_keywords(text)
+                );
+
+                // keywords added after loading keep their insertion order
+                let mut processor = processor;
+                let mut loaded = loaded;
+                processor.add_keyword("in");
+                loaded.add_keyword("in");
+                assert_eq!(matches(&loaded, text), matches(&processor, text));
+
+                for len in 0..bytes.len() {
+                    assert!(KeywordProcessor::from_bytes(&bytes[..len]).is_err());
+                }
+                let mut longer = bytes.clone();
+                longer.push(0);
+                assert_eq!(
+                    KeywordProcessor::from_bytes(&longer).err(),
+                    Some(DecodeError::TrailingBytes)
+                );
+            }
+        }
+        assert_eq!(
+            KeywordProcessor::from_bytes(b"TRSX").err(),
+            Some(DecodeError::Magic)
+        );
+        assert_eq!(
+            KeywordProcessor::from_bytes(b"TRSH\x02").err(),
+            Some(DecodeError::Version(2))
+        );
+        assert_eq!(KeywordProcessor::new(false).max_id(), None);
+    }
+}
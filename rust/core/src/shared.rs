@@ -0,0 +1,1896 @@
+use fxhash::FxHashSet;
+use std::borrow::Cow;
+use std::cmp::Reverse;
+use std::collections::hash_map::{Entry, Iter};
+use std::collections::VecDeque;
+use std::iter::Map;
+use std::str::FromStr;
+use std::sync::{Mutex, OnceLock};
+use std::time::Instant;
+use unicase::UniCase;
+
+use crate::automaton::Automaton;
+use crate::complete::{Completion, CompletionIndex};
+use crate::fuzzy::TokenIndex;
+use crate::normalize::Normalization;
+use crate::prefilter::Prefilter;
+use crate::serialize::{DecodeError, Decoder, Encoder, MAGIC, VERSION};
+use crate::tokenizer::{self, Tokenizer};
+
+pub fn is_valid_keyword(word: &str) -> bool {
+    // check if the word is empty
+    // - non empty words can still be invalid
+    // - e.g. " " or "." is not a valid keyword
+    if word.is_empty() {
+        return false;
+    }
+    // Check if number of words is greater than 1
+    let tokens: Vec<&str> = tokenizer::split_word_bounds(word).collect();
+    if tokens.len() == 0 {
+        return false;
+    }
+    tokens
+        .iter()
+        .any(|t| !t.chars().all(|c| c.is_whitespace() || c == '.' || c == ' '))
+}
+
+#[derive(Default, Debug, PartialEq)]
+struct UniCaseHashMap<V> {
+    inner: std::collections::HashMap<UniCase<String>, V, fxhash::FxBuildHasher>,
+}
+
+impl<V> UniCaseHashMap<V> {
+    pub fn entry(&mut self, k: String) -> Entry<UniCase<String>, V> {
+        self.inner.entry(UniCase::unicode(k))
+    }
+
+    pub fn get(&self, k: &str) -> Option<&V> {
+        self.inner.get(&UniCase::unicode(k.to_string()))
+    }
+
+    pub fn get_mut(&mut self, k: &str) -> Option<&mut V> {
+        self.inner.get_mut(&UniCase::unicode(k.to_string()))
+    }
+}
+
+/// Children of an `Engine::Compact` node: an exactly sized vector sorted by
+/// token, until it outgrows `COMPACT_MAX_FANOUT` and turns into a hash map.
+#[derive(Debug, PartialEq)]
+struct SortedMap<V> {
+    entries: Vec<(Box<str>, V)>,
+    case_sensitive: bool,
+}
+
+impl<V> SortedMap<V> {
+    /// Whether the tokens are in `search` order and unique.
+    fn is_strictly_sorted(&self) -> bool {
+        self.entries.windows(2).all(|pair| {
+            if self.case_sensitive {
+                pair[0].0 < pair[1].0
+            } else {
+                UniCase::unicode(&*pair[0].0) < UniCase::unicode(&*pair[1].0)
+            }
+        })
+    }
+
+    fn search(&self, k: &str) -> Result<usize, usize> {
+        if self.case_sensitive {
+            self.entries.binary_search_by(|(other, _)| (**other).cmp(k))
+        } else {
+            // `UniCase` orders by the folded characters, consistently with its equality
+            self.entries
+                .binary_search_by(|(other, _)| UniCase::unicode(&**other).cmp(&UniCase::unicode(k)))
+        }
+    }
+}
+
+const COMPACT_MAX_FANOUT: usize = 16;
+
+#[derive(Debug, PartialEq)]
+enum HashMap<V> {
+    CaseSensitive(std::collections::HashMap<String, V, fxhash::FxBuildHasher>),
+    CaseInsensitive(UniCaseHashMap<V>),
+    Sorted(SortedMap<V>),
+}
+
+impl HashMap<Node> {
+    fn new(engine: Engine, case_sensitive: bool) -> Self {
+        match (engine, case_sensitive) {
+            (Engine::Compact, _) => HashMap::Sorted(SortedMap {
+                entries: Vec::new(),
+                case_sensitive,
+            }),
+            // the automaton is derived from a hash trie
+            (_, true) => HashMap::CaseSensitive(Default::default()),
+            (_, false) => HashMap::CaseInsensitive(UniCaseHashMap {
+                inner: Default::default(),
+            }),
+        }
+    }
+
+    /// The child under `k`, inserting `make()` if there is none.
+    pub fn get_or_insert_with<F: FnOnce() -> Node>(&mut self, k: &str, make: F) -> &mut Node {
+        if let HashMap::Sorted(inner) = self {
+            if inner.entries.len() >= COMPACT_MAX_FANOUT && inner.search(k).is_err() {
+                let entries = std::mem::take(&mut inner.entries);
+                *self = if inner.case_sensitive {
+                    HashMap::CaseSensitive(
+                        entries
+                            .into_iter()
+                            .map(|(k, v)| (k.into_string(), v))
+                            .collect(),
+                    )
+                } else {
+                    HashMap::CaseInsensitive(UniCaseHashMap {
+                        inner: entries
+                            .into_iter()
+                            .map(|(k, v)| (UniCase::unicode(k.into_string()), v))
+                            .collect(),
+                    })
+                };
+            }
+        }
+        match self {
+            HashMap::CaseSensitive(inner) => inner.entry(k.to_string()).or_insert_with(make),
+            HashMap::CaseInsensitive(inner) => inner.entry(k.to_string()).or_insert_with(make),
+            HashMap::Sorted(inner) => {
+                let i = match inner.search(k) {
+                    Ok(i) => i,
+                    Err(i) => {
+                        inner.entries.reserve_exact(1);
+                        inner.entries.insert(i, (k.into(), make()));
+                        i
+                    }
+                };
+                &mut inner.entries[i].1
+            }
+        }
+    }
+
+    #[inline]
+    pub fn get(&self, k: &str) -> Option<&Node> {
+        match self {
+            HashMap::CaseSensitive(inner) => inner.get(k),
+            HashMap::CaseInsensitive(inner) => inner.get(k),
+            HashMap::Sorted(inner) => inner.search(k).ok().map(|i| &inner.entries[i].1),
+        }
+    }
+
+    pub fn get_mut(&mut self, k: &str) -> Option<&mut Node> {
+        match self {
+            HashMap::CaseSensitive(inner) => inner.get_mut(k),
+            HashMap::CaseInsensitive(inner) => inner.get_mut(k),
+            HashMap::Sorted(inner) => match inner.search(k) {
+                Ok(i) => Some(&mut inner.entries[i].1),
+                Err(_) => None,
+            },
+        }
+    }
+
+    pub fn iter(&self) -> HashMapIter {
+        match self {
+            HashMap::CaseSensitive(inner) => HashMapIter::CaseSensitive(inner.iter()),
+            HashMap::CaseInsensitive(inner) => HashMapIter::CaseInsensitive(inner.inner.iter()),
+            HashMap::Sorted(inner) => HashMapIter::Sorted(inner.entries.iter()),
+        }
+    }
+
+    /// Removes the child under `k`.
+    fn remove(&mut self, k: &str) -> Option<Node> {
+        match self {
+            HashMap::CaseSensitive(inner) => inner.remove(k),
+            HashMap::CaseInsensitive(inner) => inner.inner.remove(&UniCase::unicode(k.to_string())),
+            HashMap::Sorted(inner) => {
+                let i = inner.search(k).ok()?;
+                let (_, child) = inner.entries.remove(i);
+                inner.entries.shrink_to_fit();
+                Some(child)
+            }
+        }
+    }
+
+    /// A map of `entries` with exactly sized tables, the inverse of `into_entries`.
+    fn from_entries(engine: Engine, case_sensitive: bool, entries: Vec<(String, Node)>) -> Self {
+        if engine == Engine::Compact && entries.len() <= COMPACT_MAX_FANOUT {
+            let mut inner = SortedMap {
+                entries: entries
+                    .into_iter()
+                    .map(|(k, v)| (k.into_boxed_str(), v))
+                    .collect(),
+                case_sensitive,
+            };
+            if case_sensitive {
+                inner.entries.sort_unstable_by(|(a, _), (b, _)| a.cmp(b));
+            } else {
+                inner.entries.sort_unstable_by(|(a, _), (b, _)| {
+                    UniCase::unicode(&**a).cmp(&UniCase::unicode(&**b))
+                });
+            }
+            // collecting in place can keep the larger buffer of `entries`
+            inner.entries.shrink_to_fit();
+            HashMap::Sorted(inner)
+        } else if case_sensitive {
+            HashMap::CaseSensitive(entries.into_iter().collect())
+        } else {
+            HashMap::CaseInsensitive(UniCaseHashMap {
+                inner: entries
+                    .into_iter()
+                    .map(|(k, v)| (UniCase::unicode(k), v))
+                    .collect(),
+            })
+        }
+    }
+
+    /// The children with their tokens, in no particular order.
+    fn into_entries(self) -> Vec<(String, Node)> {
+        match self {
+            HashMap::CaseSensitive(inner) => inner.into_iter().collect(),
+            HashMap::CaseInsensitive(inner) => inner
+                .inner
+                .into_iter()
+                .map(|(k, v)| (k.into_inner(), v))
+                .collect(),
+            HashMap::Sorted(inner) => inner
+                .entries
+                .into_iter()
+                .map(|(k, v)| (k.into_string(), v))
+                .collect(),
+        }
+    }
+
+    pub fn len(&self) -> usize {
+        match self {
+            HashMap::CaseSensitive(inner) => inner.len(),
+            HashMap::CaseInsensitive(inner) => inner.inner.len(),
+            HashMap::Sorted(inner) => inner.entries.len(),
+        }
+    }
+
+    pub fn is_case_sensitive(&self) -> bool {
+        match self {
+            HashMap::CaseSensitive(_) => true,
+            HashMap::CaseInsensitive(_) => false,
+            HashMap::Sorted(inner) => inner.case_sensitive,
+        }
+    }
+
+    /// Estimated number of bytes owned by the table and its keys (children are not included).
+    pub fn heap_size(&self) -> usize {
+        match self {
+            HashMap::CaseSensitive(inner) => {
+                table_heap_size::<String, Node>(inner.capacity())
+                    + inner.keys().map(|k| k.capacity()).sum::<usize>()
+            }
+            HashMap::CaseInsensitive(inner) => {
+                table_heap_size::<UniCase<String>, Node>(inner.inner.capacity())
+                    + inner.inner.keys().map(|k| k.capacity()).sum::<usize>()
+            }
+            HashMap::Sorted(inner) => {
+                inner.entries.capacity() * std::mem::size_of::<(Box<str>, Node)>()
+                    + inner.entries.iter().map(|(k, _)| k.len()).sum::<usize>()
+            }
+        }
+    }
+}
+
+enum HashMapIter<'a> {
+    CaseSensitive(Iter<'a, String, Node>),
+    CaseInsensitive(Iter<'a, UniCase<String>, Node>),
+    Sorted(std::slice::Iter<'a, (Box<str>, Node)>),
+}
+
+impl<'a> Iterator for HashMapIter<'a> {
+    type Item = (&'a str, &'a Node);
+
+    fn next(&mut self) -> Option<Self::Item> {
+        match self {
+            HashMapIter::CaseSensitive(inner) => inner.next().map(|(k, v)| (k.as_str(), v)),
+            HashMapIter::CaseInsensitive(inner) => inner.next().map(|(k, v)| (k.as_str(), v)),
+            HashMapIter::Sorted(inner) => inner.next().map(|(k, v)| (&**k, v)),
+        }
+    }
+}
+
+/// `n_threads`, or the available parallelism for 0.
+fn thread_count(n_threads: usize) -> usize {
+    match n_threads {
+        0 => std::thread::available_parallelism().map_or(1, |n| n.get()),
+        n => n,
+    }
+}
+
+/// Joins a scoped thread, resuming its panic if it had one.
+fn join<T>(handle: std::thread::ScopedJoinHandle<'_, T>) -> T {
+    handle
+        .join()
+        .unwrap_or_else(|panic| std::panic::resume_unwind(panic))
+}
+
+/// Approximates the allocation of a hashbrown table with the given capacity.
+fn table_heap_size<K, V>(capacity: usize) -> usize {
+    if capacity == 0 {
+        return 0;
+    }
+    let buckets = if capacity < 4 {
+        4
+    } else if capacity < 8 {
+        8
+    } else {
+        (capacity * 8 / 7).next_power_of_two()
+    };
+    // one slot and one control byte per bucket, plus a trailing control group
+    buckets * (std::mem::size_of::<(K, V)>() + 1) + 16
+}
+
+pub const DEFAULT_WEIGHT: f64 = 1.0;
+
+/// How a `KeywordProcessor` stores its keywords. Every engine finds the same
+/// matches, they trade memory against scanning speed.
+#[derive(Default, Debug, Clone, Copy, PartialEq, Eq)]
+pub enum Engine {
+    #[default]
+    HashTrie, // one hash map per trie node
+    Compact,   // sorted vectors for the nodes with few children, the least memory
+    Automaton, // hash trie plus an `Automaton` for exact extraction, the fastest scans
+}
+
+impl FromStr for Engine {
+    type Err = ();
+
+    fn from_str(s: &str) -> Result<Self, Self::Err> {
+        match s {
+            "hashtrie" => Ok(Engine::HashTrie),
+            "compact" => Ok(Engine::Compact),
+            "automaton" => Ok(Engine::Automaton),
+            _ => Err(()),
+        }
+    }
+}
+
+impl Engine {
+    pub fn as_str(&self) -> &'static str {
+        match self {
+            Engine::HashTrie => "hashtrie",
+            Engine::Compact => "compact",
+            Engine::Automaton => "automaton",
+        }
+    }
+}
+
+#[derive(PartialEq, Debug)]
+pub struct Node {
+    clean_name: Option<String>,
+    id: Option<u64>, // caller-defined id of the keyword in the unlabeled dictionary
+    labels: Vec<(String, String, Option<u64>)>, // (label, clean_name, id) in the labeled dictionaries, sorted by label
+    order: usize, // insertion order of the keyword ending here, for `ExtractorStrategy::LeftmostFirst`
+    weight: f64,  // priority of the keyword ending here, for `ExtractorStrategy::MaxWeight`
+    children: HashMap<Node>,
+}
+
+impl Node {
+    pub fn new(engine: Engine, case_sensitive: bool) -> Self {
+        Self {
+            clean_name: None,
+            id: None,
+            labels: Vec::new(),
+            order: 0,
+            weight: DEFAULT_WEIGHT,
+            children: HashMap::new(engine, case_sensitive),
+        }
+    }
+
+    /// Whether a keyword, labeled or not, ends here.
+    #[inline]
+    fn is_keyword(&self) -> bool {
+        self.clean_name.is_some() || !self.labels.is_empty()
+    }
+
+    /// Whether a keyword of one of `labels` ends here, any keyword if `labels` is `None`.
+    #[inline]
+    fn is_selected(&self, labels: &Option<Vec<String>>) -> bool {
+        match labels {
+            None => self.is_keyword(),
+            Some(labels) => self
+                .labels
+                .iter()
+                .any(|(label, _, _)| labels.contains(label)),
+        }
+    }
+
+    /// (clean name, label, id) of the first match `KeywordExtractor` reports
+    /// for the keywords ending here, `None` unless `is_selected(labels)`.
+    fn first_selected(
+        &self,
+        labels: &Option<Vec<String>>,
+    ) -> Option<(&str, Option<&str>, Option<u64>)> {
+        if labels.is_none() {
+            if let Some(clean_name) = &self.clean_name {
+                return Some((clean_name, None, self.id));
+            }
+        }
+        self.labels
+            .iter()
+            .find(|(label, _, _)| {
+                labels
+                    .as_ref()
+                    .map_or(true, |labels| labels.contains(label))
+            })
+            .map(|(label, clean_name, id)| (clean_name.as_str(), Some(label.as_str()), *id))
+    }
+
+    /// Rebuilds the subtrie below this node with exactly sized tables and
+    /// without the branches that lead to no keyword. Returns whether any
+    /// keyword is left in it.
+    fn compact(&mut self, engine: Engine) -> bool {
+        let case_sensitive = self.children.is_case_sensitive();
+        let children = std::mem::replace(&mut self.children, HashMap::new(engine, case_sensitive));
+        let entries: Vec<(String, Node)> = children
+            .into_entries()
+            .into_iter()
+            .filter_map(|(mut token, mut child)| {
+                token.shrink_to_fit();
+                child.compact(engine).then_some((token, child))
+            })
+            .collect();
+        self.children = HashMap::from_entries(engine, case_sensitive, entries);
+        self.labels.shrink_to_fit();
+        if let Some(clean_name) = self.clean_name.as_mut() {
+            clean_name.shrink_to_fit();
+        }
+        self.is_keyword() || self.children.len() > 0
+    }
+
+    /// Copy of the keywords ending here, for the outputs of an `Automaton`.
+    fn without_children(&self) -> Node {
+        Node {
+            clean_name: self.clean_name.clone(),
+            id: self.id,
+            labels: self.labels.clone(),
+            order: self.order,
+            weight: self.weight,
+            children: HashMap::new(Engine::Compact, self.children.is_case_sensitive()),
+        }
+    }
+
+    fn payload_count(&self) -> usize {
+        self.clean_name.is_some() as usize + self.labels.len()
+    }
+
+    /// Writes the keywords ending here, without the children.
+    fn encode(&self, encoder: &mut Encoder) {
+        encoder.opt_str(self.clean_name.as_deref());
+        encoder.opt_u64(self.id);
+        encoder.u32(self.labels.len() as u32);
+        for (label, clean_name, id) in self.labels.iter() {
+            encoder.str(label);
+            encoder.str(clean_name);
+            encoder.opt_u64(*id);
+        }
+        encoder.u64(self.order as u64);
+        encoder.f64(self.weight);
+    }
+
+    /// Reads what `encode` wrote into a node without children.
+    fn decode(
+        decoder: &mut Decoder,
+        engine: Engine,
+        case_sensitive: bool,
+    ) -> Result<Node, DecodeError> {
+        let mut node = Node::new(engine, case_sensitive);
+        node.clean_name = decoder.opt_str()?.map(String::from);
+        node.id = decoder.opt_u64()?;
+        // a label takes at least two string lengths and an option flag
+        let count = decoder.count(9)?;
+        node.labels = Vec::with_capacity(count);
+        for _ in 0..count {
+            let label = decoder.str()?.to_string();
+            let clean_name = decoder.str()?.to_string();
+            node.labels.push((label, clean_name, decoder.opt_u64()?));
+        }
+        if !node.labels.windows(2).all(|pair| pair[0].0 < pair[1].0) {
+            return Err(DecodeError::Invalid("label order"));
+        }
+        node.order = decoder.u64()? as usize;
+        node.weight = decoder.f64()?;
+        if !node.weight.is_finite() {
+            return Err(DecodeError::Invalid("weight"));
+        }
+        Ok(node)
+    }
+}
+
+/// Size and shape of a keyword trie, as reported by `KeywordProcessor::stats`.
+#[derive(Default, Debug, Clone, PartialEq)]
+pub struct TrieStats {
+    pub len: usize,
+    pub node_count: usize,
+    pub edge_count: usize,
+    pub max_depth: usize,
+    pub avg_depth: f64, // average depth (in tokens) of the nodes holding a keyword
+    pub fanout_histogram: Vec<usize>, // `fanout_histogram[n]` is the number of nodes with `n` children
+    pub distinct_tokens: usize,
+    pub distinct_clean_names: usize,
+    pub trie_heap_bytes: usize,
+    pub clean_name_heap_bytes: usize,
+}
+
+impl TrieStats {
+    pub fn heap_bytes(&self) -> usize {
+        self.trie_heap_bytes + self.clean_name_heap_bytes
+    }
+}
+
+#[derive(Debug)]
+pub struct KeywordProcessor {
+    trie: Node,
+    len: usize,                        // a keyword counts once per dictionary holding it
+    inserted: usize,                   // keywords ever inserted, numbers `Node::order`
+    tokenizer: Tokenizer, // fixed at construction, keywords and text must be split the same way
+    engine: Engine,       // fixed at construction
+    normalization: Normalization, // fixed at construction, applied to keyword and text tokens
+    prefilter: Prefilter, // first tokens of the keywords, skips most text tokens in exact extraction
+    fuzzy_index: OnceLock<TokenIndex>, // built by the first fuzzy extraction, dropped on every change
+    completion_index: OnceLock<CompletionIndex>, // built by the first completion, dropped on every change
+    automaton: OnceLock<Automaton<Node>>, // `Engine::Automaton` only, built by the first exact extraction, dropped on every change
+}
+
+impl KeywordProcessor {
+    pub fn new(case_sensitive: bool) -> Self {
+        Self::with_tokenizer(case_sensitive, Tokenizer::default())
+    }
+
+    pub fn with_tokenizer(case_sensitive: bool, tokenizer: Tokenizer) -> Self {
+        Self::with_engine(case_sensitive, tokenizer, Engine::default())
+    }
+
+    pub fn with_engine(case_sensitive: bool, tokenizer: Tokenizer, engine: Engine) -> Self {
+        Self::with_normalization(case_sensitive, tokenizer, engine, Normalization::default())
+    }
+
+    pub fn with_normalization(
+        case_sensitive: bool,
+        tokenizer: Tokenizer,
+        engine: Engine,
+        normalization: Normalization,
+    ) -> Self {
+        Self {
+            trie: Node::new(engine, case_sensitive),
+            len: 0,
+            inserted: 0,
+            tokenizer: tokenizer,
+            engine: engine,
+            normalization: normalization,
+            prefilter: Prefilter::new(case_sensitive),
+            fuzzy_index: OnceLock::new(),
+            completion_index: OnceLock::new(),
+            automaton: OnceLock::new(),
+        }
+    }
+
+    pub fn tokenizer(&self) -> Tokenizer {
+        self.tokenizer
+    }
+
+    pub fn engine(&self) -> Engine {
+        self.engine
+    }
+
+    pub fn normalization(&self) -> Normalization {
+        self.normalization
+    }
+
+    pub fn len(&self) -> usize {
+        self.len
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.len == 0 // or `self.trie.children.is_empty()`
+    }
+
+    #[inline]
+    pub fn add_keyword_with_clean_name(&mut self, word: &str, clean_name: &str) {
+        self.add_weighted_keyword(word, clean_name, DEFAULT_WEIGHT);
+    }
+
+    pub fn add_weighted_keyword(&mut self, word: &str, clean_name: &str, weight: f64) {
+        self.add_to_dictionary(word, clean_name, weight, None, None);
+    }
+
+    /// Adds `word` to the dictionary named `label`. A keyword can be in the
+    /// unlabeled dictionary and in any number of labeled ones, with a clean
+    /// name in each; its weight and insertion order are shared.
+    pub fn add_labeled_keyword(&mut self, word: &str, clean_name: &str, weight: f64, label: &str) {
+        self.add_to_dictionary(word, clean_name, weight, Some(label), None);
+    }
+
+    /// Adds `word` to the dictionary `label` (the unlabeled one for `None`)
+    /// with an optional caller-defined `id` that extraction reports with
+    /// every match, e.g. a database key.
+    ///
+    /// Returns the id the keyword had in that dictionary before, so that the
+    /// caller can release whatever it stands for.
+    pub fn add_to_dictionary(
+        &mut self,
+        word: &str,
+        clean_name: &str,
+        weight: f64,
+        label: Option<&str>,
+        id: Option<u64>,
+    ) -> Option<u64> {
+        if !is_valid_keyword(word) {
+            panic!("invalid keyword: {:?}", word);
+        }
+        // follwing code can cause a deadlock?
+        self.fuzzy_index.take();
+        self.completion_index.take();
+        self.automaton.take();
+        self.insert(word, clean_name, weight, label, id, self.inserted)
+    }
+
+    /// `add_to_dictionary` without the keyword check and without dropping the
+    /// derived indexes. `order` is the insertion order the keyword gets if it
+    /// is new.
+    fn insert(
+        &mut self,
+        word: &str,
+        clean_name: &str,
+        weight: f64,
+        label: Option<&str>,
+        id: Option<u64>,
+        order: usize,
+    ) -> Option<u64> {
+        let (engine, case_sensitive) = (self.engine, self.trie.children.is_case_sensitive());
+        let mut trie = &mut self.trie;
+        // locked is unlocked here
+        for (i, token) in self.tokenizer.split(word).enumerate() {
+            let token = self.normalization.apply(token);
+            if i == 0 {
+                self.prefilter.insert(&token);
+            }
+            trie = trie
+                .children
+                .get_or_insert_with(&token, || Node::new(engine, case_sensitive));
+        }
+        if !trie.is_keyword() {
+            trie.order = order;
+            self.inserted += 1;
+        }
+        trie.weight = weight;
+        // increment `len` only if the keyword isn't already there
+        // but even if there is already a keyword, the user can still overwrite its `clean_name`
+        match label {
+            None => {
+                if trie.clean_name.is_none() {
+                    self.len += 1;
+                }
+                trie.clean_name = Some(clean_name.to_string());
+                std::mem::replace(&mut trie.id, id)
+            }
+            Some(label) => match trie
+                .labels
+                .binary_search_by(|(other, _, _)| other.as_str().cmp(label))
+            {
+                Ok(i) => {
+                    trie.labels[i].1 = clean_name.to_string();
+                    std::mem::replace(&mut trie.labels[i].2, id)
+                }
+                Err(i) => {
+                    self.len += 1;
+                    trie.labels
+                        .insert(i, (label.to_string(), clean_name.to_string(), id));
+                    None
+                }
+            },
+        }
+        // locked is unlocked here
+    }
+
+    /// Adds (keyword, clean name) pairs to the unlabeled dictionary on
+    /// `n_threads` threads (all cores for 0), with the same result as adding
+    /// them one by one in order. Returns the ids of the keywords whose clean
+    /// name was overwritten, see `add_to_dictionary`, or `Err(i)` if
+    /// `pairs[i]` has the first invalid keyword, in which case nothing is
+    /// added.
+    ///
+    /// The keywords are partitioned by their first token, each partition is
+    /// built into its own subtries on whichever thread is free, and the
+    /// subtries are then attached under the root.
+    pub fn add_keywords_parallel<S: AsRef<str> + Sync>(
+        &mut self,
+        pairs: &[(S, S)],
+        n_threads: usize,
+    ) -> Result<Vec<u64>, usize> {
+        let n_threads = thread_count(n_threads);
+        let mut replaced = vec![];
+        if n_threads == 1 || pairs.is_empty() {
+            if let Some(i) = pairs
+                .iter()
+                .position(|(word, _)| !is_valid_keyword(word.as_ref()))
+            {
+                return Err(i);
+            }
+            for (word, clean_name) in pairs {
+                replaced.extend(self.add_to_dictionary(
+                    word.as_ref(),
+                    clean_name.as_ref(),
+                    DEFAULT_WEIGHT,
+                    None,
+                    None,
+                ));
+            }
+            return Ok(replaced);
+        }
+        let (tokenizer, engine, normalization, case_sensitive) = (
+            self.tokenizer,
+            self.engine,
+            self.normalization,
+            self.trie.children.is_case_sensitive(),
+        );
+        // more partitions than threads, so that a large one does not hold up the build
+        let n_partitions = n_threads * 4;
+        let partition_of = move |token: &str| {
+            let hash = if case_sensitive {
+                fxhash::hash64(token)
+            } else {
+                fxhash::hash64(&UniCase::unicode(token))
+            };
+            hash as usize % n_partitions
+        };
+        let chunk_size = pairs.len().div_ceil(n_threads);
+        let chunks: Vec<Result<Vec<Vec<usize>>, usize>> = std::thread::scope(|scope| {
+            let handles: Vec<_> = pairs
+                .chunks(chunk_size)
+                .enumerate()
+                .map(|(c, chunk)| {
+                    scope.spawn(move || {
+                        let mut partitions = vec![vec![]; n_partitions];
+                        for (i, (word, _)) in chunk.iter().enumerate() {
+                            let word = word.as_ref();
+                            if !is_valid_keyword(word) {
+                                return Err(c * chunk_size + i);
+                            }
+                            let first = tokenizer.split(word).next().unwrap_or("");
+                            let first = normalization.apply(first);
+                            partitions[partition_of(&first)].push(c * chunk_size + i);
+                        }
+                        Ok(partitions)
+                    })
+                })
+                .collect();
+            handles.into_iter().map(join).collect()
+        });
+        // the chunks are in order, so the first error is the first invalid keyword
+        let chunks: Vec<Vec<Vec<usize>>> = chunks.into_iter().collect::<Result<_, _>>()?;
+        self.fuzzy_index.take();
+        self.completion_index.take();
+        self.automaton.take();
+        // the existing subtries are extended in place
+        let mut jobs: Vec<(KeywordProcessor, Vec<usize>)> = (0..n_partitions)
+            .map(|p| {
+                let indices = chunks.iter().flat_map(|c| c[p].iter().copied()).collect();
+                let root = KeywordProcessor::with_normalization(
+                    case_sensitive,
+                    tokenizer,
+                    engine,
+                    normalization,
+                );
+                (root, indices)
+            })
+            .collect();
+        let children = std::mem::replace(
+            &mut self.trie.children,
+            HashMap::new(engine, case_sensitive),
+        );
+        for (token, child) in children.into_entries() {
+            let (root, _) = &mut jobs[partition_of(&token)];
+            root.trie.children.get_or_insert_with(&token, || child);
+        }
+        let offset = self.inserted;
+        let jobs = Mutex::new(jobs);
+        let built: Vec<Vec<(KeywordProcessor, Vec<u64>)>> = std::thread::scope(|scope| {
+            let handles: Vec<_> = (0..n_threads)
+                .map(|_| {
+                    scope.spawn(|| {
+                        let mut built = vec![];
+                        loop {
+                            let job = jobs.lock().unwrap().pop();
+                            let Some((mut root, indices)) = job else {
+                                return built;
+                            };
+                            let mut replaced = vec![];
+                            for i in indices {
+                                let (word, clean_name) = &pairs[i];
+                                replaced.extend(root.insert(
+                                    word.as_ref(),
+                                    clean_name.as_ref(),
+                                    DEFAULT_WEIGHT,
+                                    None,
+                                    None,
+                                    offset + i,
+                                ));
+                            }
+                            built.push((root, replaced));
+                        }
+                    })
+                })
+                .collect();
+            handles.into_iter().map(join).collect()
+        });
+        for (root, ids) in built.into_iter().flatten() {
+            self.len += root.len;
+            for (token, child) in root.trie.children.into_entries() {
+                self.prefilter.insert(&token);
+                self.trie.children.get_or_insert_with(&token, || child);
+            }
+            replaced.extend(ids);
+        }
+        self.inserted = offset + pairs.len();
+        Ok(replaced)
+    }
+
+    #[inline]
+    pub fn add_keyword(&mut self, word: &str) {
+        self.add_keyword_with_clean_name(word, &word);
+    }
+
+    pub fn remove_keyword(&mut self, word: &str) {
+        self.remove_from_dictionary(word, None);
+    }
+
+    /// Removes `word` from the dictionary named `label` only.
+    pub fn remove_labeled_keyword(&mut self, word: &str, label: &str) {
+        self.remove_from_dictionary(word, Some(label));
+    }
+
+    /// Removes `word` from the dictionary `label` (the unlabeled one for
+    /// `None`) and returns the id it had there.
+    pub fn remove_from_dictionary(&mut self, word: &str, label: Option<&str>) -> Option<u64> {
+        if !is_valid_keyword(word) {
+            panic!("invalid keyword: {:?}", word);
+        }
+        // follwing code can cause a deadlock?
+        self.fuzzy_index.take();
+        self.completion_index.take();
+        self.automaton.take();
+        let tokens: Vec<Cow<str>> = self
+            .tokenizer
+            .split(word)
+            .map(|token| self.normalization.apply(token))
+            .collect();
+        let mut trie = &mut self.trie;
+        // locked is unlocked here
+        for token in tokens.iter() {
+            // if none return, or get the node - do not create an entry
+            // trie must be mutable
+            trie = match trie.children.get_mut(token) {
+                Some(child) => child,
+                None => return None,
+            };
+        }
+        // remove clean_name
+        let removed = match label {
+            None => {
+                if trie.clean_name.is_some() {
+                    trie.clean_name = None;
+                    self.len -= 1;
+                }
+                trie.id.take()
+            }
+            Some(label) => {
+                match trie
+                    .labels
+                    .binary_search_by(|(other, _, _)| other.as_str().cmp(label))
+                {
+                    Ok(i) => {
+                        self.len -= 1;
+                        trie.labels.remove(i).2
+                    }
+                    Err(_) => None,
+                }
+            }
+        };
+        if !trie.is_keyword() && trie.children.len() == 0 {
+            self.prune(&tokens);
+        }
+        removed
+    }
+
+    /// Cuts the branch ending at the keyword-less leaf reached by `tokens`
+    /// below the last node on the way that still leads to another keyword.
+    fn prune(&mut self, tokens: &[Cow<str>]) {
+        let mut keep = 0; // depth of that node, the root is kept anyway
+        let mut node = &self.trie;
+        for (depth, token) in tokens.iter().enumerate() {
+            if node.is_keyword() || node.children.len() > 1 {
+                keep = depth;
+            }
+            node = match node.children.get(token) {
+                Some(child) => child,
+                None => return,
+            };
+        }
+        let mut node = &mut self.trie;
+        for token in tokens[..keep].iter() {
+            node = match node.children.get_mut(token) {
+                Some(child) => child,
+                None => return,
+            };
+        }
+        node.children.remove(&tokens[keep]);
+    }
+
+    /// Rebuilds the trie with exactly sized tables and without branches that
+    /// lead to no keyword, as well as the prefilter, which keeps the first
+    /// tokens of removed keywords otherwise. Returns the estimated number of
+    /// heap bytes reclaimed, see `stats`.
+    pub fn compact(&mut self) -> usize {
+        let before = self.stats().heap_bytes();
+        self.fuzzy_index.take();
+        self.completion_index.take();
+        self.automaton.take();
+        self.trie.compact(self.engine);
+        self.rebuild_prefilter();
+        before.saturating_sub(self.stats().heap_bytes())
+    }
+
+    fn rebuild_prefilter(&mut self) {
+        self.prefilter = Prefilter::new(self.trie.children.is_case_sensitive());
+        for (token, _) in self.trie.children.iter() {
+            self.prefilter.insert(token);
+        }
+    }
+
+    /// The keywords and settings in a compact binary form, read back by
+    /// `from_bytes` on any platform. The trie is stored as it is, so loading
+    /// does not tokenize the keywords again.
+    pub fn to_bytes(&self) -> Vec<u8> {
+        let mut encoder = Encoder::default();
+        encoder.bytes.extend_from_slice(MAGIC);
+        encoder.u8(VERSION);
+        encoder.u8(self.trie.children.is_case_sensitive() as u8);
+        encoder.str(self.tokenizer.as_str());
+        encoder.str(self.engine.as_str());
+        encoder.str(self.normalization.as_str().unwrap_or(""));
+        encoder.u64(self.inserted as u64);
+        // preorder, every node followed by the number of its children and
+        // every child by its token
+        self.trie.encode(&mut encoder);
+        let mut stack = vec![self.trie.children.iter()];
+        encoder.u32(self.trie.children.len() as u32);
+        while let Some(children) = stack.last_mut() {
+            match children.next() {
+                Some((token, child)) => {
+                    encoder.str(token);
+                    child.encode(&mut encoder);
+                    encoder.u32(child.children.len() as u32);
+                    stack.push(child.children.iter());
+                }
+                None => {
+                    stack.pop();
+                }
+            }
+        }
+        encoder.bytes
+    }
+
+    /// A processor with the keywords and settings that `to_bytes` wrote.
+    pub fn from_bytes(bytes: &[u8]) -> Result<Self, DecodeError> {
+        let mut decoder = Decoder::new(bytes);
+        if decoder.take(MAGIC.len()) != Ok(&MAGIC[..]) {
+            return Err(DecodeError::Magic);
+        }
+        match decoder.u8()? {
+            VERSION => {}
+            version => return Err(DecodeError::Version(version)),
+        }
+        let case_sensitive = decoder.bool("case sensitivity")?;
+        let tokenizer =
+            Tokenizer::from_str(decoder.str()?).map_err(|_| DecodeError::Invalid("tokenizer"))?;
+        let engine =
+            Engine::from_str(decoder.str()?).map_err(|_| DecodeError::Invalid("engine"))?;
+        let normalization = match decoder.str()? {
+            "" => Normalization::None,
+            name => {
+                Normalization::from_str(name).map_err(|_| DecodeError::Invalid("normalization"))?
+            }
+        };
+        let mut processor =
+            Self::with_normalization(case_sensitive, tokenizer, engine, normalization);
+        processor.inserted = decoder.u64()? as usize;
+        // (token, node, children left to read, children read so far); a
+        // child takes at least its token length and the fixed size of a node
+        let mut stack: Vec<(String, Node, usize, Vec<(String, Node)>)> = vec![];
+        let root = Node::decode(&mut decoder, engine, case_sensitive)?;
+        processor.len += root.payload_count();
+        let count = decoder.count(4 + 26)?;
+        stack.push((String::new(), root, count, Vec::with_capacity(count)));
+        let root = loop {
+            let (_, _, left, children) = stack.last_mut().unwrap();
+            if *left > 0 {
+                *left -= 1;
+                let token = decoder.str()?.to_string();
+                let node = Node::decode(&mut decoder, engine, case_sensitive)?;
+                processor.len += node.payload_count();
+                let count = decoder.count(4 + 26)?;
+                stack.push((token, node, count, Vec::with_capacity(count)));
+                continue;
+            }
+            let (token, mut node, _, children) = stack.pop().unwrap();
+            let count = children.len();
+            node.children = HashMap::from_entries(engine, case_sensitive, children);
+            let unique = match &node.children {
+                HashMap::Sorted(inner) => inner.is_strictly_sorted(),
+                children => children.len() == count,
+            };
+            if !unique {
+                return Err(DecodeError::Invalid("duplicate token"));
+            }
+            match stack.last_mut() {
+                Some((_, _, _, siblings)) => siblings.push((token, node)),
+                None => break node,
+            }
+        };
+        if !decoder.is_empty() {
+            return Err(DecodeError::TrailingBytes);
+        }
+        processor.trie = root;
+        processor.rebuild_prefilter();
+        Ok(processor)
+    }
+
+    /// The largest caller-defined id of any keyword, see `add_to_dictionary`.
+    pub fn max_id(&self) -> Option<u64> {
+        let mut max_id = None;
+        let mut stack = vec![&self.trie];
+        while let Some(node) = stack.pop() {
+            let ids = node.labels.iter().map(|(_, _, id)| *id);
+            max_id = max_id.max(ids.chain([node.id]).max().flatten());
+            stack.extend(node.children.iter().map(|(_, child)| child));
+        }
+        max_id
+    }
+
+    pub fn stats(&self) -> TrieStats {
+        let mut stats = TrieStats {
+            len: self.len,
+            ..Default::default()
+        };
+        let case_sensitive = self.trie.children.is_case_sensitive();
+        let mut tokens: FxHashSet<&str> = FxHashSet::default();
+        let mut folded_tokens: FxHashSet<UniCase<&str>> = FxHashSet::default();
+        let mut clean_names: FxHashSet<&str> = FxHashSet::default();
+        let mut depth_sum = 0;
+        let mut stack = vec![(&self.trie, 0)];
+        while let Some((node, depth)) = stack.pop() {
+            let fanout = node.children.len();
+            if stats.fanout_histogram.len() <= fanout {
+                stats.fanout_histogram.resize(fanout + 1, 0);
+            }
+            stats.fanout_histogram[fanout] += 1;
+            stats.node_count += 1;
+            stats.edge_count += fanout;
+            stats.max_depth = stats.max_depth.max(depth);
+            stats.trie_heap_bytes += node.children.heap_size()
+                + node.labels.capacity() * std::mem::size_of::<(String, String, Option<u64>)>();
+            depth_sum += depth * node.payload_count();
+            if let Some(clean_name) = &node.clean_name {
+                stats.clean_name_heap_bytes += clean_name.capacity();
+                clean_names.insert(clean_name);
+            }
+            for (label, clean_name, _) in node.labels.iter() {
+                stats.clean_name_heap_bytes += label.capacity() + clean_name.capacity();
+                clean_names.insert(clean_name);
+            }
+            for (token, child) in node.children.iter() {
+                if case_sensitive {
+                    tokens.insert(token);
+                } else {
+                    folded_tokens.insert(UniCase::unicode(token));
+                }
+                stack.push((child, depth + 1));
+            }
+        }
+        stats.distinct_tokens = tokens.len() + folded_tokens.len();
+        stats.distinct_clean_names = clean_names.len();
+        if self.len > 0 {
+            stats.avg_depth = depth_sum as f64 / self.len as f64;
+        }
+        stats
+    }
+
+    pub fn get_all_keywords_with_clean_names(&self) -> AllKeywordsIterator {
+        // should return an iterator over all keywords, not clean_names
+        AllKeywordsIterator::new(&self.trie)
+    }
+
+    pub fn extract_keywords(
+        &self,
+        text: String,
+        strategy: ExtractorStrategy,
+    ) -> Map<KeywordExtractor, fn((String, usize, usize)) -> String> {
+        self.extract_keywords_with_span(text, strategy)
+            .map(|(matched_text, _, _)| matched_text)
+    }
+
+    pub fn extract_keywords_with_span(
+        &self,
+        text: String,
+        strategy: ExtractorStrategy,
+    ) -> KeywordExtractor {
+        self.extract_keywords_with_options(
+            text,
+            ExtractorOptions {
+                strategy: strategy,
+                ..Default::default()
+            },
+        )
+    }
+
+    pub fn extract_keywords_with_options(
+        &self,
+        text: impl AsRef<str>,
+        options: ExtractorOptions,
+    ) -> KeywordExtractor {
+        let index = if options.max_edits > 0 {
+            Some(self.fuzzy_index.get_or_init(|| self.build_fuzzy_index()))
+        } else {
+            None
+        };
+        let automaton = if self.engine == Engine::Automaton && options.max_edits == 0 {
+            Some(self.automaton.get_or_init(|| self.build_automaton()))
+        } else {
+            None
+        };
+        KeywordExtractor::new(
+            text.as_ref(),
+            &self.trie,
+            self.tokenizer,
+            self.normalization,
+            &self.prefilter,
+            automaton,
+            options,
+            index,
+        )
+    }
+
+    fn build_automaton(&self) -> Automaton<Node> {
+        let mut automaton = Automaton::new(self.trie.children.is_case_sensitive());
+        let mut stack = vec![(automaton.root(), &self.trie)];
+        while let Some((state, node)) = stack.pop() {
+            for (token, child) in node.children.iter() {
+                let next = automaton.add_state(state, token);
+                if child.is_keyword() {
+                    automaton.set_output(next, child.without_children());
+                }
+                stack.push((next, child));
+            }
+        }
+        automaton
+    }
+
+    fn build_fuzzy_index(&self) -> TokenIndex {
+        let mut index = TokenIndex::new(self.trie.children.is_case_sensitive());
+        let mut stack = vec![&self.trie];
+        while let Some(node) = stack.pop() {
+            for (token, child) in node.children.iter() {
+                index.insert(token);
+                stack.push(child);
+            }
+        }
+        index
+    }
+
+    /// The first match `extract_keywords_with_options` reports with the
+    /// `All` strategy (the shortest of the leftmost keywords, of one of
+    /// `labels` if given). The text is only segmented up to that match.
+    pub fn find_first<'t>(&'t self, text: &str, labels: &Option<Vec<String>>) -> Option<Match<'t>> {
+        let mut tokens = self
+            .tokenizer
+            .split_indices(text)
+            .map(|(i, token)| (i, self.normalization.apply(token)));
+        // the segmented tokens from the current start position on
+        let mut window: VecDeque<(usize, Cow<str>)> = VecDeque::new();
+        loop {
+            if window.is_empty() {
+                window.push_back(tokens.next()?);
+            }
+            if self.prefilter.may_start(&window[0].1) {
+                let mut node = &self.trie;
+                let mut i = 0;
+                loop {
+                    if i == window.len() {
+                        match tokens.next() {
+                            Some(token) => window.push_back(token),
+                            None => break,
+                        }
+                    }
+                    node = match node.children.get(&window[i].1) {
+                        Some(child) => child,
+                        None => break,
+                    };
+                    i += 1;
+                    if let Some((clean_name, label, id)) = node.first_selected(labels) {
+                        if i == window.len() {
+                            window.extend(tokens.next());
+                        }
+                        return Some(Match {
+                            clean_name,
+                            label,
+                            id,
+                            start: window[0].0,
+                            end: window
+                                .get(i)
+                                .map_or(text.len(), |&(next_start, _)| next_start),
+                            edits: 0,
+                        });
+                    }
+                }
+            }
+            window.pop_front();
+        }
+    }
+
+    /// Whether each of `texts` has a keyword (of one of `labels`), see
+    /// `find_first`, checked on `n_threads` threads (all cores for 0).
+    pub fn contains_any_batch<S: AsRef<str> + Sync>(
+        &self,
+        texts: &[S],
+        labels: &Option<Vec<String>>,
+        n_threads: usize,
+    ) -> Vec<bool> {
+        let contains_any = |texts: &[S]| -> Vec<bool> {
+            texts
+                .iter()
+                .map(|text| self.find_first(text.as_ref(), labels).is_some())
+                .collect()
+        };
+        let n_threads = thread_count(n_threads);
+        if n_threads == 1 || texts.len() < 2 {
+            return contains_any(texts);
+        }
+        let chunk_size = texts.len().div_ceil(n_threads);
+        std::thread::scope(|scope| {
+            let handles: Vec<_> = texts
+                .chunks(chunk_size)
+                .map(|chunk| scope.spawn(move || contains_any(chunk)))
+                .collect();
+            handles.into_iter().flat_map(join).collect()
+        })
+    }
+
+    /// Returns up to `limit` keywords starting with `prefix`, by descending
+    /// weight and then insertion order.
+    pub fn complete(&self, prefix: &str, limit: usize) -> Vec<&Completion> {
+        self.completion_index
+            .get_or_init(|| self.build_completion_index())
+            .complete(&self.normalization.apply(prefix), limit)
+    }
+
+    fn build_completion_index(&self) -> CompletionIndex {
+        let mut entries = Vec::with_capacity(self.len);
+        let mut stack = vec![(String::new(), &self.trie)];
+        while let Some((keyword, node)) = stack.pop() {
+            for (token, child) in node.children.iter() {
+                stack.push((format!("{}{}", keyword, token), child));
+            }
+            let clean_name = node
+                .clean_name
+                .as_ref()
+                .or(node.labels.first().map(|(_, clean_name, _)| clean_name));
+            if let Some(clean_name) = clean_name {
+                entries.push(Completion::new(
+                    keyword,
+                    clean_name.clone(),
+                    node.weight,
+                    node.order,
+                ));
+            }
+        }
+        CompletionIndex::new(entries, self.trie.children.is_case_sensitive())
+    }
+
+    pub fn replace_keywords(&self, text: impl AsRef<str>) -> String {
+        let replaced: Result<String, ()> =
+            self.replace_keywords_with(text.as_ref(), |m, string| {
+                string.push_str(m.clean_name);
+                Ok(())
+            });
+        replaced.unwrap()
+    }
+
+    /// The matches `replace_keywords_with` replaces: the longest ones, in
+    /// order and without overlaps.
+    pub fn replaced_matches<'t>(&'t self, text: &str) -> impl Iterator<Item = Match<'t>> + 't {
+        let options = ExtractorOptions {
+            strategy: ExtractorStrategy::Longest,
+            ..Default::default()
+        };
+        let mut prev_end = 0;
+        self.extract_keywords_with_options(text, options)
+            .into_matches()
+            .filter(move |m| {
+                // a keyword in several dictionaries is replaced by its first clean name
+                let replaced = m.start >= prev_end;
+                if replaced {
+                    prev_end = m.end;
+                }
+                replaced
+            })
+    }
+
+    /// Replaces the longest keyword matches of `text`, `repl` appends the
+    /// replacement of each one to the output. An error stops the scan.
+    pub fn replace_keywords_with<'t, E, F>(&'t self, text: &str, mut repl: F) -> Result<String, E>
+    where
+        F: FnMut(&Match<'t>, &mut String) -> Result<(), E>,
+    {
+        let mut string = String::with_capacity(text.len());
+        let mut prev_end = 0;
+        for m in self.replaced_matches(text) {
+            string += &text[prev_end..m.start];
+            repl(&m, &mut string)?;
+            prev_end = m.end;
+        }
+        string += &text[prev_end..];
+        Ok(string)
+    }
+}
+
+#[derive(Default, Debug, Clone, Copy, PartialEq)]
+pub enum ExtractorStrategy {
+    Longest,
+    #[default]
+    All,
+    LeftmostFirst,     // at each position, the keyword that was added first
+    Shortest,          // at each position, the shortest keyword
+    NonOverlappingAll, // every match that overlaps no other match
+    MaxWeight,         // the non-overlapping matches with the largest total weight
+}
+
+impl FromStr for ExtractorStrategy {
+    type Err = ();
+
+    fn from_str(s: &str) -> Result<Self, Self::Err> {
+        match s {
+            "longest" => Ok(ExtractorStrategy::Longest),
+            "all" => Ok(ExtractorStrategy::All),
+            "leftmost_first" => Ok(ExtractorStrategy::LeftmostFirst),
+            "shortest" => Ok(ExtractorStrategy::Shortest),
+            "non_overlapping_all" => Ok(ExtractorStrategy::NonOverlappingAll),
+            "max_weight" => Ok(ExtractorStrategy::MaxWeight),
+            _ => Err(()),
+        }
+    }
+}
+
+#[derive(Default, Debug, Clone, PartialEq)]
+pub struct ExtractorOptions {
+    pub strategy: ExtractorStrategy,
+    pub max_edits: u32, // character edits allowed within the tokens of a match, summed over the match
+    pub profile: bool,  // collect an `ExtractorProfile`, see `KeywordExtractor::profile`
+    pub labels: Option<Vec<String>>, // only match keywords of these dictionaries, `None` for every keyword
+}
+
+/// Hot-path counters collected by a `KeywordExtractor` when profiling is enabled.
+#[derive(Default, Debug, Clone, PartialEq)]
+pub struct ExtractorProfile {
+    pub calls: u64,
+    pub tokens_scanned: u64, // tokens a match attempt was started from
+    pub prefiltered: u64,    // attempts rejected by the prefilter without a trie probe
+    pub trie_probes: u64,
+    pub edge_transitions: u64,
+    pub abandoned_at_depth: Vec<u64>, // `abandoned_at_depth[d]` counts attempts that stopped after `d` transitions
+    pub matches_emitted: u64,
+    pub segmentation_ns: u64,
+    pub scanning_ns: u64,
+    pub conversion_ns: u64, // left for the bindings to fill in
+}
+
+impl ExtractorProfile {
+    #[inline]
+    fn record_attempt(&mut self, depth: usize, missed: bool) {
+        self.tokens_scanned += 1;
+        self.edge_transitions += depth as u64;
+        // every transition is a successful probe, the walk ends on a failed one unless the text ended
+        self.trie_probes += depth as u64 + missed as u64;
+        if self.abandoned_at_depth.len() <= depth {
+            self.abandoned_at_depth.resize(depth + 1, 0);
+        }
+        self.abandoned_at_depth[depth] += 1;
+    }
+
+    pub fn merge(&mut self, other: &ExtractorProfile) {
+        self.calls += other.calls;
+        self.tokens_scanned += other.tokens_scanned;
+        self.prefiltered += other.prefiltered;
+        self.trie_probes += other.trie_probes;
+        self.edge_transitions += other.edge_transitions;
+        if self.abandoned_at_depth.len() < other.abandoned_at_depth.len() {
+            self.abandoned_at_depth
+                .resize(other.abandoned_at_depth.len(), 0);
+        }
+        for (total, count) in self
+            .abandoned_at_depth
+            .iter_mut()
+            .zip(other.abandoned_at_depth.iter())
+        {
+            *total += count;
+        }
+        self.matches_emitted += other.matches_emitted;
+        self.segmentation_ns += other.segmentation_ns;
+        self.scanning_ns += other.scanning_ns;
+        self.conversion_ns += other.conversion_ns;
+    }
+}
+
+/// A keyword found by a `KeywordExtractor`, with byte offsets into the text.
+#[derive(Debug, Clone, PartialEq)]
+pub struct Match<'t> {
+    pub clean_name: &'t str,
+    pub label: Option<&'t str>, // `None` for keywords added without a label
+    pub id: Option<u64>,        // see `KeywordProcessor::add_to_dictionary`
+    pub start: usize,
+    pub end: usize,
+    pub edits: u32, // edit distance of a fuzzy match
+}
+
+pub struct KeywordExtractor<'t> {
+    idx: usize,
+    tokens: Vec<(usize, String)>, // (byte offset, normalized token)
+    text_len: usize,
+    trie: &'t Node,
+    prefilter: &'t Prefilter,
+    automaton: Option<&'t Automaton<Node>>, // scans instead of the trie when set
+    symbols: Vec<Option<u32>>,              // ids of the text tokens in `automaton`
+    matches: VecDeque<Match<'t>>,           // matches resolved but not yet yielded
+    candidates: Vec<(usize, &'t Node, u32)>, // (end token, node, edits) of the matches starting at the current token
+    strategy: ExtractorStrategy,
+    max_edits: u32,
+    labels: Option<Vec<String>>,
+    index: Option<&'t TokenIndex>, // set when `max_edits > 0`
+    variants: Vec<Option<Vec<(String, u32)>>>, // indexed tokens within `max_edits` of each text token, filled lazily
+    reach: usize, // first token not covered by any match seen so far (`NonOverlappingAll`)
+    pending: Option<(usize, usize, &'t Node, u32)>, // match that no later match overlapped yet (`NonOverlappingAll`)
+    profile: Option<Box<ExtractorProfile>>, // `None` unless profiling, keeps the disabled path to one branch per attempt
+}
+
+impl<'t> KeywordExtractor<'t> {
+    fn new(
+        text: &str,
+        trie: &'t Node,
+        tokenizer: Tokenizer,
+        normalization: Normalization,
+        prefilter: &'t Prefilter,
+        automaton: Option<&'t Automaton<Node>>,
+        options: ExtractorOptions,
+        index: Option<&'t TokenIndex>,
+    ) -> Self {
+        let started = if options.profile {
+            Some(Instant::now())
+        } else {
+            None
+        };
+        let tokens: Vec<(usize, String)> = tokenizer
+            .split_indices(text)
+            .map(|(i, s)| (i, normalization.apply(s).into_owned()))
+            .collect();
+        let profile = started.map(|started| {
+            Box::new(ExtractorProfile {
+                calls: 1,
+                segmentation_ns: started.elapsed().as_nanos() as u64,
+                ..Default::default()
+            })
+        });
+        let variants = if index.is_some() {
+            vec![None; tokens.len()]
+        } else {
+            Vec::new()
+        };
+        let symbols = match automaton {
+            Some(automaton) => tokens
+                .iter()
+                .map(|(_, token)| automaton.symbol(token))
+                .collect(),
+            None => Vec::new(),
+        };
+        Self {
+            idx: 0,
+            tokens: tokens,
+            text_len: text.len(),
+            trie: trie,
+            prefilter: prefilter,
+            automaton: automaton,
+            symbols: symbols,
+            matches: VecDeque::new(),
+            candidates: Vec::new(),
+            strategy: options.strategy,
+            max_edits: options.max_edits,
+            labels: options.labels,
+            index: index,
+            variants: variants,
+            reach: 0,
+            pending: None,
+            profile: profile,
+        }
+    }
+
+    /// Counters collected so far, `None` if the extractor was not created with profiling enabled.
+    pub fn profile(&self) -> Option<&ExtractorProfile> {
+        self.profile.as_deref()
+    }
+
+    /// Yields every `Match`, with its dictionary label and edit distance.
+    pub fn into_matches(self) -> Matches<'t> {
+        Matches { inner: self }
+    }
+
+    #[inline]
+    fn record_attempt(&mut self, start_idx: usize, stop_idx: usize) {
+        if let Some(profile) = self.profile.as_mut() {
+            if start_idx < self.tokens.len() {
+                profile.record_attempt(stop_idx - start_idx, stop_idx < self.tokens.len());
+            }
+        }
+    }
+
+    /// Collects the keywords starting at `start_idx` into `self.candidates`, shortest first.
+    fn find_matches_at_position(&mut self, start_idx: usize) {
+        if self.index.is_some() {
+            return self.find_fuzzy_matches_at_position(start_idx);
+        }
+        self.candidates.clear();
+        if start_idx < self.tokens.len() && !self.prefilter.may_start(&self.tokens[start_idx].1) {
+            if let Some(profile) = self.profile.as_mut() {
+                profile.prefiltered += 1;
+                profile.record_attempt(0, false);
+            }
+            return;
+        }
+        if let Some(automaton) = self.automaton {
+            return self.find_automaton_matches_at_position(automaton, start_idx);
+        }
+        let mut node = self.trie;
+        let mut current_idx = start_idx;
+
+        while current_idx < self.tokens.len() {
+            let (_, token) = &self.tokens[current_idx];
+
+            if let Some(child) = node.children.get(token) {
+                node = child;
+                if node.is_selected(&self.labels) {
+                    self.candidates.push((current_idx, node, 0));
+                }
+                current_idx += 1;
+            } else {
+                break;
+            }
+        }
+
+        self.record_attempt(start_idx, current_idx);
+    }
+
+    /// Same walk as `find_matches_at_position`, over the automaton of the trie.
+    fn find_automaton_matches_at_position(
+        &mut self,
+        automaton: &'t Automaton<Node>,
+        start_idx: usize,
+    ) {
+        let mut state = automaton.root();
+        let mut current_idx = start_idx;
+        while current_idx < self.tokens.len() {
+            match self.symbols[current_idx].and_then(|symbol| automaton.next(state, symbol)) {
+                Some(next) => state = next,
+                None => break,
+            }
+            if let Some(node) = automaton.output(state) {
+                if node.is_selected(&self.labels) {
+                    self.candidates.push((current_idx, node, 0));
+                }
+            }
+            current_idx += 1;
+        }
+        self.record_attempt(start_idx, current_idx);
+    }
+
+    /// Indexed tokens that can replace the text token at `idx`, the token itself first.
+    fn ensure_variants(&mut self, idx: usize) {
+        if self.variants[idx].is_some() {
+            return;
+        }
+        let token = &self.tokens[idx].1;
+        let mut variants = vec![(token.to_string(), 0)];
+        if let Some(index) = self.index {
+            let found = index.search(token, self.max_edits);
+            // the exact token is already probed, with any casing
+            variants.extend(found.into_iter().filter(|(_, edits)| *edits > 0));
+        }
+        self.variants[idx] = Some(variants);
+    }
+
+    /// Walks every trie path whose tokens are within the remaining edit budget of the text tokens.
+    fn find_fuzzy_matches_at_position(&mut self, start_idx: usize) {
+        self.candidates.clear();
+        let mut stack = vec![(self.trie, start_idx, 0)];
+        let mut stop_idx = start_idx;
+        while let Some((node, idx, edits)) = stack.pop() {
+            stop_idx = stop_idx.max(idx);
+            if idx >= self.tokens.len() {
+                continue;
+            }
+            self.ensure_variants(idx);
+            for (variant, cost) in self.variants[idx].as_ref().unwrap() {
+                if edits + cost > self.max_edits {
+                    continue;
+                }
+                if let Some(child) = node.children.get(variant) {
+                    if child.is_selected(&self.labels) {
+                        self.candidates.push((idx, child, edits + cost));
+                    }
+                    stack.push((child, idx + 1, edits + cost));
+                }
+            }
+        }
+        self.candidates
+            .sort_by_key(|&(end_idx, _, edits)| (end_idx, edits));
+        self.record_attempt(start_idx, stop_idx);
+    }
+
+    /// Queues one match per selected dictionary holding the keyword at `node`.
+    fn push_match(&mut self, start_idx: usize, end_idx: usize, node: &'t Node, edits: u32) {
+        let start = self.tokens[start_idx].0;
+        // the tokens partition the text, and may be normalized
+        let end = match self.tokens.get(end_idx + 1) {
+            Some(&(next_start, _)) => next_start,
+            None => self.text_len,
+        };
+        if self.labels.is_none() {
+            if let Some(clean_name) = &node.clean_name {
+                self.matches.push_back(Match {
+                    clean_name,
+                    label: None,
+                    id: node.id,
+                    start,
+                    end,
+                    edits,
+                });
+            }
+        }
+        for (label, clean_name, id) in node.labels.iter() {
+            if self
+                .labels
+                .as_ref()
+                .map_or(true, |labels| labels.contains(label))
+            {
+                self.matches.push_back(Match {
+                    clean_name,
+                    label: Some(label),
+                    id: *id,
+                    start,
+                    end,
+                    edits,
+                });
+            }
+        }
+    }
+
+    /// Resolves the matches starting at the current token and moves past them.
+    fn scan_position(&mut self) {
+        let start_idx = self.idx;
+        self.find_matches_at_position(start_idx);
+        let chosen = match self.strategy {
+            ExtractorStrategy::All => {
+                for i in 0..self.candidates.len() {
+                    let (end_idx, node, edits) = self.candidates[i];
+                    self.push_match(start_idx, end_idx, node, edits);
+                }
+                None
+            }
+            // longest, then closest
+            ExtractorStrategy::Longest => self
+                .candidates
+                .iter()
+                .max_by_key(|&&(end_idx, _, edits)| (end_idx, Reverse(edits)))
+                .copied(),
+            ExtractorStrategy::Shortest => self.candidates.first().copied(),
+            ExtractorStrategy::LeftmostFirst => self
+                .candidates
+                .iter()
+                .min_by_key(|(_, node, _)| node.order)
+                .copied(),
+            ExtractorStrategy::MaxWeight => unreachable!("resolved by `resolve_max_weight`"),
+            ExtractorStrategy::NonOverlappingAll => {
+                if let Some((pending_start, pending_end, node, edits)) = self.pending {
+                    if pending_end < start_idx {
+                        // matches start in order, nothing after this token can overlap it anymore
+                        self.push_match(pending_start, pending_end, node, edits);
+                        self.pending = None;
+                    } else if !self.candidates.is_empty() {
+                        self.pending = None;
+                    }
+                }
+                if let Some(&(end_idx, node, edits)) = self.candidates.last() {
+                    if self.candidates.len() == 1 && self.reach <= start_idx {
+                        self.pending = Some((start_idx, end_idx, node, edits));
+                    }
+                    self.reach = self.reach.max(end_idx + 1);
+                }
+                None
+            }
+        };
+        match chosen {
+            Some((end_idx, node, edits)) => {
+                self.push_match(start_idx, end_idx, node, edits);
+                self.idx = end_idx + 1;
+            }
+            None => self.idx += 1,
+        }
+    }
+
+    /// Weighted interval scheduling over the candidates of every position:
+    /// `best[k]` is the largest total weight of non-overlapping matches within the first `k` tokens.
+    fn resolve_max_weight(&mut self) {
+        let n = self.tokens.len();
+        let mut best = vec![0.0; n + 1];
+        let mut choice: Vec<Option<(usize, &'t Node, u32)>> = vec![None; n + 1]; // (start token, node, edits) ending at `k - 1`
+        for start_idx in self.idx..n {
+            if best[start_idx] > best[start_idx + 1] {
+                best[start_idx + 1] = best[start_idx];
+                choice[start_idx + 1] = None;
+            }
+            self.find_matches_at_position(start_idx);
+            for &(end_idx, node, edits) in self.candidates.iter() {
+                let weight = best[start_idx] + node.weight;
+                // ties keep the first solution found, i.e. the earlier starting (longer) match
+                if weight > best[end_idx + 1] {
+                    best[end_idx + 1] = weight;
+                    choice[end_idx + 1] = Some((start_idx, node, edits));
+                }
+            }
+        }
+        let mut chosen = vec![];
+        let mut k = n;
+        while k > self.idx {
+            match choice[k] {
+                Some((start_idx, node, edits)) => {
+                    chosen.push((start_idx, k - 1, node, edits));
+                    k = start_idx;
+                }
+                None => k -= 1,
+            }
+        }
+        for (start_idx, end_idx, node, edits) in chosen.into_iter().rev() {
+            self.push_match(start_idx, end_idx, node, edits);
+        }
+        self.idx = n;
+    }
+
+    fn next_match(&mut self) -> Option<Match<'t>> {
+        if self.strategy == ExtractorStrategy::MaxWeight {
+            if self.idx < self.tokens.len() {
+                self.resolve_max_weight();
+            }
+            return self.matches.pop_front();
+        }
+        while self.matches.is_empty() && self.idx < self.tokens.len() {
+            self.scan_position();
+        }
+        if self.matches.is_empty() {
+            if let Some((start_idx, end_idx, node, edits)) = self.pending.take() {
+                self.push_match(start_idx, end_idx, node, edits);
+            }
+        }
+        self.matches.pop_front()
+    }
+
+    fn next_profiled(&mut self) -> Option<Match<'t>> {
+        if self.profile.is_none() {
+            return self.next_match();
+        }
+        let started = Instant::now();
+        let item = self.next_match();
+        if let Some(profile) = self.profile.as_mut() {
+            profile.scanning_ns += started.elapsed().as_nanos() as u64;
+            profile.matches_emitted += item.is_some() as u64;
+        }
+        item
+    }
+}
+
+impl<'t> Iterator for KeywordExtractor<'t> {
+    type Item = (String, usize, usize);
+
+    fn next(&mut self) -> Option<Self::Item> {
+        self.next_profiled()
+            .map(|found| (found.clean_name.to_string(), found.start, found.end))
+    }
+
+    fn size_hint(&self) -> (usize, Option<usize>) {
+        // a token can start several matches, each in several dictionaries
+        (0, None)
+    }
+}
+
+pub struct Matches<'t> {
+    inner: KeywordExtractor<'t>,
+}
+
+impl<'t> Matches<'t> {
+    pub fn profile(&self) -> Option<&ExtractorProfile> {
+        self.inner.profile()
+    }
+
+    /// Byte offsets of the start of the `n`th token before `m` and of the end
+    /// of the `n`th token after it, from the tokens the scan already split the
+    /// text into. Tokens without letters or digits (whitespace, punctuation)
+    /// are not counted, so that the window holds up to `n` words on either
+    /// side.
+    pub fn token_context(&self, m: &Match, n: usize) -> (usize, usize) {
+        let tokens = &self.inner.tokens;
+        let is_word = |i: &usize| tokens[*i].1.chars().any(char::is_alphanumeric);
+        let first = tokens.partition_point(|&(offset, _)| offset < m.start);
+        let after = tokens.partition_point(|&(offset, _)| offset < m.end);
+        let start = (0..first)
+            .rev()
+            .filter(is_word)
+            .take(n)
+            .last()
+            .map_or(m.start, |i| tokens[i].0);
+        let end = (after..tokens.len())
+            .filter(is_word)
+            .take(n)
+            .last()
+            .map_or(m.end, |i| match tokens.get(i + 1) {
+                Some(&(next_start, _)) => next_start,
+                None => self.inner.text_len,
+            });
+        (start, end)
+    }
+}
+
+impl<'t> Iterator for Matches<'t> {
+    type Item = Match<'t>;
+
+    fn next(&mut self) -> Option<Self::Item> {
+        self.inner.next_profiled()
+    }
+}
+
+pub struct AllKeywordsIterator<'t> {
+    stack: Vec<(String, &'t Node)>,
+    labeled: Vec<(String, &'t str)>, // labeled clean names of the last keyword, not yet yielded
+}
+
+impl<'t> AllKeywordsIterator<'t> {
+    pub fn new(root: &'t Node) -> Self {
+        let stack = vec![("".to_string(), root)];
+        Self {
+            stack,
+            labeled: Vec::new(),
+        }
+    }
+}
+
+impl<'t> Iterator for AllKeywordsIterator<'t> {
+    type Item = (String, &'t str);
+
+    fn next(&mut self) -> Option<Self::Item> {
+        if let Some(keyword) = self.labeled.pop() {
+            return Some(keyword);
+        }
+        while let Some((prefix, node)) = self.stack.pop() {
+            for (token, value) in node.children.iter() {
+                self.stack.push((format!("{}{}", prefix, token), value));
+            }
+            for (_, clean_name, _) in node.labels.iter().rev() {
+                self.labeled.push((prefix.clone(), clean_name.as_str()));
+            }
+            if let Some(clean_name) = &node.clean_name {
+                return Some((prefix, clean_name.as_str()));
+            }
+            if let Some(keyword) = self.labeled.pop() {
+                return Some(keyword);
+            }
+        }
+        None
+    }
+}
@@ -0,0 +1,124 @@
+use std::str::FromStr;
+
+use crate::shared::Match;
+
+/// Replacement pattern for `KeywordProcessor::replace_keywords_with`, parsed
+/// once and rendered straight into the output.
+///
+/// `{clean}` is the clean name of the match, `{match}` the matched text and
+/// `{label}` its dictionary (empty for the unlabeled one). `{{` and `}}` are
+/// literal braces.
+#[derive(Debug, Clone, PartialEq)]
+pub struct Template {
+    parts: Vec<Part>,
+}
+
+#[derive(Debug, Clone, PartialEq)]
+enum Part {
+    Literal(String),
+    Clean,
+    Matched,
+    Label,
+}
+
+impl FromStr for Template {
+    type Err = ();
+
+    fn from_str(s: &str) -> Result<Self, Self::Err> {
+        let mut parts = vec![];
+        let mut literal = String::new();
+        let mut chars = s.chars().peekable();
+        while let Some(c) = chars.next() {
+            match c {
+                '{' if chars.peek() == Some(&'{') => {
+                    chars.next();
+                    literal.push('{');
+                }
+                '{' => {
+                    let mut field = String::new();
+                    loop {
+                        match chars.next() {
+                            Some('}') => break,
+                            Some(c) => field.push(c),
+                            None => return Err(()),
+                        }
+                    }
+                    let part = match field.as_str() {
+                        "clean" => Part::Clean,
+                        "match" => Part::Matched,
+                        "label" => Part::Label,
+                        _ => return Err(()),
+                    };
+                    if !literal.is_empty() {
+                        parts.push(Part::Literal(std::mem::take(&mut literal)));
+                    }
+                    parts.push(part);
+                }
+                '}' if chars.peek() == Some(&'}') => {
+                    chars.next();
+                    literal.push('}');
+                }
+                '}' => return Err(()),
+                c => literal.push(c),
+            }
+        }
+        if !literal.is_empty() {
+            parts.push(Part::Literal(literal));
+        }
+        Ok(Self { parts })
+    }
+}
+
+impl Template {
+    /// Appends the replacement of `m`, a match in `text`, to `out`.
+    pub fn render(&self, m: &Match, text: &str, out: &mut String) {
+        for part in self.parts.iter() {
+            match part {
+                Part::Literal(literal) => out.push_str(literal),
+                Part::Clean => out.push_str(m.clean_name),
+                Part::Matched => out.push_str(&text[m.start..m.end]),
+                Part::Label => out.push_str(m.label.unwrap_or("")),
+            }
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn render(template: &str, label: Option<&str>) -> Result<String, ()> {
+        let template = Template::from_str(template)?;
+        let m = Match {
+            clean_name: "Python",
+            label,
+            id: None,
+            start: 2,
+            end: 8,
+            edits: 0,
+        };
+        let mut out = String::new();
+        template.render(&m, "a python", &mut out);
+        Ok(out)
+    }
+
+    #[test]
+    fn fields() {
+        assert_eq!(render("<b>{clean}</b>", None), Ok("<b>Python</b>".into()));
+        assert_eq!(
+            render("{match}->{clean} ({label})", Some("skill")),
+            Ok("python->Python (skill)".into())
+        );
+        assert_eq!(render("[{label}]", None), Ok("[]".into()));
+        assert_eq!(render("", None), Ok("".into()));
+    }
+
+    #[test]
+    fn braces() {
+        assert_eq!(render("{{{clean}}}", None), Ok("{Python}".into()));
+        assert_eq!(render("}}", None), Ok("}".into()));
+        assert_eq!(render("{name}", None), Err(()));
+        assert_eq!(render("{clean", None), Err(()));
+        assert_eq!(render("clean}", None), Err(()));
+    }
+}
@@ -0,0 +1,452 @@
+use std::str::{CharIndices, FromStr};
+use unicode_segmentation::{GraphemeIndices, UWordBoundIndices, UnicodeSegmentation};
+
+// UAX#29 word break classes of the ASCII range
+const OTHER: u8 = 0;
+const CR: u8 = 1;
+const LF: u8 = 2;
+const NEWLINE: u8 = 3;
+const WSEG_SPACE: u8 = 4;
+const ALETTER: u8 = 5;
+const NUMERIC: u8 = 6;
+const EXTEND_NUM_LET: u8 = 7;
+const MID_LETTER: u8 = 8;
+const MID_NUM: u8 = 9;
+const MID_NUM_LET_Q: u8 = 10; // MidNumLet and Single_Quote behave the same without Hebrew letters
+
+const fn build_word_class_table() -> [u8; 128] {
+    let mut table = [OTHER; 128];
+    let mut b = 0;
+    while b < 128 {
+        table[b] = match b as u8 {
+            b'\r' => CR,
+            b'\n' => LF,
+            0x0B | 0x0C => NEWLINE,
+            b' ' => WSEG_SPACE,
+            b'A'..=b'Z' | b'a'..=b'z' => ALETTER,
+            b'0'..=b'9' => NUMERIC,
+            b'_' => EXTEND_NUM_LET,
+            b':' => MID_LETTER,
+            b',' | b';' => MID_NUM,
+            b'.' | b'\'' => MID_NUM_LET_Q,
+            _ => OTHER,
+        };
+        b += 1;
+    }
+    table
+}
+
+static WORD_CLASS: [u8; 128] = build_word_class_table();
+
+#[inline(always)]
+fn word_class(b: u8) -> u8 {
+    WORD_CLASS[(b & 0x7F) as usize]
+}
+
+#[inline(always)]
+fn is_word_class(class: u8) -> bool {
+    class == ALETTER || class == NUMERIC || class == EXTEND_NUM_LET
+}
+
+/// Length of the word-bound token starting at `start`, following the UAX#29
+/// rules that can apply to ASCII text (WB3-WB3d, WB5-WB13b and WB999).
+#[inline]
+fn ascii_token_len(bytes: &[u8], start: usize) -> usize {
+    let class = word_class(bytes[start]);
+    let mut end = start + 1;
+    match class {
+        CR => {
+            if end < bytes.len() && bytes[end] == b'\n' {
+                end += 1;
+            }
+        }
+        WSEG_SPACE => {
+            while end < bytes.len() && bytes[end] == b' ' {
+                end += 1;
+            }
+        }
+        ALETTER | NUMERIC | EXTEND_NUM_LET => {
+            let mut prev = class;
+            while end < bytes.len() {
+                let next = word_class(bytes[end]);
+                if is_word_class(next) {
+                    // WB5, WB8, WB9, WB10, WB13a, WB13b
+                    prev = next;
+                    end += 1;
+                } else if end + 1 < bytes.len() {
+                    // WB6/WB7 (letters) and WB11/WB12 (numbers) join across one middle character
+                    let after = word_class(bytes[end + 1]);
+                    let joins = match prev {
+                        ALETTER => {
+                            (next == MID_LETTER || next == MID_NUM_LET_Q) && after == ALETTER
+                        }
+                        NUMERIC => (next == MID_NUM || next == MID_NUM_LET_Q) && after == NUMERIC,
+                        _ => false,
+                    };
+                    if !joins {
+                        break;
+                    }
+                    end += 2;
+                } else {
+                    break;
+                }
+            }
+        }
+        _ => {}
+    }
+    end
+}
+
+/// Word-bound tokenizer for ASCII text, yielding the same `(offset, token)`
+/// pairs as `UnicodeSegmentation::split_word_bound_indices` on ASCII input.
+pub struct AsciiWordBoundIndices<'a> {
+    text: &'a str,
+    pos: usize,
+}
+
+impl<'a> AsciiWordBoundIndices<'a> {
+    pub fn new(text: &'a str) -> Self {
+        debug_assert!(text.is_ascii());
+        Self { text, pos: 0 }
+    }
+}
+
+impl<'a> Iterator for AsciiWordBoundIndices<'a> {
+    type Item = (usize, &'a str);
+
+    #[inline]
+    fn next(&mut self) -> Option<Self::Item> {
+        let bytes = self.text.as_bytes();
+        if self.pos >= bytes.len() {
+            return None;
+        }
+        let start = self.pos;
+        self.pos = ascii_token_len(bytes, start);
+        Some((start, &self.text[start..self.pos]))
+    }
+
+    fn size_hint(&self) -> (usize, Option<usize>) {
+        let remaining = self.text.len() - self.pos;
+        ((remaining > 0) as usize, Some(remaining))
+    }
+}
+
+/// Word-bound tokenizer that takes the ASCII fast path whenever the text allows it.
+pub enum WordBoundIndices<'a> {
+    Ascii(AsciiWordBoundIndices<'a>),
+    Unicode(UWordBoundIndices<'a>),
+}
+
+impl<'a> Iterator for WordBoundIndices<'a> {
+    type Item = (usize, &'a str);
+
+    #[inline]
+    fn next(&mut self) -> Option<Self::Item> {
+        match self {
+            WordBoundIndices::Ascii(inner) => inner.next(),
+            WordBoundIndices::Unicode(inner) => inner.next(),
+        }
+    }
+
+    fn size_hint(&self) -> (usize, Option<usize>) {
+        match self {
+            WordBoundIndices::Ascii(inner) => inner.size_hint(),
+            WordBoundIndices::Unicode(inner) => inner.size_hint(),
+        }
+    }
+}
+
+pub fn split_word_bound_indices(text: &str) -> WordBoundIndices {
+    if text.is_ascii() {
+        WordBoundIndices::Ascii(AsciiWordBoundIndices::new(text))
+    } else {
+        WordBoundIndices::Unicode(text.split_word_bound_indices())
+    }
+}
+
+pub fn split_word_bounds(text: &str) -> impl Iterator<Item = &str> {
+    split_word_bound_indices(text).map(|(_, token)| token)
+}
+
+/// Splits text into alternating runs of whitespace and non-whitespace.
+pub struct WhitespaceIndices<'a> {
+    text: &'a str,
+    pos: usize,
+}
+
+impl<'a> WhitespaceIndices<'a> {
+    pub fn new(text: &'a str) -> Self {
+        Self { text, pos: 0 }
+    }
+}
+
+impl<'a> Iterator for WhitespaceIndices<'a> {
+    type Item = (usize, &'a str);
+
+    #[inline]
+    fn next(&mut self) -> Option<Self::Item> {
+        let bytes = self.text.as_bytes();
+        let start = self.pos;
+        if start >= bytes.len() {
+            return None;
+        }
+        let (in_whitespace, mut end) = whitespace_class(self.text, start);
+        while end < bytes.len() {
+            let (is_whitespace, next) = whitespace_class(self.text, end);
+            if is_whitespace != in_whitespace {
+                break;
+            }
+            end = next;
+        }
+        self.pos = end;
+        Some((start, &self.text[start..end]))
+    }
+}
+
+/// Whether the character at `i` is whitespace, and where the next character starts.
+#[inline(always)]
+fn whitespace_class(text: &str, i: usize) -> (bool, usize) {
+    let b = text.as_bytes()[i];
+    if b.is_ascii() {
+        // ASCII is classified without decoding, `\x0B` is whitespace for `char::is_whitespace`
+        (b.is_ascii_whitespace() || b == 0x0B, i + 1)
+    } else {
+        let c = text[i..].chars().next().unwrap();
+        (c.is_whitespace(), i + c.len_utf8())
+    }
+}
+
+/// Splits text into single characters.
+pub struct CharTokenIndices<'a> {
+    text: &'a str,
+    inner: CharIndices<'a>,
+}
+
+impl<'a> Iterator for CharTokenIndices<'a> {
+    type Item = (usize, &'a str);
+
+    #[inline]
+    fn next(&mut self) -> Option<Self::Item> {
+        self.inner
+            .next()
+            .map(|(i, c)| (i, &self.text[i..i + c.len_utf8()]))
+    }
+
+    fn size_hint(&self) -> (usize, Option<usize>) {
+        self.inner.size_hint()
+    }
+}
+
+/// How keywords and text are split into the tokens stored on the trie edges.
+///
+/// Every tokenizer partitions the text, so tokens concatenate back to the original.
+#[derive(Default, Debug, Clone, Copy, PartialEq, Eq)]
+pub enum Tokenizer {
+    #[default]
+    WordBounds, // UAX#29 word boundaries
+    Whitespace, // runs of whitespace and of non-whitespace
+    Char,       // single characters
+    Grapheme,   // extended grapheme clusters
+}
+
+impl FromStr for Tokenizer {
+    type Err = ();
+
+    fn from_str(s: &str) -> Result<Self, Self::Err> {
+        match s {
+            "word_bounds" => Ok(Tokenizer::WordBounds),
+            "whitespace" => Ok(Tokenizer::Whitespace),
+            "char" => Ok(Tokenizer::Char),
+            "grapheme" => Ok(Tokenizer::Grapheme),
+            _ => Err(()),
+        }
+    }
+}
+
+impl Tokenizer {
+    pub fn as_str(&self) -> &'static str {
+        match self {
+            Tokenizer::WordBounds => "word_bounds",
+            Tokenizer::Whitespace => "whitespace",
+            Tokenizer::Char => "char",
+            Tokenizer::Grapheme => "grapheme",
+        }
+    }
+
+    pub fn split_indices<'a>(&self, text: &'a str) -> TokenIndices<'a> {
+        match self {
+            Tokenizer::WordBounds => TokenIndices::WordBounds(split_word_bound_indices(text)),
+            Tokenizer::Whitespace => TokenIndices::Whitespace(WhitespaceIndices::new(text)),
+            Tokenizer::Char => TokenIndices::Char(CharTokenIndices {
+                text,
+                inner: text.char_indices(),
+            }),
+            Tokenizer::Grapheme => TokenIndices::Grapheme(text.grapheme_indices(true)),
+        }
+    }
+
+    pub fn split<'a>(&self, text: &'a str) -> impl Iterator<Item = &'a str> {
+        self.split_indices(text).map(|(_, token)| token)
+    }
+}
+
+pub enum TokenIndices<'a> {
+    WordBounds(WordBoundIndices<'a>),
+    Whitespace(WhitespaceIndices<'a>),
+    Char(CharTokenIndices<'a>),
+    Grapheme(GraphemeIndices<'a>),
+}
+
+impl<'a> Iterator for TokenIndices<'a> {
+    type Item = (usize, &'a str);
+
+    #[inline]
+    fn next(&mut self) -> Option<Self::Item> {
+        match self {
+            TokenIndices::WordBounds(inner) => inner.next(),
+            TokenIndices::Whitespace(inner) => inner.next(),
+            TokenIndices::Char(inner) => inner.next(),
+            TokenIndices::Grapheme(inner) => inner.next(),
+        }
+    }
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    fn assert_agrees(text: &str) {
+        let expected: Vec<_> = text.split_word_bound_indices().collect();
+        let actual: Vec<_> = AsciiWordBoundIndices::new(text).collect();
+        assert_eq!(actual, expected, "token boundaries differ for {:?}", text);
+    }
+
+    // xorshift, so the property tests are reproducible without extra dependencies
+    struct Rng(u64);
+
+    impl Rng {
+        fn next(&mut self) -> u64 {
+            self.0 ^= self.0 << 13;
+            self.0 ^= self.0 >> 7;
+            self.0 ^= self.0 << 17;
+            self.0
+        }
+    }
+
+    #[test]
+    fn agrees_on_known_cases() {
+        for text in [
+            "",
+            "hello world",
+            "Dr. Smith-Jones visited St. Mary's.",
+            "There's a -test- and a --test-- here.",
+            "1,000.50 vs 3.14; a.b.c a:b a::b",
+            "snake_case __init__ _1 a_1_b",
+            "line\r\nbreak\r\r\n\n\x0b\x0c end",
+            "tabs\t\tand  spaces   ",
+            "a.1 1.a 1'2 a'b a'' ''a",
+            "$100 100% @user@ C++ C# e.g.",
+        ] {
+            assert_agrees(text);
+        }
+    }
+
+    #[test]
+    fn agrees_on_all_short_strings() {
+        let mut buf = [0u8; 3];
+        for a in 0..128u8 {
+            buf[0] = a;
+            assert_agrees(std::str::from_utf8(&buf[..1]).unwrap());
+            for b in 0..128u8 {
+                buf[1] = b;
+                assert_agrees(std::str::from_utf8(&buf[..2]).unwrap());
+            }
+        }
+        // every class in every position of a three character string
+        let representatives = b"\r\n\x0b \tAz09_:,;.'\"!-";
+        for &a in representatives {
+            for &b in representatives {
+                for &c in representatives {
+                    buf = [a, b, c];
+                    assert_agrees(std::str::from_utf8(&buf).unwrap());
+                }
+            }
+        }
+    }
+
+    #[test]
+    fn agrees_on_random_strings() {
+        let alphabet = b"aZ09_:,;.'\" \t\r\n\x0b-!#@$%()";
+        let mut rng = Rng(0x9E37_79B9_7F4A_7C15);
+        for _ in 0..20_000 {
+            let len = (rng.next() % 32) as usize;
+            let text: String = (0..len)
+                .map(|_| {
+                    if rng.next() % 4 == 0 {
+                        (rng.next() % 128) as u8 as char
+                    } else {
+                        alphabet[(rng.next() % alphabet.len() as u64) as usize] as char
+                    }
+                })
+                .collect();
+            assert_agrees(&text);
+        }
+    }
+
+    #[test]
+    fn tokenizers_partition_text() {
+        let text = "Welcome to 東京!\u{3000}ශ්‍රී  ලංකා\tlog=1 👨‍👩‍👧‍👦";
+        for tokenizer in [
+            Tokenizer::WordBounds,
+            Tokenizer::Whitespace,
+            Tokenizer::Char,
+            Tokenizer::Grapheme,
+        ] {
+            let mut expected_start = 0;
+            for (start, token) in tokenizer.split_indices(text) {
+                assert_eq!(start, expected_start, "{:?}", tokenizer);
+                assert!(!token.is_empty());
+                expected_start += token.len();
+            }
+            assert_eq!(expected_start, text.len());
+        }
+    }
+
+    #[test]
+    fn whitespace_tokenizer() {
+        let tokens: Vec<_> = Tokenizer::Whitespace
+            .split("  GET /index.html\u{3000}200\r\n")
+            .collect();
+        assert_eq!(
+            tokens,
+            vec!["  ", "GET", " ", "/index.html", "\u{3000}", "200", "\r\n"]
+        );
+        for b in 0..128u8 {
+            let text = (b as char).to_string();
+            let tokens: Vec<_> = WhitespaceIndices::new(&format!("a{}a", text))
+                .map(|(_, t)| t.to_string())
+                .collect();
+            let expected = if (b as char).is_whitespace() { 3 } else { 1 };
+            assert_eq!(tokens.len(), expected, "{:?}", b as char);
+        }
+    }
+
+    #[test]
+    fn char_and_grapheme_tokenizers() {
+        let chars: Vec<_> = Tokenizer::Char.split("東京タワー").collect();
+        assert_eq!(chars, vec!["東", "京", "タ", "ワ", "ー"]);
+        let graphemes: Vec<_> = Tokenizer::Grapheme.split("e\u{301}👨‍💻").collect();
+        assert_eq!(graphemes.len(), 2);
+    }
+
+    #[test]
+    fn falls_back_for_non_ascii() {
+        let text = "café au lait";
+        assert!(matches!(
+            split_word_bound_indices(text),
+            WordBoundIndices::Unicode(_)
+        ));
+        let expected: Vec<_> = text.split_word_bound_indices().collect();
+        assert_eq!(split_word_bound_indices(text).collect::<Vec<_>>(), expected);
+    }
+}
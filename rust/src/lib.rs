@@ -1,119 +1,1073 @@
-use pyo3::exceptions::PyValueError;
+use fxhash::FxHashMap;
+use pyo3::exceptions::{PyIndexError, PyTypeError, PyValueError};
 use pyo3::prelude::*;
+use pyo3::pybacked::PyBackedStr;
+use pyo3::types::{PyBytes, PyDict, PySlice, PyString, PyTuple};
+use pyo3::{PyTraverseError, PyVisit};
 #[path = "./versions/lib_v0_0_2.rs"]
 mod lib_v0_0_2;
-mod shared;
 use std::str::FromStr;
+use std::sync::atomic::{AtomicBool, AtomicUsize, Ordering};
+use std::sync::{
+    Mutex, MutexGuard, PoisonError, RwLock, RwLockReadGuard, RwLockWriteGuard, TryLockError,
+};
+use std::time::Instant;
+use textrush_core::{normalize, shared, template, tokenizer, DecodeError};
 
+/// Any number of threads extract at the same time, changes wait for them to
+/// finish and block new extractions until they are done. Threads waiting for
+/// the lock do so with the GIL released, so a reader that needs the GIL to
+/// finish never waits on a writer holding it, and the free-threaded build can
+/// stop the world for garbage collection while they wait.
 #[pyclass(name = "PyKeywordProcessor")]
 #[derive(Debug)]
 struct PyKeywordProcessor {
+    state: RwLock<State>,
+    profiling: AtomicBool, // read on every extraction, `profile` is only locked while it is set
+    profile: Mutex<Option<shared::ExtractorProfile>>, // accumulated over calls while profiling is enabled
+}
+
+#[derive(Debug)]
+struct State {
     processor: shared::KeywordProcessor,
+    first_payload_id: u64, // ids below are reserved by keywords loaded with `from_bytes`
+    payloads: Vec<Option<PyObject>>, // indexed by the keyword ids of `processor` from `first_payload_id`
+    free_payloads: Vec<u64>,         // ids of the empty `payloads` slots
 }
 
 #[pymethods]
 impl PyKeywordProcessor {
     #[new]
-    #[pyo3(signature = (case_sensitive=false))]
-    fn new(case_sensitive: bool) -> Self {
-        Self {
-            processor: shared::KeywordProcessor::new(case_sensitive),
-        }
+    #[pyo3(signature = (case_sensitive=false, tokenizer=String::from("word_bounds"), engine=String::from("hashtrie"), normalize=None))]
+    fn new(
+        case_sensitive: bool,
+        tokenizer: String,
+        engine: String,
+        normalize: Option<String>,
+    ) -> PyResult<Self> {
+        let tokenizer = tokenizer::Tokenizer::from_str(&tokenizer).map_err(|_| {
+            PyValueError::new_err(format!(
+                "invalid tokenizer: {:?}, must be one of 'word_bounds', 'whitespace', 'char', 'grapheme'",
+                tokenizer
+            ))
+        })?;
+        let engine = shared::Engine::from_str(&engine).map_err(|_| {
+            PyValueError::new_err(format!(
+                "invalid engine: {:?}, must be one of 'hashtrie', 'compact', 'automaton'",
+                engine
+            ))
+        })?;
+        let normalization = match normalize {
+            None => normalize::Normalization::None,
+            Some(normalize) => normalize::Normalization::from_str(&normalize).map_err(|_| {
+                PyValueError::new_err(format!(
+                    "invalid normalize: {:?}, must be one of 'nfkc', 'nfkc_casefold', 'strip_accents'",
+                    normalize
+                ))
+            })?,
+        };
+        Ok(Self {
+            state: RwLock::new(State {
+                processor: shared::KeywordProcessor::with_normalization(
+                    case_sensitive,
+                    tokenizer,
+                    engine,
+                    normalization,
+                ),
+                first_payload_id: 0,
+                payloads: Vec::new(),
+                free_payloads: Vec::new(),
+            }),
+            profiling: AtomicBool::new(false),
+            profile: Mutex::new(None),
+        })
     }
 
-    fn __len__(&self) -> usize {
-        self.processor.len()
+    #[getter]
+    fn tokenizer(&self, py: Python<'_>) -> &'static str {
+        self.read(py).processor.tokenizer().as_str()
+    }
+
+    #[getter]
+    fn engine(&self, py: Python<'_>) -> &'static str {
+        self.read(py).processor.engine().as_str()
+    }
+
+    #[getter]
+    fn normalize(&self, py: Python<'_>) -> Option<&'static str> {
+        self.read(py).processor.normalization().as_str()
+    }
+
+    fn __len__(&self, py: Python<'_>) -> usize {
+        self.read(py).processor.len()
     }
 
     fn __repr__(&self) -> String {
         "<KeywordProcessor()>".to_string()
     }
 
-    #[pyo3(signature = (word, clean_name=None))]
-    fn add_keyword(&mut self, word: String, clean_name: Option<String>) -> PyResult<()> {
+    fn __sizeof__(&self, py: Python<'_>) -> usize {
+        std::mem::size_of::<Self>() + self.read(py).processor.stats().heap_bytes()
+    }
+
+    fn stats<'py>(&self, py: Python<'py>) -> PyResult<Bound<'py, PyDict>> {
+        let stats = self.read(py).processor.stats();
+        let dict = PyDict::new(py);
+        dict.set_item("len", stats.len)?;
+        dict.set_item("node_count", stats.node_count)?;
+        dict.set_item("edge_count", stats.edge_count)?;
+        dict.set_item("max_depth", stats.max_depth)?;
+        dict.set_item("avg_depth", stats.avg_depth)?;
+        dict.set_item("fanout_histogram", stats.fanout_histogram)?;
+        dict.set_item("distinct_tokens", stats.distinct_tokens)?;
+        dict.set_item("distinct_clean_names", stats.distinct_clean_names)?;
+        dict.set_item("trie_heap_bytes", stats.trie_heap_bytes)?;
+        dict.set_item("clean_name_heap_bytes", stats.clean_name_heap_bytes)?;
+        Ok(dict)
+    }
+
+    #[pyo3(signature = (word, clean_name=None, weight=None, label=None, payload=None))]
+    fn add_keyword(
+        &self,
+        py: Python<'_>,
+        word: String,
+        clean_name: Option<String>,
+        weight: Option<f64>,
+        label: Option<PyBackedStr>,
+        payload: Option<PyObject>,
+    ) -> PyResult<()> {
         if !shared::is_valid_keyword(&word) {
             return Err(PyValueError::new_err(format!(
                 "invalid keyword: {:?}",
                 word
             )));
         }
-        if let Some(f) = clean_name {
-            self.processor.add_keyword_with_clean_name(&word, &f);
-        } else {
-            self.processor.add_keyword(&word);
+        let weight = weight.unwrap_or(shared::DEFAULT_WEIGHT);
+        if !weight.is_finite() {
+            return Err(PyValueError::new_err(format!(
+                "invalid weight: {:?}",
+                weight
+            )));
         }
+        let clean_name = clean_name.as_deref().unwrap_or(&word);
+        let mut state = self.write(py);
+        let id = payload
+            .map(|payload| state.store_payload(payload))
+            .transpose()?;
+        let replaced =
+            state
+                .processor
+                .add_to_dictionary(&word, clean_name, weight, label.as_deref(), id);
+        let replaced = state.release_payload(replaced);
+        drop(state); // before the replaced payload, whose finalizer may use this processor
+        drop(replaced);
         Ok(())
     }
 
-    fn remove_keyword(&mut self, word: &str) {
-        self.processor.remove_keyword(word);
+    #[pyo3(signature = (pairs, n_threads=0))]
+    fn add_keywords_parallel(
+        &self,
+        py: Python<'_>,
+        pairs: Vec<(String, String)>,
+        n_threads: usize,
+    ) -> PyResult<()> {
+        let mut state = self.write(py);
+        let processor = &mut state.processor;
+        let replaced = py
+            .allow_threads(|| processor.add_keywords_parallel(&pairs, n_threads))
+            .map_err(|i| PyValueError::new_err(format!("invalid keyword: {:?}", pairs[i].0)))?;
+        let replaced: Vec<_> = replaced
+            .into_iter()
+            .map(|id| state.release_payload(Some(id)))
+            .collect();
+        drop(state);
+        drop(replaced);
+        Ok(())
     }
 
-    #[pyo3(signature = (text, strategy="all"))]
-    fn extract_keywords(&self, text: String, strategy: &str) -> Vec<String> {
-        let strategy = shared::ExtractorStrategy::from_str(strategy).unwrap();
-        self.processor
-            .extract_keywords(text, strategy)
-            .map(String::from)
-            .collect()
+    #[pyo3(signature = (word, label=None))]
+    fn remove_keyword(
+        &self,
+        py: Python<'_>,
+        word: PyBackedStr,
+        label: Option<PyBackedStr>,
+    ) -> PyResult<()> {
+        if !shared::is_valid_keyword(&word) {
+            return Err(PyValueError::new_err(format!(
+                "invalid keyword: {:?}",
+                &*word
+            )));
+        }
+        let mut state = self.write(py);
+        let removed = state
+            .processor
+            .remove_from_dictionary(&word, label.as_deref());
+        let removed = state.release_payload(removed);
+        drop(state);
+        drop(removed);
+        Ok(())
+    }
+
+    fn compact(&self, py: Python<'_>) -> usize {
+        self.write(py).processor.compact()
+    }
+
+    fn to_bytes<'py>(&self, py: Python<'py>) -> Bound<'py, PyBytes> {
+        let bytes = self.read(py).processor.to_bytes();
+        PyBytes::new(py, &bytes)
+    }
+
+    #[staticmethod]
+    fn from_bytes(data: &[u8]) -> PyResult<Self> {
+        let processor = shared::KeywordProcessor::from_bytes(data).map_err(|err| {
+            PyValueError::new_err(format!("invalid serialized keywords: {}", err))
+        })?;
+        // payloads are not serialized, the ids of the keywords that had one
+        // stay reserved so that new payloads never get them; the ids come
+        // from the input, so no slots are allocated for them
+        let first_payload_id = match processor.max_id() {
+            None => 0,
+            Some(id) => id.checked_add(1).ok_or_else(|| {
+                PyValueError::new_err(format!(
+                    "invalid serialized keywords: {}",
+                    DecodeError::Invalid("payload id")
+                ))
+            })?,
+        };
+        Ok(Self {
+            state: RwLock::new(State {
+                processor,
+                first_payload_id,
+                payloads: Vec::new(),
+                free_payloads: Vec::new(),
+            }),
+            profiling: AtomicBool::new(false),
+            profile: Mutex::new(None),
+        })
+    }
+
+    fn __traverse__(&self, visit: PyVisit<'_>) -> Result<(), PyTraverseError> {
+        // the collector must not block, a writer holding the lock only delays
+        // finding a cycle through the payloads until the next collection
+        let state = match self.state.try_read() {
+            Ok(state) => state,
+            Err(TryLockError::Poisoned(poisoned)) => poisoned.into_inner(),
+            Err(TryLockError::WouldBlock) => return Ok(()),
+        };
+        for payload in state.payloads.iter().flatten() {
+            visit.call(payload)?;
+        }
+        Ok(())
+    }
+
+    fn __clear__(&self) {
+        // the keywords keep their ids, but extraction falls back to the clean names
+        let mut state = match self.state.try_write() {
+            Ok(state) => state,
+            Err(TryLockError::Poisoned(poisoned)) => poisoned.into_inner(),
+            Err(TryLockError::WouldBlock) => return,
+        };
+        let payloads = std::mem::take(&mut state.payloads);
+        state.free_payloads.clear();
+        drop(state);
+        drop(payloads);
+    }
+
+    #[pyo3(signature = (text, strategy=String::from("all"), max_edits=0, labels=None, label_info=false))]
+    fn extract_keywords(
+        &self,
+        py: Python<'_>,
+        text: String,
+        strategy: String,
+        max_edits: u32,
+        labels: Option<Vec<String>>,
+        label_info: bool,
+    ) -> PyResult<PyObject> {
+        let strategy = parse_strategy(&strategy)?;
+        let state = self.read(py);
+        let mut extractor = self.extractor(&state.processor, &text, strategy, max_edits, labels);
+        let matches: Vec<shared::Match> = extractor.by_ref().collect();
+        let started = self.profiling().then(Instant::now);
+        let profile = extractor.profile();
+        let matches = matches.into_iter();
+        Ok(match (label_info, max_edits > 0) {
+            (false, false) => {
+                let keywords: Vec<PyObject> = matches.map(|m| state.value(py, &m)).collect();
+                self.convert(py, keywords, profile, started)
+            }
+            (false, true) => {
+                let keywords: Vec<(PyObject, u32)> =
+                    matches.map(|m| (state.value(py, &m), m.edits)).collect();
+                self.convert(py, keywords, profile, started)
+            }
+            (true, false) => {
+                let keywords: Vec<(PyObject, Option<&str>)> =
+                    matches.map(|m| (state.value(py, &m), m.label)).collect();
+                self.convert(py, keywords, profile, started)
+            }
+            (true, true) => {
+                let keywords: Vec<(PyObject, Option<&str>, u32)> = matches
+                    .map(|m| (state.value(py, &m), m.label, m.edits))
+                    .collect();
+                self.convert(py, keywords, profile, started)
+            }
+        })
     }
 
-    #[pyo3(signature = (text, strategy="all"))]
+    #[pyo3(signature = (text, strategy=String::from("all"), max_edits=0, labels=None, label_info=false))]
     fn extract_keywords_with_span(
         &self,
+        py: Python<'_>,
         text: String,
-        strategy: &str,
-    ) -> Vec<(String, usize, usize)> {
-        let strategy = shared::ExtractorStrategy::from_str(strategy).unwrap();
-        let inner = &self.processor;
-        // Extract keywords with span
-        if text.is_ascii() {
-            inner.extract_keywords_with_span(text, strategy).collect()
+        strategy: String,
+        max_edits: u32,
+        labels: Option<Vec<String>>,
+        label_info: bool,
+    ) -> PyResult<PyObject> {
+        let strategy = parse_strategy(&strategy)?;
+        let state = self.read(py);
+        let boundaries = char_boundaries(&text);
+        let mut extractor = self.extractor(&state.processor, &text, strategy, max_edits, labels);
+        let mut matches: Vec<shared::Match> = extractor.by_ref().collect();
+        let started = self.profiling().then(Instant::now);
+        for m in matches.iter_mut() {
+            to_char_offsets(&boundaries, m);
+        }
+        let profile = extractor.profile();
+        let matches = matches.into_iter();
+        Ok(match (label_info, max_edits > 0) {
+            (false, false) => {
+                let matches: Vec<(PyObject, usize, usize)> = matches
+                    .map(|m| (state.value(py, &m), m.start, m.end))
+                    .collect();
+                self.convert(py, matches, profile, started)
+            }
+            (false, true) => {
+                let matches: Vec<(PyObject, usize, usize, u32)> = matches
+                    .map(|m| (state.value(py, &m), m.start, m.end, m.edits))
+                    .collect();
+                self.convert(py, matches, profile, started)
+            }
+            (true, false) => {
+                let matches: Vec<(PyObject, Option<&str>, usize, usize)> = matches
+                    .map(|m| (state.value(py, &m), m.label, m.start, m.end))
+                    .collect();
+                self.convert(py, matches, profile, started)
+            }
+            (true, true) => {
+                let matches: Vec<(PyObject, Option<&str>, usize, usize, u32)> = matches
+                    .map(|m| (state.value(py, &m), m.label, m.start, m.end, m.edits))
+                    .collect();
+                self.convert(py, matches, profile, started)
+            }
+        })
+    }
+
+    #[pyo3(signature = (text, context, context_unit=String::from("tokens"), merge=false, span_info=false, strategy=String::from("all"), max_edits=0, labels=None, label_info=false))]
+    fn extract_keywords_with_context(
+        &self,
+        py: Python<'_>,
+        text: PyBackedStr,
+        context: usize,
+        context_unit: String,
+        merge: bool,
+        span_info: bool,
+        strategy: String,
+        max_edits: u32,
+        labels: Option<Vec<String>>,
+        label_info: bool,
+    ) -> PyResult<PyObject> {
+        let by_tokens = match context_unit.as_str() {
+            "tokens" => true,
+            "chars" => false,
+            _ => {
+                return Err(PyValueError::new_err(format!(
+                    "invalid context_unit: {:?}, must be one of 'tokens', 'chars'",
+                    context_unit
+                )))
+            }
+        };
+        let strategy = parse_strategy(&strategy)?;
+        let state = self.read(py);
+        let boundaries = char_boundaries(&text);
+        let mut extractor = self.extractor(&state.processor, &text, strategy, max_edits, labels);
+        let matches: Vec<shared::Match> = extractor.by_ref().collect();
+        let started = self.profiling().then(Instant::now);
+        // byte offsets of the window around every match
+        let windows: Vec<(usize, usize)> = matches
+            .iter()
+            .map(|m| match by_tokens {
+                true => extractor.token_context(m, context),
+                false => char_context(&text, m, context),
+            })
+            .collect();
+        // the items `extract_keywords` returns for a match, in its order
+        let items = |m: &shared::Match| {
+            let mut items = vec![state.value(py, m)];
+            if label_info {
+                items.push(m.label.into_py(py));
+            }
+            if span_info {
+                items.push(to_char_offset(&boundaries, m.start).into_py(py));
+                items.push(to_char_offset(&boundaries, m.end).into_py(py));
+            }
+            if max_edits > 0 {
+                items.push(m.edits.into_py(py));
+            }
+            items
+        };
+        let mut results: Vec<PyObject> = Vec::with_capacity(matches.len());
+        if !merge {
+            for (m, &(start, end)) in matches.iter().zip(windows.iter()) {
+                let mut items = items(m);
+                items.push(text[start..m.start].into_py(py));
+                items.push(text[m.end..end].into_py(py));
+                results.push(PyTuple::new(py, items)?.into_any().unbind());
+            }
         } else {
-            let mut vec = vec![];
-            let char_indices: Vec<_> = text.char_indices().collect();
-            // Extract keywords with span
-            for (clean_name, word_start, word_end) in
-                inner.extract_keywords_with_span(text, strategy)
-            {
-                // Convert byte offset to char offset for start position
-                let start_char_idx = char_indices
-                    .iter()
-                    .position(|(byte_idx, _)| *byte_idx == word_start)
-                    .unwrap_or(0);
-                // Convert byte offset to char offset for end position
-                let end_char_idx = char_indices
-                    .iter()
-                    .position(|(byte_idx, _)| *byte_idx == word_end)
-                    .unwrap_or_else(|| char_indices.len());
-                vec.push((clean_name.to_string(), start_char_idx, end_char_idx));
+            let to_snippet = |(start, end, found): (usize, usize, Vec<PyObject>)| {
+                (
+                    &text[start..end],
+                    to_char_offset(&boundaries, start),
+                    to_char_offset(&boundaries, end),
+                    found,
+                )
+                    .into_py(py)
+            };
+            // (start, end, matches) of the snippet being merged
+            let mut snippet: Option<(usize, usize, Vec<PyObject>)> = None;
+            let mut order: Vec<usize> = (0..matches.len()).collect();
+            order.sort_by_key(|&i| windows[i].0);
+            for i in order {
+                let (start, end) = windows[i];
+                let mut items = items(&matches[i]);
+                let found = match items.len() {
+                    1 => items.pop().unwrap(),
+                    _ => PyTuple::new(py, items)?.into_any().unbind(),
+                };
+                match snippet.as_mut() {
+                    Some((_, snippet_end, snippet_matches)) if start < *snippet_end => {
+                        *snippet_end = end.max(*snippet_end);
+                        snippet_matches.push(found);
+                    }
+                    _ => {
+                        let done = snippet.replace((start, end, vec![found]));
+                        results.extend(done.map(&to_snippet));
+                    }
+                }
+            }
+            results.extend(snippet.map(&to_snippet));
+        }
+        Ok(self.convert(py, results, extractor.profile(), started))
+    }
+
+    #[pyo3(signature = (text, strategy=String::from("all"), max_edits=0, labels=None))]
+    fn extract_match_list(
+        &self,
+        py: Python<'_>,
+        text: PyBackedStr,
+        strategy: String,
+        max_edits: u32,
+        labels: Option<Vec<String>>,
+    ) -> PyResult<PyMatchList> {
+        let strategy = parse_strategy(&strategy)?;
+        let state = self.read(py);
+        let boundaries = char_boundaries(&text);
+        let mut extractor = self.extractor(&state.processor, &text, strategy, max_edits, labels);
+        let matches: Vec<shared::Match> = extractor.by_ref().collect();
+        let started = self.profiling().then(Instant::now);
+        // one entry in `keywords` and `labels` per distinct value, the
+        // records only hold their indices
+        let mut keywords: Vec<PyObject> = vec![];
+        let mut keyword_ids: FxHashMap<(Option<u64>, &str), u32> = FxHashMap::default();
+        let mut match_labels: Vec<Option<String>> = vec![];
+        let mut label_ids: FxHashMap<Option<&str>, u32> = FxHashMap::default();
+        let mut records = Vec::with_capacity(matches.len());
+        for mut m in matches {
+            let keyword = *keyword_ids.entry((m.id, m.clean_name)).or_insert_with(|| {
+                keywords.push(state.value(py, &m));
+                keywords.len() as u32 - 1
+            });
+            let label = *label_ids.entry(m.label).or_insert_with(|| {
+                match_labels.push(m.label.map(String::from));
+                match_labels.len() as u32 - 1
+            });
+            to_char_offsets(&boundaries, &mut m);
+            records.push(MatchRecord {
+                keyword,
+                label,
+                start: m.start,
+                end: m.end,
+                edits: m.edits,
+            });
+        }
+        self.record_profile(extractor.profile(), started);
+        Ok(PyMatchList {
+            text,
+            boundaries,
+            keywords,
+            labels: match_labels,
+            records,
+        })
+    }
+
+    #[pyo3(signature = (texts, strategy=String::from("all"), labels=None))]
+    fn extract_spans_flat<'py>(
+        &self,
+        py: Python<'py>,
+        texts: Vec<String>,
+        strategy: String,
+        labels: Option<Vec<String>>,
+    ) -> PyResult<(
+        Bound<'py, PyAny>,
+        Bound<'py, PyAny>,
+        Bound<'py, PyAny>,
+        Bound<'py, PyAny>,
+        Vec<PyObject>,
+    )> {
+        let strategy = parse_strategy(&strategy)?;
+        let state = self.read(py);
+        let processor = &state.processor;
+        // the counters of all documents, recorded once the columns are
+        // converted, which is the only conversion to Python here
+        let (matches, profile) = py.allow_threads(|| {
+            let mut matches: Vec<(u32, shared::Match)> = vec![];
+            let mut profile = self.profiling().then(shared::ExtractorProfile::default);
+            for (doc, text) in texts.into_iter().enumerate() {
+                let boundaries = char_boundaries(&text);
+                let mut extractor = self.extractor(processor, &text, strategy, 0, labels.clone());
+                matches.extend(extractor.by_ref().map(|mut m| {
+                    to_char_offsets(&boundaries, &mut m);
+                    (doc as u32, m)
+                }));
+                if let (Some(total), Some(found)) = (profile.as_mut(), extractor.profile()) {
+                    total.merge(found);
+                }
             }
-            vec
+            (matches, profile)
+        });
+        let started = profile.is_some().then(Instant::now);
+        // one entry in `keywords` per distinct clean name or payload, the
+        // columns are native-endian bytes for `array.array`
+        let mut keywords: Vec<PyObject> = vec![];
+        let mut keyword_ids: FxHashMap<(Option<u64>, &str), u32> = FxHashMap::default();
+        let mut doc_idx = Vec::with_capacity(matches.len() * 4);
+        let mut keyword_id = Vec::with_capacity(matches.len() * 4);
+        let mut start = Vec::with_capacity(matches.len() * 8);
+        let mut end = Vec::with_capacity(matches.len() * 8);
+        for (doc, m) in matches.iter() {
+            let id = *keyword_ids.entry((m.id, m.clean_name)).or_insert_with(|| {
+                keywords.push(state.value(py, m));
+                keywords.len() as u32 - 1
+            });
+            doc_idx.extend_from_slice(&doc.to_ne_bytes());
+            keyword_id.extend_from_slice(&id.to_ne_bytes());
+            start.extend_from_slice(&(m.start as u64).to_ne_bytes());
+            end.extend_from_slice(&(m.end as u64).to_ne_bytes());
         }
+        drop(state);
+        let array = py.import("array")?.getattr("array")?;
+        let columns = (
+            array.call1(("I", PyBytes::new(py, &doc_idx)))?,
+            array.call1(("I", PyBytes::new(py, &keyword_id)))?,
+            array.call1(("Q", PyBytes::new(py, &start)))?,
+            array.call1(("Q", PyBytes::new(py, &end)))?,
+        );
+        self.record_profile(profile.as_ref(), started);
+        Ok((columns.0, columns.1, columns.2, columns.3, keywords))
+    }
+
+    #[pyo3(signature = (text, labels=None))]
+    fn contains_any(
+        &self,
+        py: Python<'_>,
+        text: PyBackedStr,
+        labels: Option<Vec<String>>,
+    ) -> Option<PyObject> {
+        let state = self.read(py);
+        let found = state.processor.find_first(&text, &labels);
+        found.map(|found| state.value(py, &found))
+    }
+
+    #[pyo3(signature = (texts, labels=None, n_threads=0))]
+    fn filter_batch(
+        &self,
+        py: Python<'_>,
+        texts: Vec<String>,
+        labels: Option<Vec<String>>,
+        n_threads: usize,
+    ) -> Vec<bool> {
+        let state = self.read(py);
+        let processor = &state.processor;
+        py.allow_threads(|| processor.contains_any_batch(&texts, &labels, n_threads))
+    }
+
+    #[pyo3(signature = (enabled=true))]
+    fn enable_profiling(&self, enabled: bool) {
+        // (re-)enabling always starts from zeroed counters
+        let mut profile = self.lock_profile();
+        *profile = enabled.then(shared::ExtractorProfile::default);
+        self.profiling.store(enabled, Ordering::Relaxed);
+    }
+
+    fn profile_report<'py>(&self, py: Python<'py>) -> PyResult<Option<Bound<'py, PyDict>>> {
+        let Some(profile) = self.lock_profile().clone() else {
+            return Ok(None);
+        };
+        let dict = PyDict::new(py);
+        dict.set_item("calls", profile.calls)?;
+        dict.set_item("tokens_scanned", profile.tokens_scanned)?;
+        dict.set_item("prefiltered", profile.prefiltered)?;
+        dict.set_item("trie_probes", profile.trie_probes)?;
+        dict.set_item("edge_transitions", profile.edge_transitions)?;
+        dict.set_item("abandoned_at_depth", profile.abandoned_at_depth)?;
+        dict.set_item("matches_emitted", profile.matches_emitted)?;
+        dict.set_item("segmentation_ns", profile.segmentation_ns)?;
+        dict.set_item("scanning_ns", profile.scanning_ns)?;
+        dict.set_item("conversion_ns", profile.conversion_ns)?;
+        Ok(Some(dict))
+    }
+
+    #[pyo3(signature = (prefix, limit=10))]
+    fn complete(&self, py: Python<'_>, prefix: PyBackedStr, limit: usize) -> Vec<(String, String)> {
+        self.read(py)
+            .processor
+            .complete(&prefix, limit)
+            .into_iter()
+            .map(|completion| (completion.keyword.clone(), completion.clean_name.clone()))
+            .collect()
     }
 
-    fn get_all_keywords_with_clean_names(&self) -> Vec<(String, &str)> {
-        self.processor.get_all_keywords_with_clean_names().collect()
+    fn get_all_keywords_with_clean_names(&self, py: Python<'_>) -> Vec<(String, String)> {
+        self.read(py)
+            .processor
+            .get_all_keywords_with_clean_names()
+            .map(|(keyword, clean_name)| (keyword, clean_name.to_string()))
+            .collect()
+    }
+
+    #[pyo3(signature = (text, repl=None))]
+    fn replace_keywords(
+        &self,
+        py: Python<'_>,
+        text: PyBackedStr,
+        repl: Option<&Bound<'_, PyAny>>,
+    ) -> PyResult<String> {
+        let text = &*text;
+        let repl = match repl {
+            Some(repl) => repl,
+            None => return Ok(self.read(py).processor.replace_keywords(text)),
+        };
+        if repl.is_instance_of::<PyString>() {
+            let template: String = repl.extract()?;
+            let parsed = template::Template::from_str(&template).map_err(|_| {
+                PyValueError::new_err(format!(
+                    "invalid template: {:?}, the fields are {{clean}}, {{match}} and {{label}}",
+                    template
+                ))
+            })?;
+            return self
+                .read(py)
+                .processor
+                .replace_keywords_with(text, |m, string| {
+                    parsed.render(m, text, string);
+                    Ok(())
+                });
+        }
+        if !repl.is_callable() {
+            return Err(PyTypeError::new_err(
+                "repl must be a template string or a callable",
+            ));
+        }
+        // `repl` may change this processor, so it is only called once the
+        // matches are known and the lock is released; the output is then
+        // written once, straight from `text`
+        let mut clean_names: Vec<String> = vec![];
+        let mut spans: Vec<(usize, usize, usize)> = vec![]; // (start, end, index into `clean_names`)
+        let state = self.read(py);
+        let mut seen: FxHashMap<&str, usize> = FxHashMap::default();
+        for m in state.processor.replaced_matches(text) {
+            let name = *seen.entry(m.clean_name).or_insert_with(|| {
+                clean_names.push(m.clean_name.to_string());
+                clean_names.len() - 1
+            });
+            spans.push((m.start, m.end, name));
+        }
+        drop(seen);
+        drop(state);
+        // one call per distinct clean name
+        let replacements = clean_names
+            .iter()
+            .map(|clean_name| repl.call1((clean_name.as_str(),))?.extract())
+            .collect::<PyResult<Vec<String>>>()?;
+        let mut string = String::with_capacity(text.len());
+        let mut prev_end = 0;
+        for (start, end, name) in spans {
+            string += &text[prev_end..start];
+            string += &replacements[name];
+            prev_end = end;
+        }
+        string += &text[prev_end..];
+        Ok(string)
     }
 
-    fn replace_keywords(&self, text: String) -> String {
-        self.processor.replace_keywords(text)
+    fn is_empty(&self, py: Python<'_>) -> bool {
+        self.read(py).processor.is_empty()
     }
+}
 
-    fn is_empty(&self) -> bool {
-        self.processor.is_empty()
+impl PyKeywordProcessor {
+    /// Shared access to the keywords, waiting for a writer with the GIL released.
+    /// Changes are checked before they start, so a panic in one (a bug) leaves
+    /// the keywords as they were and a poisoned lock is used as it is.
+    fn read(&self, py: Python<'_>) -> RwLockReadGuard<'_, State> {
+        loop {
+            match self.state.try_read() {
+                Ok(state) => return state,
+                Err(TryLockError::WouldBlock) => py.allow_threads(|| drop(self.state.read())),
+                Err(TryLockError::Poisoned(poisoned)) => return poisoned.into_inner(),
+            }
+        }
     }
+
+    /// Exclusive access to the keywords, waiting for the others with the GIL
+    /// released. A poisoned lock is used as it is, see `read`.
+    fn write(&self, py: Python<'_>) -> RwLockWriteGuard<'_, State> {
+        loop {
+            match self.state.try_write() {
+                Ok(state) => return state,
+                Err(TryLockError::WouldBlock) => py.allow_threads(|| drop(self.state.write())),
+                Err(TryLockError::Poisoned(poisoned)) => return poisoned.into_inner(),
+            }
+        }
+    }
+
+    fn profiling(&self) -> bool {
+        self.profiling.load(Ordering::Relaxed)
+    }
+
+    /// The running profile. The counters are plain numbers that a panic
+    /// cannot leave half-updated, so a poisoned lock is used as it is.
+    fn lock_profile(&self) -> MutexGuard<'_, Option<shared::ExtractorProfile>> {
+        self.profile.lock().unwrap_or_else(PoisonError::into_inner)
+    }
+
+    fn extractor<'p>(
+        &self,
+        processor: &'p shared::KeywordProcessor,
+        text: &str,
+        strategy: shared::ExtractorStrategy,
+        max_edits: u32,
+        labels: Option<Vec<String>>,
+    ) -> shared::Matches<'p> {
+        processor
+            .extract_keywords_with_options(
+                text,
+                shared::ExtractorOptions {
+                    strategy,
+                    max_edits,
+                    profile: self.profiling(),
+                    labels,
+                },
+            )
+            .into_matches()
+    }
+
+    /// Converts an extraction result to Python, see `record_profile`.
+    fn convert<T: IntoPy<PyObject>>(
+        &self,
+        py: Python<'_>,
+        output: T,
+        profile: Option<&shared::ExtractorProfile>,
+        conversion_started: Option<Instant>,
+    ) -> PyObject {
+        let output = output.into_py(py);
+        self.record_profile(profile, conversion_started);
+        output
+    }
+
+    /// Adds the counters of a finished extraction to the running profile,
+    /// charging the time since `conversion_started` to Python conversion.
+    fn record_profile(
+        &self,
+        profile: Option<&shared::ExtractorProfile>,
+        conversion_started: Option<Instant>,
+    ) {
+        if let (Some(profile), Some(conversion_started)) = (profile, conversion_started) {
+            if let Some(total) = self.lock_profile().as_mut() {
+                total.merge(profile);
+                total.conversion_ns += conversion_started.elapsed().as_nanos() as u64;
+            }
+        }
+    }
+}
+
+impl State {
+    fn store_payload(&mut self, payload: PyObject) -> PyResult<u64> {
+        match self.free_payloads.pop() {
+            Some(id) => {
+                self.payloads[(id - self.first_payload_id) as usize] = Some(payload);
+                Ok(id)
+            }
+            None => {
+                let id = self
+                    .first_payload_id
+                    .checked_add(self.payloads.len() as u64)
+                    .ok_or_else(|| PyValueError::new_err("no payload ids left"))?;
+                self.payloads.push(Some(payload));
+                Ok(id)
+            }
+        }
+    }
+
+    fn payload_slot(&self, id: u64) -> Option<usize> {
+        usize::try_from(id.checked_sub(self.first_payload_id)?).ok()
+    }
+
+    /// Frees the slot of `id` and returns its payload, to be dropped once the
+    /// lock is released.
+    fn release_payload(&mut self, id: Option<u64>) -> Option<PyObject> {
+        let id = id?;
+        let slot = self.payload_slot(id)?;
+        let payload = self.payloads.get_mut(slot)?.take();
+        if payload.is_some() {
+            self.free_payloads.push(id);
+        }
+        payload
+    }
+
+    /// The payload of a match, or its clean name if it has none.
+    fn value(&self, py: Python<'_>, found: &shared::Match) -> PyObject {
+        match found
+            .id
+            .and_then(|id| self.payload_slot(id))
+            .and_then(|slot| self.payloads.get(slot))
+        {
+            Some(Some(payload)) => payload.clone_ref(py),
+            _ => found.clean_name.into_py(py),
+        }
+    }
+}
+
+/// A match as stored by `PyMatchList`, character offsets and indices into
+/// its `keywords` and `labels`.
+#[derive(Debug, Clone, Copy)]
+struct MatchRecord {
+    keyword: u32,
+    label: u32,
+    start: usize,
+    end: usize,
+    edits: u32,
+}
+
+/// The matches of one extraction, kept as records until a `Match` object is
+/// asked for.
+#[pyclass(name = "MatchList", frozen, sequence)]
+#[derive(Debug)]
+struct PyMatchList {
+    text: PyBackedStr,       // the string passed in, sliced as matches are asked for
+    boundaries: Vec<usize>,  // `char_boundaries` of `text`
+    keywords: Vec<PyObject>, // clean names or payloads
+    labels: Vec<Option<String>>,
+    records: Vec<MatchRecord>,
+}
+
+#[pymethods]
+impl PyMatchList {
+    fn __len__(&self) -> usize {
+        self.records.len()
+    }
+
+    fn __getitem__(&self, py: Python<'_>, index: &Bound<'_, PyAny>) -> PyResult<PyObject> {
+        if let Ok(slice) = index.downcast::<PySlice>() {
+            let indices = slice.indices(self.records.len() as isize)?;
+            let matches = (0..indices.slicelength)
+                .map(|i| indices.start + i as isize * indices.step)
+                .map(|i| self.get(py, i as usize))
+                .collect::<Vec<PyMatch>>();
+            return Ok(matches.into_py(py));
+        }
+        let index: isize = index.extract()?;
+        let len = self.records.len() as isize;
+        let index = if index < 0 { index + len } else { index };
+        if !(0..len).contains(&index) {
+            return Err(PyIndexError::new_err("match index out of range"));
+        }
+        Ok(self.get(py, index as usize).into_py(py))
+    }
+
+    fn __iter__(slf: Py<Self>) -> PyMatchListIterator {
+        PyMatchListIterator {
+            matches: slf,
+            index: AtomicUsize::new(0),
+        }
+    }
+
+    fn __repr__(&self) -> String {
+        format!("<MatchList of {} matches>", self.records.len())
+    }
+
+    fn __traverse__(&self, visit: PyVisit<'_>) -> Result<(), PyTraverseError> {
+        for keyword in self.keywords.iter() {
+            visit.call(keyword)?;
+        }
+        Ok(())
+    }
+}
+
+impl PyMatchList {
+    /// The `Match` of the record at `index`, which must be in range.
+    fn get(&self, py: Python<'_>, index: usize) -> PyMatch {
+        let record = self.records[index];
+        let byte_offset = |offset: usize| match self.boundaries.is_empty() {
+            true => offset,
+            false => *self.boundaries.get(offset).unwrap_or(&self.text.len()),
+        };
+        PyMatch {
+            clean_name: self.keywords[record.keyword as usize].clone_ref(py),
+            label: self.labels[record.label as usize].clone(),
+            start: record.start,
+            end: record.end,
+            text: self.text[byte_offset(record.start)..byte_offset(record.end)].to_string(),
+            edits: record.edits,
+        }
+    }
+}
+
+#[pyclass(name = "MatchListIterator", frozen)]
+struct PyMatchListIterator {
+    matches: Py<PyMatchList>,
+    index: AtomicUsize,
+}
+
+#[pymethods]
+impl PyMatchListIterator {
+    fn __iter__(slf: Py<Self>) -> Py<Self> {
+        slf
+    }
+
+    fn __next__(&self, py: Python<'_>) -> Option<PyMatch> {
+        let matches = self.matches.get();
+        let index = self.index.fetch_add(1, Ordering::Relaxed);
+        if index >= matches.records.len() {
+            return None;
+        }
+        Some(matches.get(py, index))
+    }
+
+    fn __traverse__(&self, visit: PyVisit<'_>) -> Result<(), PyTraverseError> {
+        visit.call(&self.matches)
+    }
+}
+
+/// A keyword match, created by `MatchList` when it is accessed.
+#[pyclass(name = "Match", frozen)]
+#[derive(Debug)]
+struct PyMatch {
+    #[pyo3(get)]
+    clean_name: PyObject, // or the payload of the keyword
+    #[pyo3(get)]
+    label: Option<String>,
+    #[pyo3(get)]
+    start: usize,
+    #[pyo3(get)]
+    end: usize,
+    #[pyo3(get)]
+    text: String, // the matched text
+    #[pyo3(get)]
+    edits: u32,
+}
+
+#[pymethods]
+impl PyMatch {
+    #[getter]
+    fn span(&self) -> (usize, usize) {
+        (self.start, self.end)
+    }
+
+    fn __repr__(&self, py: Python<'_>) -> PyResult<String> {
+        Ok(format!(
+            "<Match clean_name={} start={} end={} text={}>",
+            self.clean_name.bind(py).repr()?,
+            self.start,
+            self.end,
+            PyString::new(py, &self.text).repr()?
+        ))
+    }
+
+    fn __traverse__(&self, visit: PyVisit<'_>) -> Result<(), PyTraverseError> {
+        visit.call(&self.clean_name)
+    }
+}
+
+fn parse_strategy(strategy: &str) -> PyResult<shared::ExtractorStrategy> {
+    shared::ExtractorStrategy::from_str(strategy).map_err(|_| {
+        PyValueError::new_err(format!(
+            "invalid strategy: {:?}, must be one of 'all', 'longest', 'leftmost_first', \
+             'shortest', 'non_overlapping_all', 'max_weight'",
+            strategy
+        ))
+    })
+}
+
+/// Byte offsets of the characters of `text`, empty if `text` is ASCII and
+/// byte offsets already are character offsets.
+fn char_boundaries(text: &str) -> Vec<usize> {
+    if text.is_ascii() {
+        vec![]
+    } else {
+        text.char_indices().map(|(byte_idx, _)| byte_idx).collect()
+    }
+}
+
+/// Converts the byte offsets of `m` to character offsets, `boundaries` being
+/// the `char_boundaries` of its text.
+fn to_char_offsets(boundaries: &[usize], m: &mut shared::Match) {
+    m.start = to_char_offset(boundaries, m.start);
+    m.end = to_char_offset(boundaries, m.end);
+}
+
+/// Converts a byte offset at a character boundary, or the end of the text, to
+/// a character offset.
+fn to_char_offset(boundaries: &[usize], offset: usize) -> usize {
+    if boundaries.is_empty() {
+        return offset;
+    }
+    boundaries
+        .binary_search(&offset)
+        .unwrap_or(boundaries.len())
+}
+
+/// Byte offsets of the start of the `n`th character before `m` and of the end
+/// of the `n`th character after it.
+fn char_context(text: &str, m: &shared::Match, n: usize) -> (usize, usize) {
+    let start = text[..m.start]
+        .char_indices()
+        .rev()
+        .take(n)
+        .last()
+        .map_or(m.start, |(i, _)| i);
+    let end = text[m.end..]
+        .char_indices()
+        .nth(n)
+        .map_or(text.len(), |(i, _)| m.end + i);
+    (start, end)
 }
 
-#[pymodule]
+// safe without the GIL: `PyKeywordProcessor` locks its keywords and the
+// legacy class relies on the borrow checking of its pyclass
+#[pymodule(gil_used = false)]
 fn librush(m: &Bound<'_, PyModule>) -> PyResult<()> {
     m.add_class::<PyKeywordProcessor>()?;
+    m.add_class::<PyMatchList>()?;
+    m.add_class::<PyMatch>()?;
     register_submodule(m)?;
     Ok(())
 }
 
 fn register_submodule(m: &Bound<'_, PyModule>) -> PyResult<()> {
-    let v1 = PyModule::new_bound(m.py(), "v0_0_2")?;
+    let v1 = PyModule::new(m.py(), "v0_0_2")?;
+    v1.gil_used(false)?;
     v1.add_class::<lib_v0_0_2::PyKeywordProcessor>()?;
     m.add_submodule(&v1)?;
     Ok(())
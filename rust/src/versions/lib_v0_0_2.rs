@@ -1,5 +1,7 @@
 use pyo3::exceptions::PyValueError;
 use pyo3::prelude::*;
+use pyo3::pybacked::PyBackedStr;
+use std::sync::OnceLock;
 
 #[path = "."]
 pub mod case_insensitive {
@@ -7,39 +9,39 @@ pub mod case_insensitive {
     use unicase::UniCase;
 
     #[derive(Debug, Default, PartialEq)]
-    struct UnicaseHashMap<'a, V> {
-        inner: std::collections::HashMap<UniCase<&'a str>, V, fxhash::FxBuildHasher>,
+    struct UnicaseHashMap<V> {
+        inner: std::collections::HashMap<UniCase<String>, V, fxhash::FxBuildHasher>,
     }
 
-    impl<'a, V> UnicaseHashMap<'a, V> {
-        pub fn entry(&mut self, k: &'a str) -> Entry<UniCase<&'a str>, V> {
+    impl<V> UnicaseHashMap<V> {
+        pub fn entry(&mut self, k: String) -> Entry<UniCase<String>, V> {
             // TODO: make sure its not doing the ASCII check
             // TODO: benchmark `into() vs Unicase::unicode()`
             self.inner.entry(UniCase::unicode(k))
         }
 
-        pub fn get(&self, k: &'a str) -> Option<&V> {
-            self.inner.get(&UniCase::unicode(k))
+        pub fn get(&self, k: &str) -> Option<&V> {
+            self.inner.get(&UniCase::unicode(k.to_string()))
         }
     }
 
-    type HashMap<'a, Node> = UnicaseHashMap<'a, Node>;
+    type HashMap<Node> = UnicaseHashMap<Node>;
     mod shared;
     pub use shared::KeywordProcessor;
 }
 
 #[path = "."]
 pub mod case_sensitive {
-    type HashMap<'a, Node> = std::collections::HashMap<&'a str, Node, fxhash::FxBuildHasher>;
+    type HashMap<Node> = std::collections::HashMap<String, Node, fxhash::FxBuildHasher>;
     mod shared;
     pub use shared::is_valid_keyword;
     pub use shared::KeywordProcessor;
 }
 
 #[derive(Debug, PartialEq)]
-enum KeywordProcessor<'a> {
-    CaseSensitive(case_sensitive::KeywordProcessor<'a>),
-    CaseInsensitive(case_insensitive::KeywordProcessor<'a>),
+enum KeywordProcessor {
+    CaseSensitive(case_sensitive::KeywordProcessor),
+    CaseInsensitive(case_insensitive::KeywordProcessor),
 }
 
 macro_rules! duplicate_body {
@@ -58,6 +60,7 @@ pub struct PyKeywordProcessor {
     words: Vec<String>,
     clean_names: Vec<String>,
     case_sensitive: bool,
+    processor: OnceLock<KeywordProcessor>, // built from `words` by the first extraction, dropped when they change
 }
 
 #[pymethods]
@@ -69,6 +72,7 @@ impl PyKeywordProcessor {
             words: Vec::new(),
             clean_names: Vec::new(),
             case_sensitive,
+            processor: OnceLock::new(),
         }
     }
 
@@ -93,6 +97,7 @@ impl PyKeywordProcessor {
                 word
             )));
         }
+        self.processor.take();
         self.words.push(word.clone());
         self.clean_names.push(clean_name.unwrap_or(word));
         Ok(())
@@ -101,7 +106,7 @@ impl PyKeywordProcessor {
     fn add_keywords_from_iter<'py>(&mut self, words: Bound<'py, PyAny>) -> PyResult<usize> {
         let mut successfull = 0;
         let mut failed_words: Vec<String> = Vec::new();
-        for word in words.iter().unwrap() {
+        for word in words.try_iter().unwrap() {
             let word: String = word.unwrap().extract::<String>().unwrap();
             let res: Result<(), PyErr> = self.add_keyword(word.clone(), None);
             if res.is_ok() {
@@ -126,7 +131,7 @@ impl PyKeywordProcessor {
     ) -> PyResult<()> {
         let mut successfull = 0;
         let mut failed_words: Vec<String> = Vec::new();
-        for word_pair in words.iter().unwrap() {
+        for word_pair in words.try_iter().unwrap() {
             let (word, clean_name) = word_pair.unwrap().extract::<(String, String)>().unwrap();
             // self.add_keyword(word, Some(clean_name));
             let cloned_word = word.clone();
@@ -147,59 +152,39 @@ impl PyKeywordProcessor {
         }
     }
 
-    fn extract_keywords(&self, text: &str) -> Vec<String> {
-        let mut processor = if self.case_sensitive {
-            KeywordProcessor::CaseSensitive(case_sensitive::KeywordProcessor::new())
-        } else {
-            KeywordProcessor::CaseInsensitive(case_insensitive::KeywordProcessor::new())
-        };
-        // Add keywords to the processor
-        for (word, clean_name) in self.words.iter().zip(self.clean_names.iter()) {
-            duplicate_body!(&mut processor, inner, {
-                inner.add_keyword_with_clean_name(word, clean_name);
-            });
-        }
+    fn extract_keywords(&self, text: PyBackedStr) -> Vec<String> {
+        let processor = self.processor();
         // Extract keywords
-        duplicate_body!(&processor, inner, {
-            inner.extract_keywords(text).map(String::from).collect()
+        duplicate_body!(processor, inner, {
+            inner.extract_keywords(&text).map(String::from).collect()
         })
     }
 
     fn extract_keywords_from_list<'py>(&self, texts: Bound<'py, PyAny>) -> Vec<Vec<String>> {
         texts
-            .iter()
+            .try_iter()
             .unwrap()
             .map(|py_obj| {
-                let text = py_obj.unwrap().extract::<String>().unwrap();
-                self.extract_keywords(&text)
+                let text = py_obj.unwrap().extract::<PyBackedStr>().unwrap();
+                self.extract_keywords(text)
             })
             .collect()
     }
 
-    fn extract_keywords_with_span(&self, text: &str) -> Vec<(String, usize, usize)> {
-        let mut processor = if self.case_sensitive {
-            KeywordProcessor::CaseSensitive(case_sensitive::KeywordProcessor::new())
-        } else {
-            KeywordProcessor::CaseInsensitive(case_insensitive::KeywordProcessor::new())
-        };
-        // Add keywords to the processor
-        for (word, clean_name) in self.words.iter().zip(self.clean_names.iter()) {
-            duplicate_body!(&mut processor, inner, {
-                inner.add_keyword_with_clean_name(word, clean_name);
-            });
-        }
+    fn extract_keywords_with_span(&self, text: PyBackedStr) -> Vec<(String, usize, usize)> {
+        let processor = self.processor();
         // Extract keywords with span
-        duplicate_body!(&processor, inner, {
+        duplicate_body!(processor, inner, {
             if text.is_ascii() {
                 inner
-                    .extract_keywords_with_span(text)
+                    .extract_keywords_with_span(&text)
                     .map(|(word, start, end)| (word.to_string(), start, end))
                     .collect()
             } else {
                 let mut vec = vec![];
                 let char_indices: Vec<_> = text.char_indices().collect();
                 // Extract keywords with span
-                for (clean_name, word_start, word_end) in inner.extract_keywords_with_span(text) {
+                for (clean_name, word_start, word_end) in inner.extract_keywords_with_span(&text) {
                     // Convert byte offset to char offset for start position
                     let start_char_idx = char_indices
                         .iter()
@@ -224,29 +209,39 @@ impl PyKeywordProcessor {
         texts: Bound<'py, PyAny>,
     ) -> Vec<Vec<(String, usize, usize)>> {
         texts
-            .iter()
+            .try_iter()
             .unwrap()
             .map(|py_obj| {
-                let text = py_obj.unwrap().extract::<String>().unwrap();
-                self.extract_keywords_with_span(&text)
+                let text = py_obj.unwrap().extract::<PyBackedStr>().unwrap();
+                self.extract_keywords_with_span(text)
             })
             .collect()
     }
 
-    fn replace_keywords(&self, text: &str) -> String {
-        let mut processor = if self.case_sensitive {
-            KeywordProcessor::CaseSensitive(case_sensitive::KeywordProcessor::new())
-        } else {
-            KeywordProcessor::CaseInsensitive(case_insensitive::KeywordProcessor::new())
-        };
-        // Add keywords to the processor
-        for (word, clean_name) in self.words.iter().zip(self.clean_names.iter()) {
-            duplicate_body!(&mut processor, inner, {
-                inner.add_keyword_with_clean_name(word, clean_name);
-            });
-        }
+    fn replace_keywords(&self, text: PyBackedStr) -> String {
+        let processor = self.processor();
         // Replace keywords
-        duplicate_body!(&processor, inner, { inner.replace_keywords(text) })
+        duplicate_body!(processor, inner, { inner.replace_keywords(&text) })
+    }
+}
+
+impl PyKeywordProcessor {
+    /// The trie of the current keywords, built on first use.
+    fn processor(&self) -> &KeywordProcessor {
+        self.processor.get_or_init(|| {
+            let mut processor = if self.case_sensitive {
+                KeywordProcessor::CaseSensitive(case_sensitive::KeywordProcessor::new())
+            } else {
+                KeywordProcessor::CaseInsensitive(case_insensitive::KeywordProcessor::new())
+            };
+            // Add keywords to the processor
+            for (word, clean_name) in self.words.iter().zip(self.clean_names.iter()) {
+                duplicate_body!(&mut processor, inner, {
+                    inner.add_keyword_with_clean_name(word, clean_name);
+                });
+            }
+            processor
+        })
     }
 }
 
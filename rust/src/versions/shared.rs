@@ -18,19 +18,19 @@ pub fn is_valid_keyword(word: &str) -> bool {
 }
 
 #[derive(Default, PartialEq, Debug)]
-struct Node<'a> {
-    clean_name: Option<&'a str>, // TODO: make this an enum that can hold a reference
-    children: super::HashMap<'a, Node<'a>>,
+struct Node {
+    clean_name: Option<String>, // owned, so that a built trie can be kept across calls
+    children: super::HashMap<Node>,
 }
 
 #[derive(Default, PartialEq, Debug)]
-pub struct KeywordProcessor<'a> {
-    trie: Node<'a>,
+pub struct KeywordProcessor {
+    trie: Node,
     len: usize, // the number of keywords the struct contains (not the number of nodes)
 }
 
 #[allow(dead_code)]
-impl<'a> KeywordProcessor<'a> {
+impl KeywordProcessor {
     pub fn new() -> Self {
         Self::default()
     }
@@ -44,15 +44,15 @@ impl<'a> KeywordProcessor<'a> {
     }
 
     #[inline]
-    pub fn add_keyword(&mut self, word: &'a str) {
+    pub fn add_keyword(&mut self, word: &str) {
         self.add_keyword_with_clean_name(word, word);
     }
 
     #[inline]
     pub fn add_keyword_with_clean_name(
         &mut self,
-        word: &'a str,
-        clean_name: &'a str, // make this call an `_impl...()` method that takes an option
+        word: &str,
+        clean_name: &str, // make this call an `_impl...()` method that takes an option
     ) {
         if !is_valid_keyword(word) {
             panic!("invalid keyword: {:?}", word);
@@ -61,7 +61,7 @@ impl<'a> KeywordProcessor<'a> {
         let mut trie = &mut self.trie;
 
         for token in word.split_word_bounds() {
-            trie = trie.children.entry(token).or_default();
+            trie = trie.children.entry(token.to_string()).or_default();
         }
 
         // increment `len` only if the keyword isn't already there
@@ -69,16 +69,16 @@ impl<'a> KeywordProcessor<'a> {
             self.len += 1;
         }
         // but even if there is already a keyword, the user can still overwrite its `clean_name`
-        trie.clean_name = Some(clean_name.as_ref());
+        trie.clean_name = Some(clean_name.to_string());
     }
 
-    pub fn add_keywords_from_iter(&mut self, iter: impl IntoIterator<Item = &'a str>) {
+    pub fn add_keywords_from_iter<'a>(&mut self, iter: impl IntoIterator<Item = &'a str>) {
         for word in iter {
             self.add_keyword(word.as_ref());
         }
     }
 
-    pub fn add_keywords_with_clean_name_from_iter<I>(&mut self, iter: I)
+    pub fn add_keywords_with_clean_name_from_iter<'a, I>(&mut self, iter: I)
     where
         I: IntoIterator<Item = (&'a str, &'a str)>,
     {
@@ -87,11 +87,11 @@ impl<'a> KeywordProcessor<'a> {
         }
     }
 
-    pub fn extract_keywords(&'a self, text: &'a str) -> impl Iterator<Item = &'a str> + 'a {
+    pub fn extract_keywords<'a>(&'a self, text: &'a str) -> impl Iterator<Item = &'a str> + 'a {
         KeywordExtractor::new(text, &self.trie).map(|(matched_text, _, _)| matched_text)
     }
 
-    pub fn extract_keywords_with_span(
+    pub fn extract_keywords_with_span<'a>(
         &'a self,
         text: &'a str,
     ) -> impl Iterator<Item = (&'a str, usize, usize)> + 'a {
@@ -115,7 +115,7 @@ impl<'a> KeywordProcessor<'a> {
 struct KeywordExtractor<'a> {
     idx: usize,
     tokens: Vec<(usize, &'a str)>,
-    trie: &'a Node<'a>,
+    trie: &'a Node,
     matches: Vec<(&'a str, usize, usize)>, // Store all matches found
 }
 
@@ -138,7 +138,7 @@ impl<'a> KeywordExtractor<'a> {
 
             if let Some(child) = node.children.get(token) {
                 node = child;
-                if let Some(clean_name) = node.clean_name {
+                if let Some(clean_name) = node.clean_name.as_deref() {
                     // Found a match, store it with the clean_name
                     let start_pos = self.tokens[start_idx].0;
                     let end_pos = token_start_idx + token.len();
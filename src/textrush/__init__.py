@@ -1,7 +1,9 @@
-from textrush.core import KeywordProcessor
+from textrush.core import KeywordProcessor, Match, MatchList
 from textrush.versions import versions
 
 __all__ = [
     "KeywordProcessor",
+    "Match",
+    "MatchList",
     "versions",
 ]
@@ -0,0 +1,408 @@
+"""Bulk keyword extraction and replacement from the command line.
+
+Documents are read from files or stdin, one per line, one per JSONL record
+or one per CSV row, processed on a pool of worker processes that each load
+the same dictionary, and written as one JSON object per line::
+
+    textrush -k keywords.txt --format jsonl --field body docs.jsonl
+    textrush -k keywords.txt --save-index keywords.idx
+    textrush -i keywords.idx --replace "<{clean}>" < docs.txt
+"""
+
+from __future__ import annotations
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import sys
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+from textrush.core import KeywordProcessor
+
+FORMATS = ["lines", "jsonl", "csv"]
+STRATEGIES = [
+    "all",
+    "longest",
+    "leftmost_first",
+    "shortest",
+    "non_overlapping_all",
+    "max_weight",
+]
+
+
+class InputError(ValueError):
+    """A document that cannot be read, reported with where it is."""
+
+
+def read_keywords(path: str) -> List[Tuple[str, str]]:
+    """``(keyword, clean_name)`` pairs from a keyword file.
+
+    A ``.json`` file maps clean names to lists of keywords, as in
+    ``add_keywords_from_dict``. Any other file has one keyword per line,
+    optionally followed by ``=>`` and its clean name; blank lines are
+    skipped.
+    """
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            mapping = json.load(f)
+            return [
+                (keyword, clean_name)
+                for clean_name, keywords in mapping.items()
+                for keyword in ([keywords] if isinstance(keywords, str) else keywords)
+            ]
+        pairs = []
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            keyword, _, clean_name = line.partition("=>")
+            keyword = keyword.strip()
+            pairs.append((keyword, clean_name.strip() or keyword))
+        return pairs
+
+
+def _select(record: Any, field: str) -> Any:
+    # `a.b` selects the field `b` of the object in the field `a`
+    for name in field.split("."):
+        if not isinstance(record, dict) or name not in record:
+            raise KeyError(field)
+        record = record[name]
+    return record
+
+
+def read_documents(
+    f: TextIO,
+    name: str,
+    format: str,
+    field: str = "text",
+    column: str = "text",
+) -> Iterator[str]:
+    """The documents of the open file ``f``, called ``name`` in errors."""
+    if format == "lines":
+        for line in f:
+            yield line.rstrip("\r\n")
+    elif format == "jsonl":
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                text = _select(json.loads(line), field)
+            except json.JSONDecodeError as e:
+                raise InputError(f"{name}:{number}: invalid JSON: {e}") from None
+            except KeyError:
+                raise InputError(f"{name}:{number}: no field {field!r}") from None
+            if not isinstance(text, str):
+                raise InputError(f"{name}:{number}: field {field!r} is not a string")
+            yield text
+    elif format == "csv":
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        if column not in header:
+            raise InputError(f"{name}: no column {column!r}")
+        index = header.index(column)
+        for row in reader:
+            if index >= len(row):
+                raise InputError(f"{name}:{reader.line_num}: no column {column!r}")
+            yield row[index]
+    else:
+        raise ValueError(f"invalid format: {format!r}")
+
+
+def _guess_format(path: str) -> str:
+    if path.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if path.endswith(".csv"):
+        return "csv"
+    return "lines"
+
+
+# the dictionary and options of a worker process, set by `_init_worker`
+_worker: Optional[Tuple[KeywordProcessor, Dict[str, Any]]] = None
+
+
+def _init_worker(index: bytes, options: Dict[str, Any]):
+    global _worker
+    _worker = (KeywordProcessor.from_bytes(index), options)
+
+
+def _process(item: Tuple[int, str]) -> str:
+    doc, text = item
+    keyword_processor, options = _worker
+    if options["replace"] is not None:
+        result = {
+            "doc": doc,
+            "text": keyword_processor.replace_keywords(text, options["replace"]),
+        }
+    else:
+        matches = keyword_processor.extract_keywords(
+            text,
+            span_info=True,
+            strategy=options["strategy"],
+            max_edits=options["max_edits"],
+            labels=options["labels"],
+            label_info=True,
+        )
+        keywords = [
+            {"clean_name": m[0], "label": m[1], "start": m[2], "end": m[3]}
+            for m in matches
+        ]
+        if options["max_edits"] > 0:
+            for keyword, m in zip(keywords, matches):
+                keyword["edits"] = m[4]
+        result = {"doc": doc, "keywords": keywords}
+    return json.dumps(result, ensure_ascii=False)
+
+
+def run(
+    keyword_processor: KeywordProcessor,
+    documents: Iterable[str],
+    output: TextIO,
+    replace: Optional[str] = None,
+    strategy: str = "all",
+    max_edits: int = 0,
+    labels: Optional[List[str]] = None,
+    jobs: Optional[int] = None,
+    ordered: bool = True,
+    chunk_size: int = 64,
+) -> int:
+    """Write one JSON line per document to ``output`` and return the number
+    of documents.
+
+    Every line has the position of its document in ``documents`` as
+    ``"doc"`` and either its ``"keywords"`` (``clean_name``, ``label``,
+    ``start`` and ``end`` of every match, as ``extract_keywords`` with
+    ``span_info`` and ``label_info`` finds them, and ``edits`` if
+    ``max_edits`` allows fuzzy matches) or, with a ``replace``
+    template, the replaced ``"text"``. ``jobs`` worker processes (all cores
+    by default) each load a copy of the dictionary and take ``chunk_size``
+    documents at a time; unless ``ordered``, the lines are written as the
+    chunks finish.
+    """
+    global _worker
+    options = dict(
+        replace=replace, strategy=strategy, max_edits=max_edits, labels=labels
+    )
+    items = enumerate(documents)
+    count = 0
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        _worker = (keyword_processor, options)
+        try:
+            for line in map(_process, items):
+                output.write(line + "\n")
+                count += 1
+        finally:
+            _worker = None
+        return count
+    index = keyword_processor.to_bytes()
+    with multiprocessing.Pool(jobs, _init_worker, (index, options)) as pool:
+        imap = pool.imap if ordered else pool.imap_unordered
+        for line in imap(_process, items, chunk_size):
+            output.write(line + "\n")
+            count += 1
+    return count
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="textrush",
+        description="Extract or replace keywords in documents read from files "
+        "or stdin and write one JSON line per document.",
+    )
+    parser.add_argument(
+        "files",
+        nargs="*",
+        metavar="FILE",
+        help="documents to process, stdin if none or '-'",
+    )
+    source = parser.add_argument_group("dictionary")
+    exclusive = source.add_mutually_exclusive_group(required=True)
+    exclusive.add_argument(
+        "-k",
+        "--keywords",
+        metavar="PATH",
+        help="keyword file: one 'keyword' or 'keyword=>clean name' per line, "
+        "or a .json object mapping clean names to lists of keywords",
+    )
+    exclusive.add_argument(
+        "-i",
+        "--index",
+        metavar="PATH",
+        help="dictionary saved with --save-index, with the settings it was "
+        "saved with",
+    )
+    source.add_argument(
+        "--save-index",
+        metavar="PATH",
+        help="save the dictionary to PATH for --index and exit",
+    )
+    source.add_argument("--case-sensitive", action="store_true", default=None)
+    source.add_argument(
+        "--tokenizer", choices=["word_bounds", "whitespace", "char", "grapheme"]
+    )
+    source.add_argument(
+        "--engine",
+        choices=["hashtrie", "compact", "automaton"],
+        help="default: automaton, which scans fastest once loaded",
+    )
+    source.add_argument(
+        "--normalize", choices=["nfkc", "nfkc_casefold", "strip_accents"]
+    )
+    documents = parser.add_argument_group("documents")
+    documents.add_argument(
+        "--format",
+        choices=FORMATS,
+        help="one document per line, JSONL record or CSV row; by default "
+        "guessed from the extension of the first file, lines for stdin",
+    )
+    documents.add_argument(
+        "--field",
+        default="text",
+        help="JSONL field holding the text, 'a.b' for nested objects "
+        "(default: text)",
+    )
+    documents.add_argument(
+        "--column",
+        default="text",
+        help="CSV column holding the text, by its header (default: text)",
+    )
+    processing = parser.add_argument_group("processing")
+    processing.add_argument(
+        "--replace",
+        nargs="?",
+        const="{clean}",
+        metavar="TEMPLATE",
+        help="replace the keywords instead of extracting them, with a "
+        "template of {clean}, {match} and {label} (default: {clean})",
+    )
+    processing.add_argument("--strategy", choices=STRATEGIES, default="all")
+    processing.add_argument("--max-edits", type=int, default=0)
+    processing.add_argument(
+        "--label",
+        dest="labels",
+        action="append",
+        help="only match the keywords of this dictionary, repeatable",
+    )
+    processing.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        help="worker processes (default: all cores)",
+    )
+    processing.add_argument(
+        "--unordered",
+        action="store_true",
+        help="write results as they are ready instead of in input order",
+    )
+    processing.add_argument(
+        "--chunk-size",
+        type=int,
+        default=64,
+        help="documents sent to a worker at a time (default: 64)",
+    )
+    parser.add_argument(
+        "-o", "--output", metavar="PATH", help="output file (default: stdout)"
+    )
+    return parser
+
+
+def _load(args: argparse.Namespace, parser: argparse.ArgumentParser):
+    settings = dict(
+        case_sensitive=args.case_sensitive,
+        tokenizer=args.tokenizer,
+        engine=args.engine,
+        normalize=args.normalize,
+    )
+    if args.index is not None:
+        given = [name for name, value in settings.items() if value is not None]
+        if given:
+            parser.error(
+                f"--{given[0].replace('_', '-')} cannot be used with --index, "
+                "which keeps the settings it was saved with"
+            )
+        with open(args.index, "rb") as f:
+            return KeywordProcessor.from_bytes(f.read())
+    return KeywordProcessor.from_pairs(
+        read_keywords(args.keywords),
+        n_threads=args.jobs,
+        case_sensitive=bool(args.case_sensitive),
+        tokenizer=args.tokenizer or "word_bounds",
+        engine=args.engine or "automaton",
+        normalize=args.normalize,
+    )
+
+
+def _documents(args: argparse.Namespace) -> Iterator[str]:
+    files = args.files or ["-"]
+    format = args.format or _guess_format(files[0])
+    for path in files:
+        if path == "-" and format == "csv":
+            # quoted fields may hold newlines, which the csv module has to see
+            # untranslated; detached so that sys.stdin stays open
+            stdin = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+            try:
+                yield from read_documents(
+                    stdin, "<stdin>", format, args.field, args.column
+                )
+            finally:
+                stdin.detach()
+            continue
+        if path == "-":
+            yield from read_documents(
+                sys.stdin, "<stdin>", format, args.field, args.column
+            )
+            continue
+        with open(path, encoding="utf-8", newline="") as f:
+            yield from read_documents(f, path, format, args.field, args.column)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.jobs is not None and args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    if args.max_edits < 0:
+        parser.error("--max-edits must not be negative")
+    if args.replace is not None:
+        # the workers would each fail on an invalid template
+        try:
+            KeywordProcessor().replace_keywords("", args.replace)
+        except ValueError as e:
+            parser.error(f"--replace: {e}")
+    try:
+        keyword_processor = _load(args, parser)
+    except (OSError, ValueError) as e:
+        print(f"textrush: {e}", file=sys.stderr)
+        return 1
+    if args.save_index is not None:
+        with open(args.save_index, "wb") as f:
+            f.write(keyword_processor.to_bytes())
+        return 0
+    output = sys.stdout
+    if args.output is not None:
+        output = open(args.output, "w", encoding="utf-8")
+    try:
+        run(
+            keyword_processor,
+            _documents(args),
+            output,
+            replace=args.replace,
+            strategy=args.strategy,
+            max_edits=args.max_edits,
+            labels=args.labels,
+            jobs=args.jobs,
+            ordered=not args.unordered,
+            chunk_size=args.chunk_size,
+        )
+    except (OSError, InputError) as e:
+        print(f"textrush: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    return 0
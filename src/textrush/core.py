@@ -1,25 +1,107 @@
 from __future__ import annotations
+from array import array
 import enum
-from typing import Literal, Iterable, List, Mapping, Tuple
-from textrush.librush import PyKeywordProcessor
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Literal,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+from textrush.librush import Match, MatchList, PyKeywordProcessor
 import operator as op
 
 __all__ = [
     "KeywordProcessor",
+    "Match",
+    "MatchList",
 ]
 
 
 class ExtractorStrategy(enum.Enum):
     ALL = 0
     LONGEST = 1
+    LEFTMOST_FIRST = 2
+    SHORTEST = 3
+    NON_OVERLAPPING_ALL = 4
+    MAX_WEIGHT = 5
+
+
+Tokenizer = Literal["word_bounds", "whitespace", "char", "grapheme"]
+Engine = Literal["hashtrie", "compact", "automaton"]
+Normalization = Literal["nfkc", "nfkc_casefold", "strip_accents"]
+
+
+def _labels(labels: Optional[Iterable[str]]) -> Optional[List[str]]:
+    # a single label can be passed as is
+    if isinstance(labels, str):
+        return [labels]
+    if labels is not None:
+        return list(labels)
+    return None
 
 
 class KeywordProcessor:
-    def __init__(self, case_sensitive: bool = False):
-        self._kp = PyKeywordProcessor(case_sensitive)
+    def __init__(
+        self,
+        case_sensitive: bool = False,
+        tokenizer: Tokenizer = "word_bounds",
+        engine: Engine = "hashtrie",
+        normalize: Optional[Normalization] = None,
+    ):
+        """Create a keyword processor, see the README for the settings."""
+        self._kp = PyKeywordProcessor(case_sensitive, tokenizer, engine, normalize)
+
+    @classmethod
+    def from_pairs(
+        cls,
+        pairs: Iterable[Tuple[str, str] | str],
+        n_threads: Optional[int] = None,
+        case_sensitive: bool = False,
+        tokenizer: Tokenizer = "word_bounds",
+        engine: Engine = "hashtrie",
+        normalize: Optional[Normalization] = None,
+    ) -> KeywordProcessor:
+        """Create a keyword processor from pairs, built on several threads."""
+        keyword_processor = cls(case_sensitive, tokenizer, engine, normalize)
+        pairs = [(pair, pair) if isinstance(pair, str) else pair for pair in pairs]
+        keyword_processor._kp.add_keywords_parallel(pairs, n_threads or 0)
+        return keyword_processor
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> KeywordProcessor:
+        """Load a keyword processor saved with ``to_bytes``."""
+        keyword_processor = cls.__new__(cls)
+        keyword_processor._kp = PyKeywordProcessor.from_bytes(data)
+        return keyword_processor
 
-    def remove_keyword(self, keyword: str):
-        self._kp.remove_keyword(keyword)
+    def to_bytes(self) -> bytes:
+        """Save the keywords and settings, without payloads."""
+        return self._kp.to_bytes()
+
+    @property
+    def tokenizer(self) -> Tokenizer:
+        return self._kp.tokenizer
+
+    @property
+    def engine(self) -> Engine:
+        return self._kp.engine
+
+    @property
+    def normalize(self) -> Optional[Normalization]:
+        return self._kp.normalize
+
+    def remove_keyword(self, keyword: str, label: Optional[str] = None):
+        """Remove a keyword, from the dictionary ``label`` only if given."""
+        self._kp.remove_keyword(keyword, label)
+
+    def compact(self) -> int:
+        """Shrink the trie and return the estimated bytes reclaimed."""
+        return self._kp.compact()
 
     def remove_keywords_from_iter(self, keywords: Iterable[str]):
         for word in keywords:
@@ -38,20 +120,33 @@ class KeywordProcessor:
         for word in values:
             self._kp.remove_keyword(word)
 
-    def add_keyword(self, keyword: str, clean_name: str = None):
-        self._kp.add_keyword(keyword, clean_name)
+    def add_keyword(
+        self,
+        keyword: str,
+        clean_name: str = None,
+        weight: Optional[float] = None,
+        label: Optional[str] = None,
+        payload: Any = None,
+    ):
+        """Add a keyword, to the dictionary ``label`` if given."""
+        self._kp.add_keyword(keyword, clean_name, weight, label, payload)
 
-    def add_keywords_from_iter(self, keywords: Iterable[Tuple[str, str] | str]):
+    def add_keywords_from_iter(
+        self,
+        keywords: Iterable[Tuple[str, str] | Tuple[str, str, float] | str],
+        label: Optional[str] = None,
+    ):
         for keyword in keywords:
             if isinstance(keyword, str):
-                self._kp.add_keyword(keyword)
+                self._kp.add_keyword(keyword, label=label)
             else:
-                self._kp.add_keyword(*keyword)
+                self._kp.add_keyword(*keyword, label=label)
 
     def add_keywords_from_dict(
         self,
         mapping: Mapping[str, Iterable[str] | str],  # clean_name: [keyword1, keyword2]
         errors: str = "raise",
+        label: Optional[str] = None,
     ):
         if errors not in ("raise", "ignore"):
             raise ValueError(
@@ -64,7 +159,7 @@ class KeywordProcessor:
                 continue
             for word in keywords:
                 try:
-                    self._kp.add_keyword(word, clean_name)
+                    self._kp.add_keyword(word, clean_name, label=label)
                 except ValueError as e:
                     if errors == "ignore":
                         return
@@ -74,21 +169,105 @@ class KeywordProcessor:
         self,
         text: str,
         span_info: bool = False,
-        strategy: ExtractorStrategy
-        | Literal["all", "longest", "ALL", "LONGEST"] = ExtractorStrategy.ALL,
+        strategy: (
+            ExtractorStrategy
+            | Literal[
+                "all",
+                "longest",
+                "leftmost_first",
+                "shortest",
+                "non_overlapping_all",
+                "max_weight",
+            ]
+        ) = ExtractorStrategy.ALL,
+        max_edits: int = 0,
+        labels: Optional[Iterable[str]] = None,
+        label_info: bool = False,
+        lazy: bool = False,
+        context: Optional[int] = None,
+        context_unit: Literal["tokens", "chars"] = "tokens",
+        merge_context: bool = False,
     ):
+        """Extract the keywords found in ``text``."""
         if isinstance(strategy, ExtractorStrategy):
             strategy = strategy.name.lower()
+        if context is not None:
+            if context < 0:
+                raise ValueError(f"invalid context: {context}, must not be negative")
+            if lazy:
+                raise ValueError("context cannot be used with lazy")
+            return self._kp.extract_keywords_with_context(
+                text,
+                context,
+                context_unit=context_unit,
+                merge=merge_context,
+                span_info=span_info,
+                strategy=strategy,
+                max_edits=max_edits,
+                labels=_labels(labels),
+                label_info=label_info,
+            )
+        if lazy:
+            return self._kp.extract_match_list(
+                text, strategy=strategy, max_edits=max_edits, labels=_labels(labels)
+            )
+        kwargs = dict(
+            strategy=strategy,
+            max_edits=max_edits,
+            labels=_labels(labels),
+            label_info=label_info,
+        )
         if span_info:
-            return self._kp.extract_keywords_with_span(text, strategy=strategy)
-        return self._kp.extract_keywords(text, strategy=strategy)
+            return self._kp.extract_keywords_with_span(text, **kwargs)
+        return self._kp.extract_keywords(text, **kwargs)
+
+    def extract_spans_flat(
+        self,
+        texts: Iterable[str],
+        strategy: ExtractorStrategy | str = ExtractorStrategy.ALL,
+        labels: Optional[Iterable[str]] = None,
+    ) -> Tuple[array, array, array, array, List[Any]]:
+        """Extract the keyword spans of a batch of documents as flat arrays."""
+        if isinstance(strategy, ExtractorStrategy):
+            strategy = strategy.name.lower()
+        return self._kp.extract_spans_flat(list(texts), strategy, _labels(labels))
 
-    def replace_keywords(self, text: str) -> str:
-        return self._kp.replace_keywords(text)
+    def contains_any(
+        self, text: str, labels: Optional[Iterable[str]] = None
+    ) -> Optional[Any]:
+        """Return the first keyword found in ``text``, or ``None``."""
+        return self._kp.contains_any(text, _labels(labels))
+
+    def filter_batch(
+        self,
+        texts: Iterable[str],
+        labels: Optional[Iterable[str]] = None,
+        n_threads: Optional[int] = None,
+    ) -> List[bool]:
+        """Return whether each of ``texts`` contains a keyword."""
+        return self._kp.filter_batch(list(texts), _labels(labels), n_threads or 0)
+
+    def enable_profiling(self, enabled: bool = True):
+        """Start (or stop) collecting extraction counters."""
+        self._kp.enable_profiling(enabled)
+
+    def profile_report(self) -> Optional[Dict[str, Any]]:
+        """Return the counters collected since profiling was enabled."""
+        return self._kp.profile_report()
+
+    def replace_keywords(
+        self, text: str, repl: Optional[str | Callable[[str], str]] = None
+    ) -> str:
+        """Replace the longest keyword matches in ``text``."""
+        return self._kp.replace_keywords(text, repl)
 
     def get_all_keywords_with_clean_names(self) -> List[Tuple[str, str]]:
         return self._kp.get_all_keywords_with_clean_names()
 
+    def complete(self, prefix: str, limit: int = 10) -> List[Tuple[str, str]]:
+        """Return the keywords starting with ``prefix``, by weight."""
+        return self._kp.complete(prefix, limit)
+
     def get_all_keywords(self) -> List[str]:
         return list(
             map(
@@ -97,5 +276,12 @@ class KeywordProcessor:
             )
         )
 
+    def stats(self) -> Dict[str, Any]:
+        """Return the size and shape of the keyword trie."""
+        return self._kp.stats()
+
     def __len__(self):
         return len(self._kp)
+
+    def __sizeof__(self):
+        return super().__sizeof__() + self._kp.__sizeof__()
@@ -1,22 +1,123 @@
-from typing import List, Optional, Tuple
+from array import array
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, overload
 
 class PyKeywordProcessor:
     words: list[str]
     clean_names: list[str]
     case_sensitive: bool
 
-    def __init__(self, case_sensitive: bool = False) -> None: ...
+    tokenizer: str
+
+    engine: str
+
+    normalize: Optional[str]
+
+    def __init__(
+        self,
+        case_sensitive: bool = False,
+        tokenizer: str = "word_bounds",
+        engine: str = "hashtrie",
+        normalize: Optional[str] = None,
+    ) -> None: ...
     def __repr__(self): ...
     # number of keywords
     def __len__(self) -> int: ...
+    # size and shape of the trie
+    def __sizeof__(self) -> int: ...
+    def stats(self) -> Dict[str, Any]: ...
     # manage keywords
-    def add_keyword(self, word: str, clean_name: Optional[str] = None) -> None: ...
-    def remove_keyword(self, word: str) -> None: ...
+    def add_keyword(
+        self,
+        word: str,
+        clean_name: Optional[str] = None,
+        weight: Optional[float] = None,
+        label: Optional[str] = None,
+        payload: Any = None,
+    ) -> None: ...
+    def add_keywords_parallel(
+        self, pairs: List[Tuple[str, str]], n_threads: int = 0
+    ) -> None: ...
+    def remove_keyword(self, word: str, label: Optional[str] = None) -> None: ...
+    def compact(self) -> int: ...
+    # serialization
+    def to_bytes(self) -> bytes: ...
+    @staticmethod
+    def from_bytes(data: bytes) -> PyKeywordProcessor: ...
     def get_all_keywords_with_clean_names(self) -> List[Tuple[str, str]]: ...
+    # prefix completion
+    def complete(self, prefix: str, limit: int = 10) -> List[Tuple[str, str]]: ...
     # extract keywords
-    def extract_keywords(self, text: str, strategy: str = "all") -> list[str]: ...
+    def extract_keywords(
+        self,
+        text: str,
+        strategy: str = "all",
+        max_edits: int = 0,
+        labels: Optional[List[str]] = None,
+        label_info: bool = False,
+    ) -> list[str] | list[tuple]: ...
     def extract_keywords_with_span(
-        self, text: str, strategy: str = "all"
-    ) -> list[tuple[str, int, int]]: ...
+        self,
+        text: str,
+        strategy: str = "all",
+        max_edits: int = 0,
+        labels: Optional[List[str]] = None,
+        label_info: bool = False,
+    ) -> list[tuple]: ...
+    def extract_keywords_with_context(
+        self,
+        text: str,
+        context: int,
+        context_unit: str = "tokens",
+        merge: bool = False,
+        span_info: bool = False,
+        strategy: str = "all",
+        max_edits: int = 0,
+        labels: Optional[List[str]] = None,
+        label_info: bool = False,
+    ) -> list[tuple]: ...
+    def extract_match_list(
+        self,
+        text: str,
+        strategy: str = "all",
+        max_edits: int = 0,
+        labels: Optional[List[str]] = None,
+    ) -> MatchList: ...
+    def extract_spans_flat(
+        self,
+        texts: List[str],
+        strategy: str = "all",
+        labels: Optional[List[str]] = None,
+    ) -> tuple[array, array, array, array, list[Any]]: ...
+    def contains_any(
+        self, text: str, labels: Optional[List[str]] = None
+    ) -> Optional[Any]: ...
+    def filter_batch(
+        self,
+        texts: List[str],
+        labels: Optional[List[str]] = None,
+        n_threads: int = 0,
+    ) -> List[bool]: ...
+    # profiling
+    def enable_profiling(self, enabled: bool = True) -> None: ...
+    def profile_report(self) -> Optional[Dict[str, Any]]: ...
     # replace keywords
-    def replace_keywords(self, text: str) -> str: ...
+    def replace_keywords(
+        self, text: str, repl: Optional[str | Callable[[str], str]] = None
+    ) -> str: ...
+
+class Match:
+    clean_name: Any  # or the payload of the keyword
+    label: Optional[str]
+    start: int
+    end: int
+    span: Tuple[int, int]
+    text: str
+    edits: int
+
+class MatchList:
+    def __len__(self) -> int: ...
+    @overload
+    def __getitem__(self, index: int) -> Match: ...
+    @overload
+    def __getitem__(self, index: slice) -> List[Match]: ...
+    def __iter__(self) -> Iterator[Match]: ...
@@ -151,6 +151,39 @@ def run_benchmarks():
     print(f"Without span info: {time_without_span:.4f} seconds")
     print(f"With span info: {time_with_span:.4f} seconds")
 
+    # 6. Engine Comparison
+    print("\n6. Engine Comparison")
+    print("-" * 30)
+    results["results"]["engines"] = {}
+
+    for corpus in ["ascii", "unicode"]:
+        text = data[corpus]["texts"]["100000"]
+        keywords = data[corpus]["keywords"]["10000"]
+        results["results"]["engines"][corpus] = {}
+        for engine in ["hashtrie", "compact", "automaton"]:
+            print(f"\nTesting {engine} engine on {corpus} corpus...")
+            kp = KeywordProcessor(engine=engine)
+            start_time = time.time()
+            kp.add_keywords_from_iter(keywords)
+            addition = time.time() - start_time
+            # the first extraction pays for building the automaton
+            start_time = time.time()
+            kp.extract_keywords(text)
+            first_extraction = time.time() - start_time
+            start_time = time.time()
+            kp.extract_keywords(text)
+            extraction = time.time() - start_time
+            results["results"]["engines"][corpus][engine] = {
+                "keyword_addition": addition,
+                "first_extraction": first_extraction,
+                "extraction": extraction,
+                "size_bytes": kp.__sizeof__(),
+            }
+            print(f"Keyword addition: {addition:.4f} seconds")
+            print(f"First extraction: {first_extraction:.4f} seconds")
+            print(f"Extraction: {extraction:.4f} seconds")
+            print(f"Size: {kp.__sizeof__() / 1e6:.1f} MB")
+
     # Save results
     results_dir = Path("tests/benchmark_results")
     results_dir.mkdir(exist_ok=True)
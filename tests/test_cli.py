@@ -0,0 +1,171 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+from textrush.cli import main
+
+
+class TestCli(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.keywords = self.path("keywords.txt")
+        self.write(self.keywords, "python\nmachine learning=>ML\n\nnew york=>NYC\n")
+        self.texts = [f"doc {i}: Python and Machine Learning" for i in range(50)]
+        self.texts[7] = "nothing here"
+        self.texts[8] = "I ❤ New York"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def write(self, path, content):
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+
+    def run_cli(self, *args):
+        output = self.path("output.jsonl")
+        self.assertEqual(main([*args, "-o", output]), 0)
+        with open(output, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def test_lines(self):
+        documents = self.path("docs.txt")
+        self.write(documents, "\n".join(self.texts) + "\n")
+        results = self.run_cli("-k", self.keywords, "-j", "1", documents)
+        self.assertEqual([result["doc"] for result in results], list(range(50)))
+        self.assertEqual(
+            results[0]["keywords"],
+            [
+                {"clean_name": "python", "label": None, "start": 7, "end": 13},
+                {"clean_name": "ML", "label": None, "start": 18, "end": 34},
+            ],
+        )
+        self.assertEqual(results[7]["keywords"], [])
+        self.assertEqual(
+            results[8]["keywords"],
+            [{"clean_name": "NYC", "label": None, "start": 4, "end": 12}],
+        )
+        # any number of workers and chunks, in order or not, gives the same
+        for args in [["-j", "2"], ["-j", "3", "--chunk-size", "7"]]:
+            self.assertEqual(
+                self.run_cli("-k", self.keywords, *args, documents), results
+            )
+            unordered = self.run_cli(
+                "-k", self.keywords, *args, "--unordered", documents
+            )
+            self.assertEqual(
+                sorted(unordered, key=lambda result: result["doc"]), results
+            )
+
+    def test_jsonl_and_csv(self):
+        jsonl = self.path("docs.jsonl")
+        self.write(
+            jsonl,
+            "".join(
+                json.dumps({"id": i, "body": {"text": text}}) + "\n"
+                for i, text in enumerate(self.texts)
+            ),
+        )
+        csv = self.path("docs.csv")
+        self.write(
+            csv,
+            "id,text\n"
+            + "".join(f'{i},"{text}"\n' for i, text in enumerate(self.texts)),
+        )
+        expected = self.run_cli(
+            jsonl, "-k", self.keywords, "--field", "body.text", "--replace", "<{clean}>"
+        )
+        self.assertEqual(expected[0]["text"], "doc 0: <python> and <ML>")
+        self.assertEqual(expected[8]["text"], "I ❤ <NYC>")
+        self.assertEqual(
+            self.run_cli("-k", self.keywords, "--replace", "<{clean}>", csv),
+            expected,
+        )
+        # several files are numbered as one stream of documents
+        results = self.run_cli(csv, csv, "-k", self.keywords, "--replace")
+        self.assertEqual(len(results), 100)
+        self.assertEqual(results[50], {"doc": 50, "text": "doc 0: python and ML"})
+
+    def test_multiline_csv(self):
+        content = 'id,text\r\n0,"Python\r\nand New York"\r\n1,python\r\n'
+        expected = [
+            {"doc": 0, "text": "python\r\nand NYC"},
+            {"doc": 1, "text": "python"},
+        ]
+        csv = self.path("docs.csv")
+        self.write(csv, content)
+        self.assertEqual(
+            self.run_cli("-k", self.keywords, "-j", "1", "--replace", csv), expected
+        )
+        stdin = io.TextIOWrapper(io.BytesIO(content.encode("utf-8")), encoding="utf-8")
+        with mock.patch("sys.stdin", stdin):
+            results = self.run_cli(
+                "-k", self.keywords, "-j", "1", "--replace", "--format", "csv"
+            )
+            self.assertFalse(stdin.closed)
+        self.assertEqual(results, expected)
+
+    def test_index(self):
+        index = self.path("keywords.idx")
+        self.assertEqual(
+            main(["-k", self.keywords, "--case-sensitive", "--save-index", index]), 0
+        )
+        documents = self.path("docs.txt")
+        self.write(documents, "python\nPython\n")
+        results = self.run_cli("-i", index, documents)
+        self.assertEqual(len(results[0]["keywords"]), 1)
+        self.assertEqual(results[1]["keywords"], [])
+        with contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit):
+                main(["-i", index, "--engine", "compact", documents])
+            with self.assertRaises(SystemExit):
+                main(["-i", index, "-k", self.keywords, documents])
+
+    def test_fuzzy_edits(self):
+        documents = self.path("docs.txt")
+        self.write(documents, "Pyhton and python\n")
+        results = self.run_cli("-k", self.keywords, "--max-edits", "1", documents)
+        self.assertEqual(
+            [(m["start"], m["edits"]) for m in results[0]["keywords"]],
+            [(0, 1), (11, 0)],
+        )
+        results = self.run_cli("-k", self.keywords, documents)
+        self.assertNotIn("edits", results[0]["keywords"][0])
+
+    def test_invalid_arguments(self):
+        documents = self.path("docs.txt")
+        self.write(documents, "python\n")
+        for args in [
+            ["--max-edits", "-1"],
+            ["--replace", "{foo}"],
+            ["--replace", "<{clean}"],
+            ["-j", "2", "--replace", "{"],
+        ]:
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                with self.assertRaises(SystemExit):
+                    main(["-k", self.keywords, *args, documents])
+            self.assertIn("textrush: error: ", stderr.getvalue())
+
+    def test_errors(self):
+        jsonl = self.path("docs.jsonl")
+        self.write(jsonl, '{"text": "python"}\n{"body": "python"}\n')
+        for args in [
+            ["-k", self.path("missing.txt"), jsonl],
+            ["-k", self.keywords, jsonl, "--field", "body"],
+            ["-k", self.keywords, "-j", "2", jsonl],
+            ["-i", self.keywords, jsonl],
+        ]:
+            stderr = io.StringIO()
+            with contextlib.redirect_stderr(stderr):
+                self.assertEqual(main([*args, "-o", self.path("out.jsonl")]), 1)
+            self.assertTrue(stderr.getvalue().startswith("textrush: "))
+
+
+if __name__ == "__main__":
+    unittest.main()
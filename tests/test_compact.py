@@ -0,0 +1,74 @@
+import unittest
+from textrush import KeywordProcessor
+
+ENGINES = ["hashtrie", "compact", "automaton"]
+
+
+class TestCompact(unittest.TestCase):
+    def setUp(self):
+        self.kept = {f"kept {i}": f"K{i}" for i in range(50)}
+        # siblings of the kept keywords and branches of their own
+        self.churn = [f"kept {i}" for i in range(50, 2050)]
+        self.churn += [f"churn {i} term {i % 7}" for i in range(2000)]
+        self.text = "kept 3, kept 700, churn 5 term 5 and kept 49"
+
+    def fresh(self, engine):
+        keyword_processor = KeywordProcessor(engine=engine)
+        for keyword, clean_name in self.kept.items():
+            keyword_processor.add_keyword(keyword, clean_name)
+        return keyword_processor
+
+    def churned(self, engine):
+        keyword_processor = self.fresh(engine)
+        for keyword in self.churn:
+            keyword_processor.add_keyword(keyword)
+        for keyword in self.churn:
+            keyword_processor.remove_keyword(keyword)
+        return keyword_processor
+
+    def test_removal_prunes_dead_branches(self):
+        for engine in ENGINES:
+            expected = self.fresh(engine).stats()
+            stats = self.churned(engine).stats()
+            for key in ["len", "node_count", "edge_count", "max_depth"]:
+                self.assertEqual(stats[key], expected[key], (engine, key))
+
+    def test_removal_keeps_shared_prefixes(self):
+        keyword_processor = KeywordProcessor()
+        keyword_processor.add_keyword("new")
+        keyword_processor.add_keyword("new york city")
+        keyword_processor.add_keyword("new york state")
+        keyword_processor.remove_keyword("new york city")
+        # "new", " ", "york", " ", "state" plus the root
+        self.assertEqual(keyword_processor.stats()["node_count"], 6)
+        keyword_processor.remove_keyword("new york state")
+        self.assertEqual(keyword_processor.stats()["node_count"], 2)
+        self.assertEqual(keyword_processor.extract_keywords("new york"), ["new"])
+
+    def test_compact(self):
+        for engine in ENGINES:
+            keyword_processor = self.churned(engine)
+            before = keyword_processor.extract_keywords(self.text, span_info=True)
+            self.assertEqual(
+                before, self.fresh(engine).extract_keywords(self.text, span_info=True)
+            )
+            reclaimed = keyword_processor.compact()
+            self.assertIsInstance(reclaimed, int)
+            self.assertGreater(reclaimed, 0, engine)
+            self.assertEqual(keyword_processor.compact(), 0, engine)
+            self.assertEqual(
+                keyword_processor.extract_keywords(self.text, span_info=True), before
+            )
+            self.assertEqual(
+                keyword_processor.stats()["node_count"],
+                self.fresh(engine).stats()["node_count"],
+            )
+            keyword_processor.add_keyword("kept 700", "again")
+            self.assertIn("again", keyword_processor.extract_keywords(self.text))
+
+    def test_compact_empty(self):
+        self.assertEqual(KeywordProcessor().compact(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+from textrush import KeywordProcessor
+
+
+class TestComplete(unittest.TestCase):
+    def setUp(self):
+        self.keyword_processor = KeywordProcessor()
+        self.keyword_processor.add_keyword("New York", "NY", weight=5)
+        self.keyword_processor.add_keyword("New Jersey", "NJ", weight=3)
+        self.keyword_processor.add_keyword("Newark", weight=4)
+        self.keyword_processor.add_keyword("New Delhi", weight=3)
+        self.keyword_processor.add_keyword("Boston", weight=9)
+
+    def test_ranked_by_weight_then_insertion_order(self):
+        self.assertEqual(
+            self.keyword_processor.complete("new"),
+            [
+                ("New York", "NY"),
+                ("Newark", "Newark"),
+                ("New Jersey", "NJ"),
+                ("New Delhi", "New Delhi"),
+            ],
+        )
+
+    def test_limit(self):
+        self.assertEqual(
+            self.keyword_processor.complete("NEW ", limit=2),
+            [("New York", "NY"), ("New Jersey", "NJ")],
+        )
+        self.assertEqual(
+            self.keyword_processor.complete("", limit=1), [("Boston", "Boston")]
+        )
+        self.assertEqual(self.keyword_processor.complete("new", limit=0), [])
+
+    def test_no_match(self):
+        self.assertEqual(self.keyword_processor.complete("Chicago"), [])
+
+    def test_case_sensitive(self):
+        kp = KeywordProcessor(case_sensitive=True)
+        kp.add_keyword("Apple")
+        kp.add_keyword("apple pie")
+        self.assertEqual(kp.complete("app"), [("apple pie", "apple pie")])
+
+    def test_follows_changes(self):
+        self.assertEqual(
+            self.keyword_processor.complete("Newa"), [("Newark", "Newark")]
+        )
+        self.keyword_processor.remove_keyword("Newark")
+        self.assertEqual(self.keyword_processor.complete("Newa"), [])
+        self.keyword_processor.add_keyword("New Delhi", weight=10)
+        self.assertEqual(
+            self.keyword_processor.complete("new", limit=1),
+            [("New Delhi", "New Delhi")],
+        )
+
+    def test_folds_like_extraction(self):
+        kp = KeywordProcessor()
+        kp.add_keyword("Straße")
+        for prefix in ["STRASSE", "strass", "Straß"]:
+            self.assertEqual(kp.complete(prefix), [("Straße", "Straße")], prefix)
+        self.assertEqual(kp.extract_keywords("STRASSE"), ["Straße"])
+
+
+if __name__ == "__main__":
+    unittest.main()
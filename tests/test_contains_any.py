@@ -0,0 +1,61 @@
+import random
+import unittest
+from textrush import KeywordProcessor
+
+
+class TestContainsAny(unittest.TestCase):
+    def setUp(self):
+        self.keyword_processor = KeywordProcessor()
+        self.keyword_processor.add_keyword("new york", "NYC")
+        self.keyword_processor.add_keyword("new york city", "New York City")
+        self.keyword_processor.add_keyword("york", "York")
+        self.keyword_processor.add_keyword("python", "Python", label="skill")
+
+    def test_contains_any(self):
+        self.assertEqual(
+            self.keyword_processor.contains_any("I love New York City"), "NYC"
+        )
+        self.assertEqual(
+            self.keyword_processor.contains_any("python in new york", labels="skill"),
+            "Python",
+        )
+        self.assertIsNone(self.keyword_processor.contains_any("nothing here"))
+        self.assertIsNone(self.keyword_processor.contains_any(""))
+        self.assertIsNone(
+            self.keyword_processor.contains_any("new york", labels=["other"])
+        )
+        payload = {"iata": "NYC"}
+        self.keyword_processor.add_keyword("new york", payload=payload)
+        self.assertIs(self.keyword_processor.contains_any("new york"), payload)
+
+    def test_same_as_extract_keywords(self):
+        rng = random.Random(3)
+        words = ["new", "york", "city", "python", "java", " ", ",", "New"]
+        texts = [" ".join(rng.choices(words, k=rng.randint(0, 8))) for _ in range(300)]
+        for labels in [None, ["skill"]]:
+            expected = [
+                next(
+                    iter(self.keyword_processor.extract_keywords(text, labels=labels)),
+                    None,
+                )
+                for text in texts
+            ]
+            self.assertEqual(
+                [
+                    self.keyword_processor.contains_any(text, labels=labels)
+                    for text in texts
+                ],
+                expected,
+            )
+            for n_threads in [None, 1, 3]:
+                self.assertEqual(
+                    self.keyword_processor.filter_batch(
+                        texts, labels=labels, n_threads=n_threads
+                    ),
+                    [found is not None for found in expected],
+                )
+        self.assertEqual(self.keyword_processor.filter_batch([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
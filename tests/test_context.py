@@ -0,0 +1,103 @@
+import unittest
+from textrush import KeywordProcessor
+
+
+class TestContext(unittest.TestCase):
+    def setUp(self):
+        self.keyword_processor = KeywordProcessor()
+        self.keyword_processor.add_keyword("new york", "NYC", label="city")
+        self.keyword_processor.add_keyword("paris", "Paris", label="city")
+        self.keyword_processor.add_keyword("london")
+        self.text = "I ❤ moved from New York to Paris, then to London last year."
+
+    def test_tokens(self):
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(self.text, context=2),
+            [
+                ("NYC", "moved from ", " to Paris"),
+                ("Paris", "York to ", ", then to"),
+                ("london", "then to ", " last year"),
+            ],
+        )
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(
+                self.text, span_info=True, label_info=True, context=1
+            ),
+            [
+                ("NYC", "city", 15, 23, "from ", " to"),
+                ("Paris", "city", 27, 32, "to ", ", then"),
+                ("london", None, 42, 48, "to ", " last"),
+            ],
+        )
+        # the windows end at the text
+        self.assertEqual(
+            self.keyword_processor.extract_keywords("London", context=3),
+            [("london", "", "")],
+        )
+
+    def test_chars(self):
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(
+                self.text, span_info=True, context=4, context_unit="chars"
+            ),
+            [
+                ("NYC", 15, 23, "rom ", " to "),
+                ("Paris", 27, 32, " to ", ", th"),
+                ("london", 42, 48, " to ", " las"),
+            ],
+        )
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(
+                "❤ new york", context=5, context_unit="chars"
+            ),
+            [("NYC", "❤ ", "")],
+        )
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(
+                self.text, context=0, context_unit="chars"
+            ),
+            [("NYC", "", ""), ("Paris", "", ""), ("london", "", "")],
+        )
+
+    def test_merge(self):
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(
+                self.text, context=2, merge_context=True
+            ),
+            [
+                (
+                    "moved from New York to Paris, then to London last year",
+                    4,
+                    58,
+                    ["NYC", "Paris", "london"],
+                )
+            ],
+        )
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(
+                self.text, span_info=True, context=1, merge_context=True
+            ),
+            [
+                (
+                    "from New York to Paris, then",
+                    10,
+                    38,
+                    [("NYC", 15, 23), ("Paris", 27, 32)],
+                ),
+                ("to London last", 39, 53, [("london", 42, 48)]),
+            ],
+        )
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            self.keyword_processor.extract_keywords(self.text, context=-1)
+        with self.assertRaises(ValueError):
+            self.keyword_processor.extract_keywords(
+                self.text, context=1, context_unit="lines"
+            )
+        with self.assertRaises(ValueError):
+            self.keyword_processor.extract_keywords(self.text, context=1, lazy=True)
+
+
+if __name__ == "__main__":
+    unittest.main()
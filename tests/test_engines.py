@@ -0,0 +1,110 @@
+import random
+import unittest
+from textrush import KeywordProcessor
+
+ENGINES = ["hashtrie", "compact", "automaton"]
+STRATEGIES = [
+    "all",
+    "longest",
+    "leftmost_first",
+    "shortest",
+    "non_overlapping_all",
+    "max_weight",
+]
+
+
+class TestEngines(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(7)
+        words = [f"w{i}" for i in range(40)] + [
+            "New",
+            "new",
+            "York",
+            "straße",
+            "STRASSE",
+            "\u212aelvin",  # Kelvin sign
+            "kelvin",
+        ]
+        self.keywords = [
+            (" ".join(rng.choices(words, k=rng.randint(1, 3))), rng.randint(1, 5))
+            for _ in range(300)
+        ]
+        self.removed = rng.sample([keyword for keyword, _ in self.keywords], 30)
+        self.text = ", ".join(rng.choices(words, k=500))
+
+    def processors(self, case_sensitive):
+        processors = []
+        for engine in ENGINES:
+            keyword_processor = KeywordProcessor(case_sensitive, engine=engine)
+            for i, (keyword, weight) in enumerate(self.keywords):
+                keyword_processor.add_keyword(keyword, f"K{i}", weight=weight)
+            keyword_processor.add_keyword("new york", "NYC", label="location")
+            for keyword in self.removed:
+                keyword_processor.remove_keyword(keyword)
+            processors.append(keyword_processor)
+        return processors
+
+    def test_engine(self):
+        self.assertEqual(KeywordProcessor().engine, "hashtrie")
+        self.assertEqual(KeywordProcessor(engine="compact").engine, "compact")
+        with self.assertRaises(ValueError):
+            KeywordProcessor(engine="regex")
+
+    def test_identical_results(self):
+        for case_sensitive in [False, True]:
+            expected, *others = self.processors(case_sensitive)
+            for keyword_processor in others:
+                self.assertEqual(len(keyword_processor), len(expected))
+                for strategy in STRATEGIES:
+                    self.assertEqual(
+                        keyword_processor.extract_keywords(
+                            self.text,
+                            span_info=True,
+                            label_info=True,
+                            strategy=strategy,
+                        ),
+                        expected.extract_keywords(
+                            self.text,
+                            span_info=True,
+                            label_info=True,
+                            strategy=strategy,
+                        ),
+                    )
+                self.assertEqual(
+                    keyword_processor.extract_keywords(self.text, max_edits=1),
+                    expected.extract_keywords(self.text, max_edits=1),
+                )
+                self.assertEqual(
+                    keyword_processor.replace_keywords(self.text),
+                    expected.replace_keywords(self.text),
+                )
+                self.assertEqual(
+                    sorted(keyword_processor.get_all_keywords_with_clean_names()),
+                    sorted(expected.get_all_keywords_with_clean_names()),
+                )
+                self.assertEqual(
+                    keyword_processor.complete("w1"), expected.complete("w1")
+                )
+
+    def test_changes_after_extraction(self):
+        for engine in ENGINES:
+            keyword_processor = KeywordProcessor(engine=engine)
+            keyword_processor.add_keyword("new york", "NYC")
+            self.assertEqual(keyword_processor.extract_keywords("New York"), ["NYC"])
+            keyword_processor.add_keyword("york")
+            self.assertEqual(
+                keyword_processor.extract_keywords("New York"), ["NYC", "york"]
+            )
+            keyword_processor.remove_keyword("new york")
+            self.assertEqual(keyword_processor.extract_keywords("New York"), ["york"])
+
+    def test_compact_is_smaller(self):
+        hashtrie, compact, _ = self.processors(False)
+        self.assertEqual(compact.stats()["node_count"], hashtrie.stats()["node_count"])
+        self.assertLess(
+            compact.stats()["trie_heap_bytes"], hashtrie.stats()["trie_heap_bytes"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from array import array
+from textrush import KeywordProcessor
+
+
+class TestExtractSpansFlat(unittest.TestCase):
+    def setUp(self):
+        self.keyword_processor = KeywordProcessor()
+        self.keyword_processor.add_keyword("new york", "NYC")
+        self.keyword_processor.add_keyword("york", "York")
+        self.keyword_processor.add_keyword("café", "Cafe", label="place")
+        self.texts = ["I love New York", "", "Un café à New York", "nothing"]
+
+    def test_matches_extract_keywords(self):
+        for strategy in ["all", "longest"]:
+            doc_idx, keyword_id, start, end, keywords = (
+                self.keyword_processor.extract_spans_flat(self.texts, strategy)
+            )
+            for column in [doc_idx, keyword_id, start, end]:
+                self.assertIsInstance(column, array)
+                self.assertEqual(len(column), len(doc_idx))
+            flat = [
+                (doc, keywords[id], s, e)
+                for doc, id, s, e in zip(doc_idx, keyword_id, start, end)
+            ]
+            expected = [
+                (doc, *span)
+                for doc, text in enumerate(self.texts)
+                for span in self.keyword_processor.extract_keywords(
+                    text, span_info=True, strategy=strategy
+                )
+            ]
+            self.assertEqual(flat, expected)
+
+    def test_local_offsets(self):
+        doc_idx, keyword_id, start, end, keywords = (
+            self.keyword_processor.extract_spans_flat(self.texts, "longest")
+        )
+        self.assertEqual(list(doc_idx), [0, 2, 2])
+        self.assertEqual(sorted(keywords), ["Cafe", "NYC"])
+        for doc, s, e in zip(doc_idx, start, end):
+            self.assertIn(self.texts[doc][s:e].lower(), ["new york", "café"])
+
+    def test_labels_and_payloads(self):
+        _, keyword_id, _, _, keywords = self.keyword_processor.extract_spans_flat(
+            self.texts, labels="place"
+        )
+        self.assertEqual([keywords[id] for id in keyword_id], ["Cafe"])
+        payload = {"id": 7}
+        self.keyword_processor.add_keyword("new york", payload=payload)
+        _, keyword_id, _, _, keywords = self.keyword_processor.extract_spans_flat(
+            self.texts, "longest"
+        )
+        self.assertEqual(
+            [keywords[id] for id in keyword_id], [payload, "Cafe", payload]
+        )
+        self.assertIs(keywords[keyword_id[0]], payload)
+
+    def test_empty(self):
+        doc_idx, keyword_id, start, end, keywords = (
+            self.keyword_processor.extract_spans_flat([])
+        )
+        self.assertEqual(
+            (len(doc_idx), len(keyword_id), len(start), len(end), keywords),
+            (0, 0, 0, 0, []),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
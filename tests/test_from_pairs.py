@@ -0,0 +1,67 @@
+import random
+import unittest
+from textrush import KeywordProcessor
+
+
+class TestFromPairs(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(11)
+        words = [f"w{i}" for i in range(30)] + ["New", "york", "STRASSE", "straße"]
+        self.pairs = [
+            (" ".join(rng.choices(words, k=rng.randint(1, 3))), f"C{i}")
+            for i in range(2000)
+        ]
+        self.text = " ".join(rng.choices(words, k=1000))
+
+    def sequential(self, pairs, **kwargs):
+        keyword_processor = KeywordProcessor(**kwargs)
+        for keyword, clean_name in pairs:
+            keyword_processor.add_keyword(keyword, clean_name)
+        return keyword_processor
+
+    def test_same_as_sequential(self):
+        for case_sensitive in [False, True]:
+            for engine in ["hashtrie", "compact"]:
+                expected = self.sequential(
+                    self.pairs, case_sensitive=case_sensitive, engine=engine
+                )
+                for n_threads in [None, 1, 4]:
+                    keyword_processor = KeywordProcessor.from_pairs(
+                        self.pairs,
+                        n_threads=n_threads,
+                        case_sensitive=case_sensitive,
+                        engine=engine,
+                    )
+                    self.assertEqual(keyword_processor.engine, engine)
+                    self.assertEqual(len(keyword_processor), len(expected))
+                    self.assertEqual(
+                        sorted(keyword_processor.get_all_keywords_with_clean_names()),
+                        sorted(expected.get_all_keywords_with_clean_names()),
+                    )
+                    for strategy in ["all", "longest", "leftmost_first"]:
+                        self.assertEqual(
+                            keyword_processor.extract_keywords(
+                                self.text, span_info=True, strategy=strategy
+                            ),
+                            expected.extract_keywords(
+                                self.text, span_info=True, strategy=strategy
+                            ),
+                        )
+
+    def test_duplicates(self):
+        keyword_processor = KeywordProcessor.from_pairs(
+            ["python", ("Python", "Py"), ("java", "Java"), ("PYTHON", "PY")],
+            n_threads=2,
+        )
+        self.assertEqual(len(keyword_processor), 2)
+        self.assertEqual(
+            keyword_processor.extract_keywords("python and java"), ["PY", "Java"]
+        )
+
+    def test_invalid_keyword(self):
+        with self.assertRaises(ValueError):
+            KeywordProcessor.from_pairs([("python", "Python"), (" ", "space")], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+from textrush import KeywordProcessor
+
+
+class TestFuzzy(unittest.TestCase):
+    def setUp(self):
+        self.keyword_processor = KeywordProcessor()
+        self.keyword_processor.add_keyword("python", "Python")
+        self.keyword_processor.add_keyword("machine learning", "ML")
+        self.keyword_processor.add_keyword("machine", "Machine")
+        self.text = "I like Pyhton and machne larning"
+
+    def test_exact_by_default(self):
+        self.assertEqual(self.keyword_processor.extract_keywords(self.text), [])
+
+    def test_edit_budget(self):
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(self.text, max_edits=1),
+            [("Python", 1), ("Machine", 1)],
+        )
+        # the budget is shared by all tokens of a keyword
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(self.text, max_edits=2),
+            [("Python", 1), ("Machine", 1), ("ML", 2)],
+        )
+
+    def test_span_and_strategy(self):
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(
+                self.text, span_info=True, strategy="longest", max_edits=2
+            ),
+            [("Python", 7, 13, 1), ("ML", 18, 32, 2)],
+        )
+
+    def test_exact_matches_have_zero_distance(self):
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(
+                "python machine learning", max_edits=2
+            ),
+            [("Python", 0), ("Machine", 0), ("ML", 0)],
+        )
+
+    def test_case_sensitivity(self):
+        kp = KeywordProcessor(case_sensitive=True)
+        kp.add_keyword("Python")
+        self.assertEqual(
+            kp.extract_keywords("python Pyhton", max_edits=1),
+            [("Python", 1), ("Python", 1)],
+        )
+
+    def test_index_follows_new_keywords(self):
+        self.assertEqual(
+            self.keyword_processor.extract_keywords("javscript", max_edits=1), []
+        )
+        self.keyword_processor.add_keyword("javascript", "JavaScript")
+        self.assertEqual(
+            self.keyword_processor.extract_keywords("javscript", max_edits=1),
+            [("JavaScript", 1)],
+        )
+
+    def test_index_follows_removed_keywords(self):
+        self.assertEqual(
+            self.keyword_processor.extract_keywords("Pyhton machne", max_edits=1),
+            [("Python", 1), ("Machine", 1)],
+        )
+        self.keyword_processor.remove_keyword("python")
+        self.assertEqual(
+            self.keyword_processor.extract_keywords("Pyhton machne", max_edits=1),
+            [("Machine", 1)],
+        )
+        self.keyword_processor.add_keyword("python", "Python")
+        self.assertEqual(
+            self.keyword_processor.extract_keywords("Pyhton machne", max_edits=1),
+            [("Python", 1), ("Machine", 1)],
+        )
+
+    def test_case_folding_matches_exact_trie(self):
+        kp = KeywordProcessor()
+        kp.add_keyword("strasse")
+        self.assertEqual(kp.extract_keywords("STRASSE", max_edits=1), [("strasse", 0)])
+        self.assertEqual(kp.extract_keywords("Straße", max_edits=1), [("strasse", 0)])
+        self.assertEqual(kp.extract_keywords("Straß", max_edits=1), [("strasse", 1)])
+
+    def test_punctuation_is_not_an_edit(self):
+        kp = KeywordProcessor()
+        kp.add_keyword("rock n roll")
+        self.assertEqual(
+            kp.extract_keywords("rock m roll", max_edits=1), [("rock n roll", 1)]
+        )
+        self.assertEqual(kp.extract_keywords("rock , roll", max_edits=1), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
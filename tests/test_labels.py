@@ -0,0 +1,85 @@
+import unittest
+from textrush import KeywordProcessor
+
+
+class TestLabels(unittest.TestCase):
+    def setUp(self):
+        self.keyword_processor = KeywordProcessor()
+        self.keyword_processor.add_keyword("python", "Python", label="skill")
+        self.keyword_processor.add_keyword("apple", "Apple Inc.", label="company")
+        self.keyword_processor.add_keyword("apple", "Apple", label="food")
+        self.keyword_processor.add_keywords_from_dict(
+            {"NYC": ["new york", "big apple"]}, label="location"
+        )
+        self.keyword_processor.add_keyword("new")
+        self.text = "python at apple in new york"
+
+    def test_len_counts_every_dictionary(self):
+        self.assertEqual(len(self.keyword_processor), 6)
+
+    def test_label_info(self):
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(self.text, label_info=True),
+            [
+                ("Python", "skill"),
+                ("Apple Inc.", "company"),
+                ("Apple", "food"),
+                ("new", None),
+                ("NYC", "location"),
+            ],
+        )
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(
+                self.text, span_info=True, label_info=True, strategy="longest"
+            ),
+            [
+                ("Python", "skill", 0, 6),
+                ("Apple Inc.", "company", 10, 15),
+                ("Apple", "food", 10, 15),
+                ("NYC", "location", 19, 27),
+            ],
+        )
+
+    def test_restrict_labels(self):
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(
+                self.text, labels=["food", "skill"]
+            ),
+            ["Python", "Apple"],
+        )
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(
+                "a big apple", labels="food", span_info=True
+            ),
+            [("Apple", 6, 11)],
+        )
+        # overlaps are only resolved among the selected dictionaries
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(
+                "a big apple", strategy="longest", label_info=True
+            ),
+            [("NYC", "location")],
+        )
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(self.text, labels=["unknown"]),
+            [],
+        )
+
+    def test_remove_from_one_dictionary(self):
+        self.keyword_processor.remove_keyword("apple", label="food")
+        self.keyword_processor.remove_keyword("apple")
+        self.assertEqual(len(self.keyword_processor), 5)
+        self.assertEqual(
+            self.keyword_processor.extract_keywords("apple", label_info=True),
+            [("Apple Inc.", "company")],
+        )
+
+    def test_replace_uses_first_dictionary(self):
+        self.assertEqual(
+            self.keyword_processor.replace_keywords(self.text),
+            "Python at Apple Inc. in NYC",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from textrush import KeywordProcessor, Match, MatchList
+
+
+class TestMatchList(unittest.TestCase):
+    def setUp(self):
+        self.keyword_processor = KeywordProcessor()
+        self.keyword_processor.add_keyword("new york", "NYC", label="city")
+        self.keyword_processor.add_keyword("york")
+        self.keyword_processor.add_keyword("straße", payload={"id": 1})
+        self.text = "I ❤ New York and the Straße in york"
+
+    def test_same_as_eager(self):
+        for strategy in ["all", "longest"]:
+            matches = self.keyword_processor.extract_keywords(
+                self.text, strategy=strategy, lazy=True
+            )
+            self.assertIsInstance(matches, MatchList)
+            expected = self.keyword_processor.extract_keywords(
+                self.text, span_info=True, label_info=True, strategy=strategy
+            )
+            self.assertEqual(len(matches), len(expected))
+            self.assertEqual(
+                [(m.clean_name, m.label, m.start, m.end) for m in matches], expected
+            )
+            for m in matches:
+                self.assertIsInstance(m, Match)
+                self.assertEqual(m.text, self.text[m.start : m.end])
+                self.assertEqual(m.span, (m.start, m.end))
+                self.assertEqual(m.edits, 0)
+
+    def test_indexing(self):
+        matches = self.keyword_processor.extract_keywords(self.text, lazy=True)
+        self.assertEqual(len(matches), 4)
+        self.assertEqual(matches[0].clean_name, "NYC")
+        self.assertEqual(matches[0].label, "city")
+        self.assertEqual(matches[0].text, "New York")
+        self.assertEqual(matches[2].clean_name, {"id": 1})
+        self.assertEqual(matches[2].text, "Straße")
+        self.assertEqual(matches[-1].span, matches[3].span)
+        self.assertEqual(
+            [m.span for m in matches[1::2]], [matches[1].span, matches[3].span]
+        )
+        self.assertEqual(matches[10:], [])
+        for index in [4, -5]:
+            with self.assertRaises(IndexError):
+                matches[index]
+        with self.assertRaises(TypeError):
+            matches["0"]
+        self.assertFalse(self.keyword_processor.extract_keywords("", lazy=True))
+
+    def test_fuzzy_and_labels(self):
+        matches = self.keyword_processor.extract_keywords(
+            "New Yrok", max_edits=1, labels=["city"], lazy=True
+        )
+        self.assertEqual(
+            [(m.clean_name, m.text, m.edits) for m in matches],
+            [("NYC", "New Yrok", 1)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from textrush import KeywordProcessor
+
+
+class TestMaxWeight(unittest.TestCase):
+    def setUp(self):
+        self.keyword_processor = KeywordProcessor()
+        self.keyword_processor.add_keyword("New York", "NY", weight=5)
+        self.keyword_processor.add_keyword("New York City", "NYC", weight=3)
+        self.keyword_processor.add_keyword("City Center", "Downtown", weight=4)
+        self.keyword_processor.add_keyword("York City Center", "YCC", weight=8)
+
+    def test_max_total_weight(self):
+        # NY + Downtown (9) beats YCC (8) and NYC (3)
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(
+                "New York City Center", span_info=True, strategy="max_weight"
+            ),
+            [("NY", 0, 8), ("Downtown", 9, 20)],
+        )
+
+    def test_weight_can_be_overwritten(self):
+        self.keyword_processor.add_keyword("York City Center", "YCC", weight=10)
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(
+                "Visit New York City Center", strategy="max_weight"
+            ),
+            ["YCC"],
+        )
+
+    def test_default_weight_maximizes_match_count(self):
+        kp = KeywordProcessor()
+        kp.add_keywords_from_iter(["a b c", "a", "b", "c d"])
+        self.assertEqual(kp.extract_keywords("a b c d", strategy="longest"), ["a b c"])
+        self.assertEqual(
+            kp.extract_keywords("a b c d", strategy="max_weight"), ["a", "b", "c d"]
+        )
+
+    def test_weight_from_iter(self):
+        kp = KeywordProcessor()
+        kp.add_keywords_from_iter([("big data", "BD", 1.0), ("data lake", "DL", 2.0)])
+        self.assertEqual(
+            kp.extract_keywords("big data lake", strategy="max_weight"), ["DL"]
+        )
+
+    def test_invalid_weight(self):
+        with self.assertRaises(ValueError):
+            self.keyword_processor.add_keyword("Boston", weight=float("nan"))
+
+    def test_no_matches(self):
+        self.assertEqual(
+            self.keyword_processor.extract_keywords("", strategy="max_weight"), []
+        )
+        self.assertEqual(
+            self.keyword_processor.extract_keywords("Boston", strategy="max_weight"),
+            [],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
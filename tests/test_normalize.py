@@ -0,0 +1,74 @@
+import unittest
+from textrush import KeywordProcessor
+
+
+class TestNormalize(unittest.TestCase):
+    def test_default(self):
+        keyword_processor = KeywordProcessor()
+        keyword_processor.add_keyword("café")
+        self.assertIsNone(keyword_processor.normalize)
+        self.assertEqual(keyword_processor.extract_keywords("a cafe"), [])
+        with self.assertRaises(ValueError):
+            KeywordProcessor(normalize="nfd")
+
+    def test_strip_accents(self):
+        for engine in ["hashtrie", "compact", "automaton"]:
+            keyword_processor = KeywordProcessor(
+                normalize="strip_accents", engine=engine
+            )
+            self.assertEqual(keyword_processor.normalize, "strip_accents")
+            keyword_processor.add_keyword("café crème", "coffee")
+            keyword_processor.add_keyword("Zurich", "ZRH")
+            text = "Un CAFÉ CRÈME à Zürich, cafe creme"
+            spans = keyword_processor.extract_keywords(text, span_info=True)
+            self.assertEqual(
+                [(clean_name, text[start:end]) for clean_name, start, end in spans],
+                [
+                    ("coffee", "CAFÉ CRÈME"),
+                    ("ZRH", "Zürich"),
+                    ("coffee", "cafe creme"),
+                ],
+            )
+            self.assertEqual(
+                keyword_processor.replace_keywords(text, "[{match}]"),
+                "Un [CAFÉ CRÈME] à [Zürich], [cafe creme]",
+            )
+            self.assertEqual(
+                sorted(keyword_processor.get_all_keywords()), ["Zurich", "cafe creme"]
+            )
+            keyword_processor.remove_keyword("Zürich")
+            self.assertEqual(keyword_processor.extract_keywords("Zurich"), [])
+
+    def test_nfkc(self):
+        keyword_processor = KeywordProcessor(case_sensitive=True, normalize="nfkc")
+        keyword_processor.add_keyword("ﬁle 2024", "file")
+        keyword_processor.add_keyword("new york", "NYC")
+        text = "the file ２０２４ in new\u00a0york, New York"
+        self.assertEqual(
+            keyword_processor.extract_keywords(text, span_info=True),
+            [("file", 4, 13), ("NYC", 17, 25)],
+        )
+
+    def test_nfkc_casefold(self):
+        keyword_processor = KeywordProcessor(
+            case_sensitive=True, normalize="nfkc_casefold"
+        )
+        keyword_processor.add_keyword("Straße", "street")
+        keyword_processor.add_keyword("ＡＢＣ", "abc")
+        self.assertEqual(
+            keyword_processor.extract_keywords("STRASSE Abc strasse"),
+            ["street", "abc", "street"],
+        )
+
+    def test_from_pairs(self):
+        keyword_processor = KeywordProcessor.from_pairs(
+            [("café", "coffee"), ("cafe", "Coffee")],
+            n_threads=2,
+            normalize="strip_accents",
+        )
+        self.assertEqual(len(keyword_processor), 1)
+        self.assertEqual(keyword_processor.extract_keywords("CAFÉ"), ["Coffee"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import gc
+import sys
+import unittest
+import weakref
+from textrush import KeywordProcessor
+
+
+class TestPayloads(unittest.TestCase):
+    def setUp(self):
+        self.keyword_processor = KeywordProcessor()
+        self.python = {"id": 17, "kind": "language"}
+        self.keyword_processor.add_keyword("python", payload=self.python)
+        self.keyword_processor.add_keyword("machine learning", "ML", payload=42)
+        self.keyword_processor.add_keyword("rust")
+
+    def test_payload_replaces_clean_name(self):
+        keywords = self.keyword_processor.extract_keywords(
+            "python, rust and machine learning"
+        )
+        self.assertEqual(keywords, [self.python, "rust", 42])
+        self.assertIs(keywords[0], self.python)
+
+    def test_span_and_labels(self):
+        self.keyword_processor.add_keyword("rust", label="skill", payload=7)
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(
+                "rust", span_info=True, label_info=True
+            ),
+            [("rust", None, 0, 4), (7, "skill", 0, 4)],
+        )
+
+    def test_clean_names_are_kept(self):
+        self.assertEqual(
+            self.keyword_processor.replace_keywords("I like machine learning"),
+            "I like ML",
+        )
+
+    def test_readd_and_remove_release_payloads(self):
+        payload = object()
+        self.keyword_processor.add_keyword("java", payload=payload)
+        refcount = sys.getrefcount(payload)
+        self.keyword_processor.add_keyword("java", payload="JVM")
+        self.assertEqual(sys.getrefcount(payload), refcount - 1)
+        self.assertEqual(self.keyword_processor.extract_keywords("java"), ["JVM"])
+        self.keyword_processor.add_keyword("java")
+        self.assertEqual(self.keyword_processor.extract_keywords("java"), ["java"])
+        self.keyword_processor.remove_keyword("python")
+        self.keyword_processor.add_keyword("go", payload=3)
+        self.assertEqual(
+            self.keyword_processor.extract_keywords("go python machine learning"),
+            [3, 42],
+        )
+
+    def test_reference_cycles_are_collected(self):
+        class Holder:
+            pass
+
+        holder = Holder()
+        holder.kp = KeywordProcessor()
+        holder.kp.add_keyword("cycle", payload=holder)
+        ref = weakref.ref(holder)
+        del holder
+        gc.collect()
+        self.assertIsNone(ref())
+
+
+if __name__ == "__main__":
+    unittest.main()
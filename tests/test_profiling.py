@@ -0,0 +1,63 @@
+import unittest
+from textrush import KeywordProcessor
+
+
+class TestProfiling(unittest.TestCase):
+    def setUp(self):
+        self.keyword_processor = KeywordProcessor()
+        self.keyword_processor.add_keywords_from_dict(
+            {"ML": ["machine learning"], "Python": ["python"]}
+        )
+        # tokens: I, " ", love, " ", python, " ", and, " ", machine, " ", learning
+        self.text = "I love python and machine learning"
+
+    def test_disabled_by_default(self):
+        self.keyword_processor.extract_keywords(self.text)
+        self.assertIsNone(self.keyword_processor.profile_report())
+
+    def test_counters_all(self):
+        self.keyword_processor.enable_profiling()
+        keywords = self.keyword_processor.extract_keywords(self.text)
+        self.assertEqual(keywords, ["Python", "ML"])
+        report = self.keyword_processor.profile_report()
+        self.assertEqual(report["calls"], 1)
+        self.assertEqual(report["tokens_scanned"], 11)
+        self.assertEqual(report["matches_emitted"], 2)
+        # "python" -> 1 transition, "machine learning" -> 3 transitions
+        self.assertEqual(report["edge_transitions"], 4)
+        # only "python" and "machine" can start a keyword, the other tokens
+        # are rejected before probing the trie
+        self.assertEqual(report["prefiltered"], 9)
+        # every probed attempt ends on a failed probe except the one reaching
+        # the end of the text
+        self.assertEqual(report["trie_probes"], 4 + 2 - 1)
+        self.assertEqual(report["abandoned_at_depth"], [9, 1, 0, 1])
+        self.assertEqual(sum(report["abandoned_at_depth"]), report["tokens_scanned"])
+        for key in ("segmentation_ns", "scanning_ns", "conversion_ns"):
+            self.assertGreaterEqual(report[key], 0)
+
+    def test_counters_accumulate_and_reset(self):
+        self.keyword_processor.enable_profiling()
+        self.keyword_processor.extract_keywords(self.text, span_info=True)
+        self.keyword_processor.extract_keywords(self.text, strategy="longest")
+        report = self.keyword_processor.profile_report()
+        self.assertEqual(report["calls"], 2)
+        self.assertEqual(report["matches_emitted"], 4)
+        self.keyword_processor.enable_profiling()
+        self.assertEqual(self.keyword_processor.profile_report()["calls"], 0)
+        self.keyword_processor.enable_profiling(False)
+        self.assertIsNone(self.keyword_processor.profile_report())
+
+    def test_counters_of_a_batch(self):
+        self.keyword_processor.enable_profiling()
+        self.keyword_processor.extract_spans_flat([self.text, "", self.text])
+        report = self.keyword_processor.profile_report()
+        # one call per document, the columns are converted once
+        self.assertEqual(report["calls"], 3)
+        self.assertEqual(report["matches_emitted"], 4)
+        self.assertEqual(report["tokens_scanned"], 22)
+        self.assertGreaterEqual(report["conversion_ns"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -62,6 +62,19 @@ class TestKeywordRemover(unittest.TestCase):
                 ),
             )
 
+    def test_invalid_keyword_keeps_processor_usable(self):
+        keyword_processor = KeywordProcessor()
+        keyword_processor.add_keyword("python")
+        for word in ["", " ", "."]:
+            with self.assertRaises(ValueError):
+                keyword_processor.remove_keyword(word)
+            with self.assertRaises(ValueError):
+                keyword_processor.add_keyword(word)
+        self.assertEqual(keyword_processor.extract_keywords("python"), ["python"])
+        keyword_processor.remove_keyword("python")
+        keyword_processor.add_keyword("rust")
+        self.assertEqual(keyword_processor.extract_keywords("python rust"), ["rust"])
+
 
 if __name__ == "__main__":
     unittest.main()
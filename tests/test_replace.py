@@ -0,0 +1,60 @@
+import unittest
+from textrush import KeywordProcessor
+
+
+class TestReplace(unittest.TestCase):
+    def setUp(self):
+        self.keyword_processor = KeywordProcessor()
+        self.keyword_processor.add_keyword("john smith", "PERSON")
+        self.keyword_processor.add_keyword("jane doe", "PERSON")
+        self.keyword_processor.add_keyword("acme", "ORG", label="company")
+        self.text = "John Smith met Jane Doe at ACME, then john smith left."
+
+    def test_default(self):
+        self.assertEqual(
+            self.keyword_processor.replace_keywords(self.text),
+            "PERSON met PERSON at ORG, then PERSON left.",
+        )
+
+    def test_template(self):
+        self.assertEqual(
+            self.keyword_processor.replace_keywords(self.text, "<b>{clean}</b>"),
+            "<b>PERSON</b> met <b>PERSON</b> at <b>ORG</b>, then <b>PERSON</b> left.",
+        )
+        self.assertEqual(
+            self.keyword_processor.replace_keywords(
+                "ACME and Jane Doe", repl="{{{label}:{match}}}"
+            ),
+            "{company:ACME} and {:Jane Doe}",
+        )
+        for template in ["{name}", "{clean", "clean}"]:
+            with self.assertRaises(ValueError):
+                self.keyword_processor.replace_keywords(self.text, template)
+
+    def test_callable_is_called_once_per_clean_name(self):
+        calls = []
+
+        def redact(clean_name):
+            calls.append(clean_name)
+            return f"[{clean_name}-{len(calls)}]"
+
+        self.assertEqual(
+            self.keyword_processor.replace_keywords(self.text, redact),
+            "[PERSON-1] met [PERSON-1] at [ORG-2], then [PERSON-1] left.",
+        )
+        self.assertEqual(calls, ["PERSON", "ORG"])
+
+    def test_callable_errors(self):
+        def fail(clean_name):
+            raise KeyError(clean_name)
+
+        with self.assertRaises(KeyError):
+            self.keyword_processor.replace_keywords(self.text, fail)
+        with self.assertRaises(TypeError):
+            self.keyword_processor.replace_keywords(self.text, lambda _: 1)
+        with self.assertRaises(TypeError):
+            self.keyword_processor.replace_keywords(self.text, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
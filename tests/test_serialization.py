@@ -0,0 +1,96 @@
+import struct
+import unittest
+from textrush import KeywordProcessor
+
+ENGINES = ["hashtrie", "compact", "automaton"]
+
+
+class TestSerialization(unittest.TestCase):
+    def setUp(self):
+        self.text = "John Smith met Jane Doe at ＡＣＭＥ, then john smith left."
+
+    def processor(self, case_sensitive, engine):
+        keyword_processor = KeywordProcessor(
+            case_sensitive, engine=engine, normalize="nfkc"
+        )
+        keyword_processor.add_keyword("john smith", "PERSON", weight=2)
+        keyword_processor.add_keyword("jane doe", "PERSON")
+        keyword_processor.add_keyword("acme", "ORG", label="company")
+        keyword_processor.add_keyword("smith")
+        keyword_processor.add_keyword("doe")
+        keyword_processor.remove_keyword("doe")
+        return keyword_processor
+
+    def test_round_trip(self):
+        for engine in ENGINES:
+            for case_sensitive in [False, True]:
+                expected = self.processor(case_sensitive, engine)
+                keyword_processor = KeywordProcessor.from_bytes(expected.to_bytes())
+                self.assertEqual(keyword_processor.engine, engine)
+                self.assertEqual(keyword_processor.normalize, "nfkc")
+                self.assertEqual(len(keyword_processor), len(expected))
+                for strategy in ["all", "longest", "max_weight"]:
+                    self.assertEqual(
+                        keyword_processor.extract_keywords(
+                            self.text,
+                            span_info=True,
+                            label_info=True,
+                            strategy=strategy,
+                        ),
+                        expected.extract_keywords(
+                            self.text,
+                            span_info=True,
+                            label_info=True,
+                            strategy=strategy,
+                        ),
+                    )
+                self.assertEqual(
+                    keyword_processor.replace_keywords(self.text),
+                    expected.replace_keywords(self.text),
+                )
+                self.assertEqual(
+                    sorted(keyword_processor.get_all_keywords_with_clean_names()),
+                    sorted(expected.get_all_keywords_with_clean_names()),
+                )
+
+    def test_payloads_are_not_saved(self):
+        keyword_processor = KeywordProcessor()
+        keyword_processor.add_keyword("acme", "ORG", payload={"id": 1})
+        keyword_processor = KeywordProcessor.from_bytes(keyword_processor.to_bytes())
+        self.assertEqual(keyword_processor.extract_keywords("ACME"), ["ORG"])
+        # new payloads do not end up on the loaded keywords
+        keyword_processor.add_keyword("initech", "ORG", payload={"id": 2})
+        self.assertEqual(
+            keyword_processor.extract_keywords("ACME and Initech"),
+            ["ORG", {"id": 2}],
+        )
+
+    def test_payload_ids_from_input(self):
+        keyword_processor = KeywordProcessor()
+        keyword_processor.add_keyword("acme", "ACME", payload={"id": 1})
+        data = keyword_processor.to_bytes()
+        # the clean name and payload id of "acme", as `to_bytes` writes them
+        node = b"\x01\x04\x00\x00\x00ACME\x01" + struct.pack("<Q", 0)
+        self.assertEqual(data.count(node), 1)
+        for id in [2**32, 2**64 - 2]:
+            crafted = data.replace(node, node[:-8] + struct.pack("<Q", id))
+            keyword_processor = KeywordProcessor.from_bytes(crafted)
+            self.assertEqual(keyword_processor.extract_keywords("acme"), ["ACME"])
+            keyword_processor.add_keyword("initech", "ORG", payload={"id": 2})
+            self.assertEqual(
+                keyword_processor.extract_keywords("acme initech"),
+                ["ACME", {"id": 2}],
+            )
+        crafted = data.replace(node, node[:-8] + struct.pack("<Q", 2**64 - 1))
+        with self.assertRaises(ValueError):
+            KeywordProcessor.from_bytes(crafted)
+
+    def test_invalid(self):
+        data = self.processor(False, "hashtrie").to_bytes()
+        for invalid in [b"", b"not keywords", data[:-1], data + b"\0"]:
+            with self.assertRaises(ValueError):
+                KeywordProcessor.from_bytes(invalid)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import sys
+import unittest
+from textrush import KeywordProcessor
+
+
+class TestStats(unittest.TestCase):
+    def setUp(self):
+        self.keywords = {
+            "Python": ["python", "py"],
+            "ML": ["machine learning"],
+            "Big Data": ["big data", "Big Data Analytics"],
+        }
+
+    def test_empty_processor(self):
+        for case_sensitive in (True, False):
+            stats = KeywordProcessor(case_sensitive=case_sensitive).stats()
+            self.assertEqual(stats["len"], 0)
+            self.assertEqual(stats["node_count"], 1)
+            self.assertEqual(stats["edge_count"], 0)
+            self.assertEqual(stats["max_depth"], 0)
+            self.assertEqual(stats["avg_depth"], 0.0)
+            self.assertEqual(stats["fanout_histogram"], [1])
+            self.assertEqual(stats["distinct_clean_names"], 0)
+
+    def test_structure(self):
+        for case_sensitive in (True, False):
+            kp = KeywordProcessor(case_sensitive=case_sensitive)
+            kp.add_keywords_from_dict(self.keywords)
+            stats = kp.stats()
+            self.assertEqual(stats["len"], len(kp))
+            # a tree always has one edge less than it has nodes
+            self.assertEqual(stats["edge_count"], stats["node_count"] - 1)
+            self.assertEqual(sum(stats["fanout_histogram"]), stats["node_count"])
+            # "Big Data Analytics" -> ["Big", " ", "Data", " ", "Analytics"]
+            self.assertEqual(stats["max_depth"], 5)
+            self.assertEqual(stats["avg_depth"], (1 + 1 + 3 + 3 + 5) / 5)
+            self.assertEqual(stats["distinct_clean_names"], 3)
+            self.assertGreater(stats["trie_heap_bytes"], 0)
+            self.assertGreater(stats["clean_name_heap_bytes"], 0)
+
+    def test_distinct_tokens_case_insensitive(self):
+        kp = KeywordProcessor(case_sensitive=False)
+        kp.add_keyword("big data")
+        kp.add_keyword("data BIG")
+        # "big", "data" and " " regardless of case
+        self.assertEqual(kp.stats()["distinct_tokens"], 3)
+        kp = KeywordProcessor(case_sensitive=True)
+        kp.add_keyword("big data")
+        kp.add_keyword("data BIG")
+        self.assertEqual(kp.stats()["distinct_tokens"], 4)
+
+    def test_sizeof_grows(self):
+        kp = KeywordProcessor()
+        empty_size = sys.getsizeof(kp)
+        kp.add_keywords_from_dict(self.keywords)
+        self.assertGreater(sys.getsizeof(kp), empty_size)
+
+
+if __name__ == "__main__":
+    unittest.main()
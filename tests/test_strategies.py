@@ -0,0 +1,94 @@
+import unittest
+from textrush import KeywordProcessor
+from textrush.core import ExtractorStrategy
+
+
+class TestStrategies(unittest.TestCase):
+    def setUp(self):
+        self.keyword_processor = KeywordProcessor()
+        # insertion order matters for "leftmost_first"
+        for keyword, clean_name in [
+            ("New York", "NY"),
+            ("New York City", "NYC"),
+            ("York City Center", "YCC"),
+            ("City Center", "Downtown"),
+            ("Center", "Center"),
+            ("Park", "Park"),
+        ]:
+            self.keyword_processor.add_keyword(keyword, clean_name)
+
+    def extract(self, text, strategy):
+        return self.keyword_processor.extract_keywords(
+            text, span_info=True, strategy=strategy
+        )
+
+    def test_all_and_longest_unchanged(self):
+        text = "New York City Center"
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(text),
+            ["NY", "NYC", "YCC", "Downtown", "Center"],
+        )
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(text, strategy="longest"),
+            ["NYC", "Center"],
+        )
+
+    def test_leftmost_first(self):
+        self.assertEqual(
+            self.extract("New York City Center", "leftmost_first"),
+            [("NY", 0, 8), ("Downtown", 9, 20)],
+        )
+        # re-adding a keyword keeps its original position in the dictionary
+        self.keyword_processor.add_keyword("New York City", "The Big Apple")
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(
+                "New York City", strategy=ExtractorStrategy.LEFTMOST_FIRST
+            ),
+            ["NY"],
+        )
+
+    def test_shortest(self):
+        self.assertEqual(
+            self.extract("New York City Center", "shortest"),
+            [("NY", 0, 8), ("Downtown", 9, 20)],
+        )
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(
+                "City Center", strategy=ExtractorStrategy.SHORTEST
+            ),
+            ["Downtown"],
+        )
+
+    def test_non_overlapping_all(self):
+        text = "New York City Center and Central Park"
+        self.assertEqual(
+            self.extract(text, "non_overlapping_all"),
+            [("Park", 33, 37)],
+        )
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(
+                "Park at the Center", strategy="non_overlapping_all"
+            ),
+            ["Park", "Center"],
+        )
+
+    def test_strategies_agree_without_overlaps(self):
+        text = "Park near New York"
+        expected = self.extract(text, "all")
+        for strategy in ExtractorStrategy:
+            self.assertEqual(self.extract(text, strategy), expected, strategy)
+
+    def test_invalid_strategy(self):
+        for strategy in ["ALL", "LONGEST", "first"]:
+            with self.assertRaises(ValueError):
+                self.extract("New York", strategy)
+            with self.assertRaises(ValueError):
+                self.keyword_processor.extract_keywords(
+                    "New York", strategy=strategy, lazy=True
+                )
+            with self.assertRaises(ValueError):
+                self.keyword_processor.extract_spans_flat(["New York"], strategy)
+
+
+if __name__ == "__main__":
+    unittest.main()
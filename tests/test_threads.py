@@ -0,0 +1,146 @@
+import sys
+import sysconfig
+import threading
+import unittest
+from textrush import KeywordProcessor
+
+N_THREADS = 8
+
+
+def run_threads(target, n_threads=N_THREADS):
+    errors = []
+    barrier = threading.Barrier(n_threads)
+
+    def run(i):
+        try:
+            barrier.wait()
+            target(i)
+        except BaseException as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+class TestThreads(unittest.TestCase):
+    def setUp(self):
+        self.keyword_processor = KeywordProcessor()
+        for i in range(200):
+            self.keyword_processor.add_keyword(f"term {i}", f"T{i}", payload=(i,))
+        self.text = " ".join(f"term {i}," for i in range(0, 400, 3))
+
+    @unittest.skipUnless(
+        sysconfig.get_config_var("Py_GIL_DISABLED"), "needs a free-threaded build"
+    )
+    def test_gil_stays_disabled(self):
+        self.assertFalse(sys._is_gil_enabled())
+
+    def test_concurrent_extraction(self):
+        expected = self.keyword_processor.extract_keywords(self.text, span_info=True)
+
+        def extract(_):
+            for _ in range(50):
+                self.assertEqual(
+                    self.keyword_processor.extract_keywords(self.text, span_info=True),
+                    expected,
+                )
+
+        self.assertEqual(run_threads(extract), [])
+
+    def test_concurrent_extraction_with_profiling(self):
+        expected = self.keyword_processor.extract_keywords(self.text)
+
+        def extract(_):
+            for _ in range(20):
+                self.assertEqual(
+                    self.keyword_processor.extract_keywords(self.text), expected
+                )
+
+        for enabled in [False, True, False]:
+            self.keyword_processor.enable_profiling(enabled)
+            self.assertEqual(run_threads(extract), [])
+            report = self.keyword_processor.profile_report()
+            if enabled:
+                self.assertEqual(report["calls"], N_THREADS * 20)
+                self.assertEqual(
+                    report["matches_emitted"], N_THREADS * 20 * len(expected)
+                )
+            else:
+                self.assertIsNone(report)
+
+    def test_readers_and_writer(self):
+        # the writer adds "term 200" ... in order, so every extraction must
+        # see the payloads of a prefix of them
+        done = threading.Event()
+
+        def work(i):
+            if i == 0:
+                try:
+                    for j in range(200, 400):
+                        self.keyword_processor.add_keyword(
+                            f"term {j}", f"T{j}", payload=(j,)
+                        )
+                        if j % 50 == 0:
+                            self.keyword_processor.remove_keyword(f"term {j - 200}")
+                            self.keyword_processor.add_keyword(
+                                f"term {j - 200}", f"T{j - 200}", payload=(j - 200,)
+                            )
+                finally:
+                    done.set()
+                return
+            seen = 0
+            while not done.is_set():
+                found = [
+                    payload[0]
+                    for payload in self.keyword_processor.extract_keywords(self.text)
+                ]
+                added = [j for j in found if j >= 200]
+                self.assertEqual(added, list(range(201, 201 + 3 * len(added), 3)))
+                self.assertGreaterEqual(len(added), seen)
+                seen = len(added)
+                self.assertEqual(
+                    self.keyword_processor.filter_batch([self.text, "none"]),
+                    [True, False],
+                )
+
+        self.assertEqual(run_threads(work), [])
+        self.assertEqual(len(self.keyword_processor), 400)
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(self.text),
+            [(i,) for i in range(0, 400, 3)],
+        )
+
+    def test_concurrent_writers(self):
+        def add(i):
+            for j in range(100):
+                self.keyword_processor.add_keyword(f"word {i} {j}", payload=[i, j])
+                self.keyword_processor.extract_keywords(f"word {i} {j}")
+            for j in range(0, 100, 2):
+                self.keyword_processor.remove_keyword(f"word {i} {j}")
+
+        self.assertEqual(run_threads(add), [])
+        self.assertEqual(len(self.keyword_processor), 200 + N_THREADS * 50)
+        for i in range(N_THREADS):
+            self.assertEqual(
+                self.keyword_processor.extract_keywords(f"word {i} 1, word {i} 2"),
+                [[i, 1]],
+            )
+
+    def test_callback_may_change_the_processor(self):
+        def repl(clean_name):
+            self.keyword_processor.add_keyword(clean_name.lower())
+            return f"<{clean_name}>"
+
+        self.assertEqual(
+            self.keyword_processor.replace_keywords("term 1 and term 2", repl),
+            "<T1> and <T2>",
+        )
+        self.assertEqual(self.keyword_processor.extract_keywords("t1"), ["t1"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from textrush import KeywordProcessor
+
+
+class TestTokenizers(unittest.TestCase):
+    def test_default_tokenizer(self):
+        self.assertEqual(KeywordProcessor().tokenizer, "word_bounds")
+
+    def test_invalid_tokenizer(self):
+        with self.assertRaises(ValueError):
+            KeywordProcessor(tokenizer="regex")
+
+    def test_char_tokenizer_cjk(self):
+        kp = KeywordProcessor(case_sensitive=True, tokenizer="char")
+        kp.add_keywords_from_dict({"Tokyo": ["東京"], "Tokyo Tower": ["東京タワー"]})
+        text = "私は東京タワーに行きました"
+        self.assertEqual(
+            kp.extract_keywords(text, span_info=True),
+            [("Tokyo", 2, 4), ("Tokyo Tower", 2, 7)],
+        )
+        self.assertEqual(kp.extract_keywords(text, strategy="longest"), ["Tokyo Tower"])
+        self.assertEqual(kp.replace_keywords("東京へ"), "Tokyoへ")
+
+    def test_char_tokenizer_matches_inside_words(self):
+        kp = KeywordProcessor(tokenizer="char")
+        kp.add_keyword("cat")
+        self.assertEqual(kp.extract_keywords("concatenate"), ["cat"])
+        kp = KeywordProcessor()
+        kp.add_keyword("cat")
+        self.assertEqual(kp.extract_keywords("concatenate"), [])
+
+    def test_whitespace_tokenizer(self):
+        kp = KeywordProcessor(tokenizer="whitespace")
+        kp.add_keyword("ERROR", "error")
+        kp.add_keyword("/api/v1/login", "login")
+        kp.add_keyword("connection-reset by-peer", "reset")
+        text = "2024-01-01 ERROR /api/v1/login connection-reset by-peer ERROR:"
+        self.assertEqual(
+            kp.extract_keywords(text, span_info=True),
+            [("error", 11, 16), ("login", 17, 30), ("reset", 31, 55)],
+        )
+        # tokens are whitespace delimited, so "ERROR:" is a different token
+        self.assertEqual(kp.get_all_keywords().count("ERROR"), 1)
+
+    def test_grapheme_tokenizer(self):
+        kp = KeywordProcessor(case_sensitive=True, tokenizer="grapheme")
+        kp.add_keyword("👨‍💻", "technologist")
+        kp.add_keyword("👨", "man")
+        self.assertEqual(
+            kp.extract_keywords("Developer: 👨‍💻 and 👨"), ["technologist", "man"]
+        )
+        # word_bounds splits the same way for emoji sequences
+        kp = KeywordProcessor(case_sensitive=True)
+        kp.add_keyword("👨‍💻", "technologist")
+        self.assertEqual(kp.extract_keywords("Developer: 👨‍💻"), ["technologist"])
+
+    def test_get_all_keywords_roundtrip(self):
+        for tokenizer in ("word_bounds", "whitespace", "char", "grapheme"):
+            kp = KeywordProcessor(tokenizer=tokenizer)
+            kp.add_keywords_from_iter(["new york", "東京", "log-level=debug"])
+            self.assertEqual(
+                sorted(kp.get_all_keywords()),
+                sorted(["new york", "東京", "log-level=debug"]),
+                tokenizer,
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+from textrush import versions
+
+
+class TestVersion002(unittest.TestCase):
+    def setUp(self):
+        self.keyword_processor = versions["0.0.2"]()
+        self.keyword_processor.add_keyword("New York", "NY")
+        self.keyword_processor.add_keyword("york")
+
+    def test_extract(self):
+        text = "in new YORK now"
+        self.assertEqual(self.keyword_processor.extract_keywords(text), ["NY", "york"])
+        self.assertEqual(
+            self.keyword_processor.extract_keywords(text, span_info=True),
+            [("NY", 3, 11), ("york", 7, 11)],
+        )
+
+    def test_keywords_added_after_extraction(self):
+        self.assertEqual(self.keyword_processor.extract_keywords("new jersey"), [])
+        self.keyword_processor.add_keyword("new jersey", "NJ")
+        self.assertEqual(self.keyword_processor.extract_keywords("new jersey"), ["NJ"])
+        self.keyword_processor.add_keywords_from_dict({"jersey": "Jersey"})
+        self.assertEqual(
+            self.keyword_processor.extract_keywords("new jersey"), ["NJ", "Jersey"]
+        )
+        self.assertEqual(
+            self.keyword_processor._kp.extract_keywords_from_list(
+                ["new york", "jersey"]
+            ),
+            [["NY", "york"], ["Jersey"]],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()